@@ -0,0 +1,40 @@
+import json
+
+from core.errors import InvalidRequestError, SimError, UnknownInstanceError
+from core.metrics import MetricsRegistry
+from .tcp_json_v1 import TcpJsonV1Server, error_frame
+
+
+class InstanceRouter(TcpJsonV1Server):
+    # One tcp_json_v1 front end for a host: every request carries "instance_id", which is removed
+    # before the request reaches that instance's backend (anything with handle_request(req, session)).
+    def __init__(self, backends: dict, name: str, bind_ip: str, port: int, **kwargs):
+        super().__init__(None, name=name, bind_ip=bind_ip, port=port, **kwargs)
+        self.backends = backends
+        # Front-end counters (push overflows) belong to no single instance.
+        self.metrics = MetricsRegistry()
+
+    def _handle_line(self, line: bytes, session=None):
+        try:
+            req = json.loads(line.decode("utf-8"))
+            if not isinstance(req, dict):
+                raise InvalidRequestError("request must be object")
+            instance_id = req.pop("instance_id", None)
+            if not isinstance(instance_id, str):
+                raise InvalidRequestError("instance_id required")
+            backend = self.backends.get(instance_id)
+            if backend is None:
+                raise UnknownInstanceError(f"Unknown instance: {instance_id}")
+        except SimError as exc:
+            return error_frame(exc)
+        except Exception as exc:
+            return {"ok": False, "err": {"code": "INTERNAL_ERROR", "message": str(exc)}}
+        return backend.handle_request(req, session)
+
+    def _close_session(self, session):
+        # Subscriptions live in each instance's hub.
+        for backend in self.backends.values():
+            hub = getattr(backend, "hub", None)
+            if hub is not None:
+                hub.unsubscribe(session)
+        session.close()
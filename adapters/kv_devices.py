@@ -0,0 +1,58 @@
+from core.errors import InvalidRequestError, OutOfRangeError, UnknownDeviceError
+
+# How the KV names number each device: "relay" is <channel><2-digit bit 00-15>,
+# "hex" is a hexadecimal point number, everything else is decimal.
+NUMBERING = {
+    "R": "relay",
+    "MR": "relay",
+    "LR": "relay",
+    "CR": "relay",
+    "B": "hex",
+    "VB": "hex",
+    "W": "hex",
+}
+
+
+class KvDeviceParser:
+    def __init__(self, profile):
+        self.profile = profile
+        self._suffixes = sorted(profile.devices, key=len, reverse=True)
+
+    def split(self, name: str) -> tuple[str, str]:
+        name = name.strip().upper()
+        for suffix in self._suffixes:
+            if name.startswith(suffix) and len(name) > len(suffix):
+                return suffix, name[len(suffix) :]
+        raise UnknownDeviceError(f"Unknown device: {name}")
+
+    def number(self, dev: str, digits: str) -> int:
+        numbering = NUMBERING.get(dev, "dec")
+        try:
+            if numbering == "hex":
+                return int(digits, 16)
+            value = int(digits, 10)
+        except ValueError as exc:
+            raise InvalidRequestError(f"bad device number {dev}{digits}") from exc
+        if numbering == "relay":
+            channel, bit = divmod(value, 100)
+            if bit > 15:
+                raise OutOfRangeError(f"{dev}{digits}: bit number must be 00-15")
+            return channel * 16 + bit
+        return value
+
+    def parse(self, name: str, word_access: bool = False) -> tuple[str, str, int]:
+        # Returns (device suffix, space, address); bit devices read as words are addressed per 16 points.
+        dev, digits = self.split(name)
+        model = self.profile.get_model(dev)
+        addr = self.number(dev, digits)
+        if "bit" in model.supported_spaces and not word_access:
+            return dev, "bit", addr
+        if "bit" in model.supported_spaces:
+            if "word" not in model.supported_spaces:
+                raise OutOfRangeError(f"{dev} has no word access")
+            if addr % 16:
+                raise OutOfRangeError(f"{name}: word access must start on a channel boundary")
+            return dev, "word", addr // 16
+        if "word" in model.supported_spaces:
+            return dev, "word", addr
+        return dev, "dword", addr
@@ -0,0 +1,176 @@
+import socket
+
+from core.errors import (
+    InvalidRequestError,
+    OutOfRangeError,
+    ReadOnlyError,
+    SimError,
+    TooManyPointsError,
+    TypeMismatchError,
+    UnknownDeviceError,
+)
+from .kv_devices import KvDeviceParser
+from .tcp_json_v1 import TcpJsonV1Server
+
+# KV host-link (upper link) ASCII commands, one per CR-terminated line:
+#   RD <dev>[.fmt]            RDS <dev>[.fmt] <count>
+#   WR <dev>[.fmt] <value>    WRS <dev>[.fmt] <count> <v1> ... <vn>
+#   ST <dev> / RS <dev>       ?K (model code)
+# fmt: U unsigned 16, S signed 16, D unsigned 32, L signed 32, H hex 16.
+# Responses end with CR LF; errors are E0 (device/range), E1 (command), E4 (write protected).
+MODEL_CODE = "55"
+FORMATS = ("U", "S", "D", "L", "H")
+WIDE = ("D", "L")
+
+
+def format_value(value: int, fmt: str) -> str:
+    if fmt == "U":
+        return f"{value & 0xFFFF:05d}"
+    if fmt == "S":
+        value &= 0xFFFF
+        return f"{value - 0x10000 if value & 0x8000 else value:+06d}"
+    if fmt == "D":
+        return f"{value:010d}"
+    if fmt == "L":
+        return f"{value - 0x100000000 if value & 0x80000000 else value:+011d}"
+    return f"{value & 0xFFFF:04X}"
+
+
+def parse_value(text: str, fmt: str | None) -> int:
+    if fmt == "H":
+        value = int(text, 16)
+    else:
+        value = int(text, 10)
+    if fmt in ("S", "L") and value < 0:
+        value += 0x10000 if fmt == "S" else 0x100000000
+    return value
+
+
+class KvHostLinkServer(TcpJsonV1Server):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parser = KvDeviceParser(self.device_memory.profile)
+
+    def _reject(self, client: socket.socket):
+        with client:
+            try:
+                client.sendall(b"E1\r\n")
+            except OSError:
+                pass
+
+    def handle_client(self, conn: socket.socket):
+        max_frame = self.limits["max_frame_bytes"]
+        with conn:
+            if self.timeout_ms:
+                conn.settimeout(self.timeout_ms / 1000)
+            buffer = bytearray()
+            while True:
+                try:
+                    chunk = conn.recv(65536)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                buffer += chunk
+                out = []
+                start = 0
+                while True:
+                    end = buffer.find(b"\r", start)
+                    if end < 0:
+                        break
+                    line = buffer[start:end].decode("ascii", "replace").strip()
+                    start = end + 1
+                    if line:
+                        out.append(self.handle_command(line).encode("ascii") + b"\r\n")
+                del buffer[:start]
+                if len(buffer) > max_frame:
+                    out.append(b"E1\r\n")
+                    conn.sendall(b"".join(out))
+                    break
+                if out:
+                    conn.sendall(b"".join(out))
+
+    def handle_command(self, line: str) -> str:
+        try:
+            parts = line.split()
+            cmd = parts[0].upper()
+            if cmd == "?K":
+                return MODEL_CODE
+            if cmd == "RD" and len(parts) == 2:
+                return self._read(parts[1], 1)
+            if cmd == "RDS" and len(parts) == 3:
+                return self._read(parts[1], int(parts[2]))
+            if cmd == "WR" and len(parts) == 3:
+                self._write(parts[1], parts[2:])
+                return "OK"
+            if cmd == "WRS" and len(parts) >= 4:
+                count = int(parts[2])
+                if count != len(parts) - 3:
+                    raise InvalidRequestError("value count mismatch")
+                self._write(parts[1], parts[3:])
+                return "OK"
+            if cmd in ("ST", "RS") and len(parts) == 2:
+                dev, space, addr = self.parser.parse(parts[1])
+                if space != "bit":
+                    raise TypeMismatchError(f"{dev} is not a bit device")
+                self._check_writable()
+                self.device_memory.write_bits(dev, addr, [1 if cmd == "ST" else 0], source=f"adapter:{self.name}")
+                return "OK"
+            raise InvalidRequestError(f"unsupported command {cmd}")
+        except ReadOnlyError:
+            return "E4"
+        except (UnknownDeviceError, OutOfRangeError, TypeMismatchError, TooManyPointsError):
+            return "E0"
+        except (SimError, ValueError, IndexError):
+            return "E1"
+
+    def _check_writable(self):
+        if self.readonly:
+            raise ReadOnlyError("adapter in readonly mode")
+
+    def _target(self, token: str) -> tuple[str, str, int, str | None]:
+        name, _, fmt = token.partition(".")
+        fmt = fmt.upper() or None
+        if fmt is not None and fmt not in FORMATS:
+            raise InvalidRequestError(f"unknown data format .{fmt}")
+        dev, space, addr = self.parser.parse(name, word_access=fmt is not None)
+        return dev, space, addr, fmt
+
+    def _read(self, token: str, count: int) -> str:
+        if not 1 <= count <= self.limits["max_points_per_request"]:
+            raise TooManyPointsError("count over limit")
+        dev, space, addr, fmt = self._target(token)
+        source = f"adapter:{self.name}"
+        mem = self.device_memory
+        if space == "bit":
+            return " ".join(map(str, mem.read_bits(dev, addr, count, source=source)))
+        if space == "dword":
+            fmt = fmt or "D"
+            values = mem.read_dwords(dev, addr, count, source=source)
+        elif fmt in WIDE:
+            words = mem.read_words(dev, addr, count * 2, source=source)
+            values = [lo | (hi << 16) for lo, hi in zip(words[0::2], words[1::2])]
+        else:
+            fmt = fmt or "U"
+            values = mem.read_words(dev, addr, count, source=source)
+        return " ".join(format_value(v, fmt) for v in values)
+
+    def _write(self, token: str, texts: list[str]) -> None:
+        self._check_writable()
+        if len(texts) > self.limits["max_points_per_request"]:
+            raise TooManyPointsError("values over limit")
+        dev, space, addr, fmt = self._target(token)
+        values = [parse_value(t, fmt) for t in texts]
+        source = f"adapter:{self.name}"
+        mem = self.device_memory
+        if space == "bit":
+            mem.write_bits(dev, addr, values, source=source)
+        elif space == "dword":
+            mem.write_dwords(dev, addr, values, source=source)
+        elif fmt in WIDE:
+            words = []
+            for v in values:
+                words.extend((v & 0xFFFF, (v >> 16) & 0xFFFF))
+            mem.write_words(dev, addr, words, source=source)
+        else:
+            mem.write_words(dev, addr, values, source=source)
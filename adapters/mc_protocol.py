@@ -0,0 +1,168 @@
+import socket
+import struct
+
+from core.errors import (
+    InvalidRequestError,
+    OutOfRangeError,
+    ReadOnlyError,
+    SimError,
+    TooManyPointsError,
+    TypeMismatchError,
+    UnknownDeviceError,
+)
+from core.memory_bank import values_from_bytes
+from .tcp_json_v1 import TcpJsonV1Server
+
+# SLMP / MC protocol 3E binary frame (little-endian):
+#   request:  50 00 | net | pc | io u16 | station | len u16 | timer u16 | cmd u16 | sub u16 | data
+#   response: D0 00 | net | pc | io u16 | station | len u16 | end code u16 | data
+# Batch read 0x0401 / batch write 0x1401, subcommand 0x0000 (word units) or 0x0001 (bit units).
+# Device data: head device number u24 | device code u8 | points u16 | [write data].
+# Bit-unit data carries two points per byte, first point in the high nibble.
+CMD_READ = 0x0401
+CMD_WRITE = 0x1401
+SUB_WORD = 0x0000
+SUB_BIT = 0x0001
+
+# MC device code -> KV device suffix.
+DEVICE_CODES = {
+    0x9C: "R",  # X
+    0x9D: "R",  # Y
+    0x90: "MR",  # M
+    0x92: "LR",  # L
+    0xA0: "B",  # B
+    0xA8: "DM",  # D
+    0xAF: "EM",  # R (file register)
+    0xB0: "FM",  # ZR
+    0xB4: "W",  # W
+    0xC1: "T",  # TS (contact)
+    0xC4: "C",  # CS (contact)
+}
+
+END_OK = 0x0000
+END_CODES = {
+    OutOfRangeError: 0xC056,
+    UnknownDeviceError: 0xC05A,
+    TypeMismatchError: 0xC05A,
+    ReadOnlyError: 0xC05B,
+    TooManyPointsError: 0xC051,
+    InvalidRequestError: 0xC059,
+}
+END_INTERNAL = 0xC05C
+
+_REQ_HEAD = struct.Struct("<HBBHBHHHH")
+_RESP_HEAD = struct.Struct("<HBBHBHH")
+_DEVICE = struct.Struct("<HBBH")
+SUBHEADER_REQ = 0x0050
+SUBHEADER_RESP = 0x00D0
+_ROUTE_LEN = 9  # bytes before the request data length field is counted
+
+
+def pack_nibbles(points: list[int]) -> bytes:
+    padded = points + [0] * (len(points) % 2)
+    return bytes(((hi & 1) << 4) | (lo & 1) for hi, lo in zip(padded[0::2], padded[1::2]))
+
+
+def unpack_nibbles(data: bytes, count: int) -> list[int]:
+    out = []
+    for b in data:
+        out.append((b >> 4) & 1)
+        out.append(b & 1)
+    return out[:count]
+
+
+def encode_request(command: int, subcommand: int, device_code: int, head: int, points: int, data: bytes = b"") -> bytes:
+    body = _DEVICE.pack(head & 0xFFFF, (head >> 16) & 0xFF, device_code, points) + data
+    length = 6 + len(body)
+    return _REQ_HEAD.pack(SUBHEADER_REQ, 0, 0xFF, 0x03FF, 0, length, 0x0010, command, subcommand) + body
+
+
+class McProtocolServer(TcpJsonV1Server):
+    def _reject(self, client: socket.socket):
+        client.close()
+
+    def handle_client(self, conn: socket.socket):
+        max_frame = self.limits["max_frame_bytes"]
+        with conn:
+            if self.timeout_ms:
+                conn.settimeout(self.timeout_ms / 1000)
+            buffer = bytearray()
+            while True:
+                try:
+                    chunk = conn.recv(65536)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                buffer += chunk
+                out = []
+                start = 0
+                while len(buffer) - start >= _ROUTE_LEN:
+                    (length,) = struct.unpack_from("<H", buffer, start + 7)
+                    if length > max_frame:
+                        return
+                    if len(buffer) - start - _ROUTE_LEN < length:
+                        break
+                    frame = bytes(buffer[start : start + _ROUTE_LEN + length])
+                    out.append(self.handle_frame(frame))
+                    start += _ROUTE_LEN + length
+                del buffer[:start]
+                if out:
+                    conn.sendall(b"".join(out))
+
+    def _response(self, route: bytes, end_code: int, data: bytes = b"") -> bytes:
+        network, pc, io, station = struct.unpack_from("<BBHB", route, 2)
+        return _RESP_HEAD.pack(SUBHEADER_RESP, network, pc, io, station, 2 + len(data), end_code) + data
+
+    def handle_frame(self, frame: bytes) -> bytes:
+        try:
+            subheader, _, _, _, _, _, _, command, subcommand = _REQ_HEAD.unpack_from(frame, 0)
+            if subheader != SUBHEADER_REQ:
+                raise InvalidRequestError("not a 3E request frame")
+            head_lo, head_hi, code, points = _DEVICE.unpack_from(frame, _REQ_HEAD.size)
+            data = frame[_REQ_HEAD.size + _DEVICE.size :]
+            return self._response(frame, END_OK, self._execute(command, subcommand, code, head_lo | (head_hi << 16), points, data))
+        except SimError as exc:
+            return self._response(frame, END_CODES.get(type(exc), END_INTERNAL))
+        except struct.error:
+            return self._response(frame.ljust(_ROUTE_LEN, b"\x00"), END_CODES[InvalidRequestError])
+
+    def _execute(self, command: int, subcommand: int, code: int, head: int, points: int, data: bytes) -> bytes:
+        dev = DEVICE_CODES.get(code)
+        if dev is None:
+            raise UnknownDeviceError(f"unsupported device code 0x{code:02X}")
+        if subcommand not in (SUB_WORD, SUB_BIT):
+            raise InvalidRequestError(f"unsupported subcommand 0x{subcommand:04X}")
+        if not 1 <= points <= self.limits["max_points_per_request"]:
+            raise TooManyPointsError("points over limit")
+        model = self.device_memory.profile.get_model(dev)
+        bit_device = "bit" in model.supported_spaces
+        if subcommand == SUB_BIT:
+            if not bit_device:
+                raise TypeMismatchError(f"{dev} has no bit access")
+            space, addr = "bit", head
+        elif bit_device:
+            if head % 16:
+                raise OutOfRangeError("word access must start on a 16-point boundary")
+            space, addr = "word", head // 16
+        else:
+            space, addr = "word", head
+        source = f"adapter:{self.name}"
+        mem = self.device_memory
+        if command == CMD_READ:
+            if space == "bit":
+                return pack_nibbles(mem.read_bits(dev, addr, points, source=source))
+            return mem.read_raw(dev, "word", addr, points, source=source)
+        if command == CMD_WRITE:
+            if self.readonly:
+                raise ReadOnlyError("adapter in readonly mode")
+            if space == "bit":
+                if len(data) != (points + 1) // 2:
+                    raise InvalidRequestError("write data length mismatch")
+                mem.write_bits(dev, addr, unpack_nibbles(data, points), source=source)
+            else:
+                if len(data) != points * 2:
+                    raise InvalidRequestError("write data length mismatch")
+                mem.write_words(dev, addr, values_from_bytes("word", data), source=source)
+            return b""
+        raise InvalidRequestError(f"unsupported command 0x{command:04X}")
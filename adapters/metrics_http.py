@@ -0,0 +1,45 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetricsHttpServer:
+    # GET /metrics -> text exposition, GET /stats -> the same JSON the stats op returns.
+    def __init__(self, metrics, bind_ip: str = "127.0.0.1", port: int = 9108):
+        self.metrics = metrics
+        self.bind_ip = bind_ip
+        self.port = port
+        self._httpd = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = metrics.render_text().encode("utf-8")
+                    ctype = "text/plain; version=0.0.4"
+                elif self.path == "/stats":
+                    body = json.dumps(metrics.snapshot()).encode("utf-8")
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return None
+
+        self._httpd = ThreadingHTTPServer((self.bind_ip, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
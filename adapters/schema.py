@@ -2,31 +2,115 @@ from core.errors import InvalidRequestError
 
 
 class SchemaValidator:
-    SPACES = {"bit", "word", "dword"}
+    # Frozen once at class creation; key checks compare the dict's keys view without building a set.
+    SPACES = frozenset({"bit", "word", "dword"})
+    ITEM_OPS = frozenset({"read", "write"})
+    READ_KEYS = frozenset({"id", "op", "space", "dev", "addr", "count"})
+    WRITE_KEYS = frozenset({"id", "op", "space", "dev", "addr", "values"})
+    BATCH_KEYS = frozenset({"id", "op", "items", "atomic"})
+    SUBSCRIBE_KEYS = frozenset({"id", "op", "items"})
+    SUBSCRIBE_ITEM_KEYS = frozenset({"space", "dev", "addr", "count"})
+    UNSUBSCRIBE_KEYS = frozenset({"id", "op", "subs"})
+    CLOCK_KEYS = frozenset({"id", "op", "until_ms", "timeout_ms"})
+    STATS_KEYS = frozenset({"id", "op"})
+    PROFILE_KEYS = frozenset({"id", "op", "action", "every"})
+    PROFILE_ACTIONS = frozenset({"start", "stop", "reset", "report"})
 
     def validate_request(self, obj):
         if not isinstance(obj, dict):
             raise InvalidRequestError("request must be object")
         op = obj.get("op")
-        if op not in {"read", "write"}:
-            raise InvalidRequestError("op must be read/write")
+        if op == "batch":
+            self.validate_batch(obj)
+            return
+        if op == "subscribe":
+            self.validate_subscribe(obj)
+            return
+        if op == "unsubscribe":
+            self.validate_unsubscribe(obj)
+            return
+        if op == "clock":
+            self.validate_clock(obj)
+            return
+        if op == "stats":
+            if not obj.keys() <= self.STATS_KEYS:
+                raise InvalidRequestError("additional properties are not allowed")
+            return
+        if op == "profile":
+            self.validate_profile(obj)
+            return
+        if op not in self.ITEM_OPS:
+            raise InvalidRequestError("op must be read/write/batch/subscribe/unsubscribe/clock/stats/profile")
+        self.validate_item(obj)
+
+    def validate_item(self, obj, where: str = ""):
+        if not isinstance(obj, dict):
+            raise InvalidRequestError(f"{where}item must be object")
+        op = obj.get("op")
+        if op not in self.ITEM_OPS:
+            raise InvalidRequestError(f"{where}op must be read/write")
         if obj.get("space") not in self.SPACES:
-            raise InvalidRequestError("space must be bit/word/dword")
+            raise InvalidRequestError(f"{where}space must be bit/word/dword")
         if not isinstance(obj.get("dev"), str) or not obj["dev"]:
-            raise InvalidRequestError("dev required")
+            raise InvalidRequestError(f"{where}dev required")
         if not isinstance(obj.get("addr"), int) or obj["addr"] < 0:
-            raise InvalidRequestError("addr must be >=0")
+            raise InvalidRequestError(f"{where}addr must be >=0")
         if op == "read":
-            if set(obj.keys()) - {"id", "op", "space", "dev", "addr", "count"}:
-                raise InvalidRequestError("additional properties are not allowed")
+            if not obj.keys() <= self.READ_KEYS:
+                raise InvalidRequestError(f"{where}additional properties are not allowed")
             if not isinstance(obj.get("count"), int) or obj["count"] < 1:
-                raise InvalidRequestError("count must be >=1")
+                raise InvalidRequestError(f"{where}count must be >=1")
         else:
-            if set(obj.keys()) - {"id", "op", "space", "dev", "addr", "values"}:
-                raise InvalidRequestError("additional properties are not allowed")
+            if not obj.keys() <= self.WRITE_KEYS:
+                raise InvalidRequestError(f"{where}additional properties are not allowed")
             values = obj.get("values")
             if not isinstance(values, list) or not values:
-                raise InvalidRequestError("values must be non-empty array")
+                raise InvalidRequestError(f"{where}values must be non-empty array")
+
+    def validate_batch(self, obj):
+        if not obj.keys() <= self.BATCH_KEYS:
+            raise InvalidRequestError("additional properties are not allowed")
+        if not isinstance(obj.get("atomic", False), bool):
+            raise InvalidRequestError("atomic must be boolean")
+        items = obj.get("items")
+        if not isinstance(items, list) or not items:
+            raise InvalidRequestError("items must be non-empty array")
+        for i, item in enumerate(items):
+            self.validate_item(item, f"items[{i}]: ")
+
+    def validate_subscribe(self, obj):
+        if not obj.keys() <= self.SUBSCRIBE_KEYS:
+            raise InvalidRequestError("additional properties are not allowed")
+        items = obj.get("items")
+        if not isinstance(items, list) or not items:
+            raise InvalidRequestError("items must be non-empty array")
+        for i, item in enumerate(items):
+            where = f"items[{i}]: "
+            if not isinstance(item, dict) or not item.keys() <= self.SUBSCRIBE_ITEM_KEYS:
+                raise InvalidRequestError(f"{where}item must be object with space/dev/addr/count")
+            self.validate_item({**item, "op": "read"}, where)
+
+    def validate_unsubscribe(self, obj):
+        if not obj.keys() <= self.UNSUBSCRIBE_KEYS:
+            raise InvalidRequestError("additional properties are not allowed")
+        subs = obj.get("subs")
+        if subs is not None and (not isinstance(subs, list) or not all(isinstance(s, str) for s in subs)):
+            raise InvalidRequestError("subs must be array of strings")
+
+    def validate_clock(self, obj):
+        if not obj.keys() <= self.CLOCK_KEYS:
+            raise InvalidRequestError("additional properties are not allowed")
+        for key in ("until_ms", "timeout_ms"):
+            if key in obj and (not isinstance(obj[key], int) or obj[key] < 0):
+                raise InvalidRequestError(f"{key} must be >=0")
+
+    def validate_profile(self, obj):
+        if not obj.keys() <= self.PROFILE_KEYS:
+            raise InvalidRequestError("additional properties are not allowed")
+        if obj.get("action", "report") not in self.PROFILE_ACTIONS:
+            raise InvalidRequestError("action must be start/stop/reset/report")
+        if "every" in obj and (not isinstance(obj["every"], int) or obj["every"] < 1):
+            raise InvalidRequestError("every must be >=1")
 
     def validate_response(self, obj):
         if not isinstance(obj, dict) or "ok" not in obj:
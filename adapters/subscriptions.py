@@ -0,0 +1,112 @@
+import bisect
+import json
+import threading
+
+from core.scan_engine import Hook
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class Topic:
+    def __init__(self, dev: str, space: str, addr: int, count: int, values: list[int]):
+        self.dev = dev
+        self.space = space
+        self.addr = addr
+        self.count = count
+        self.name = f"{dev}:{space}:{addr}:{count}"
+        self.last = values
+        self.subscribers = {}  # session id -> push callable (must not block)
+
+
+class SubscriptionHub(Hook):
+    def __init__(self, mem, source: str = "adapter:subscriptions"):
+        self.mem = mem
+        self.source = source
+        self._topics: dict[tuple[str, str, int, int], Topic] = {}
+        self._by_space: dict[tuple[str, str], list[Topic]] = {}
+        self._lock = threading.Lock()
+        mem.track_changes()
+
+    def subscribe(self, session_id, send, dev: str, space: str, addr: int, count: int) -> tuple[str, list[int]]:
+        key = (dev, space, addr, count)
+        with self._lock:
+            topic = self._topics.get(key)
+            if topic is None:
+                values = self.mem._read(dev, space, addr, count, source=self.source)
+                topic = Topic(dev, space, addr, count, values)
+                self._topics[key] = topic
+                self._by_space.setdefault((dev, space), []).append(topic)
+            topic.subscribers[session_id] = send
+            return topic.name, list(topic.last)
+
+    def unsubscribe(self, session_id, names: list[str] | None = None) -> int:
+        with self._lock:
+            return self._unsubscribe(session_id, names)
+
+    def _unsubscribe(self, session_id, names: list[str] | None = None) -> int:
+        removed = 0
+        for key, topic in list(self._topics.items()):
+            if names is not None and topic.name not in names:
+                continue
+            if topic.subscribers.pop(session_id, None) is not None:
+                removed += 1
+            if not topic.subscribers:
+                del self._topics[key]
+                self._by_space[(topic.dev, topic.space)].remove(topic)
+        return removed
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(t.subscribers) for t in self._topics.values())
+
+    def on_scan_end(self, ctx):
+        changes = self.mem.drain_changes()
+        if not changes:
+            return
+        failed = set()
+        with self._lock:
+            for space_key, ranges in changes.items():
+                topics = self._by_space.get(space_key)
+                if not topics:
+                    continue
+                merged = merge_ranges(ranges)
+                ends = [end for _, end in merged]
+                for topic in topics:
+                    i = bisect.bisect_right(ends, topic.addr)
+                    if i < len(merged) and merged[i][0] < topic.addr + topic.count:
+                        self._publish(topic, ctx.scan_id, failed)
+            # Dropped after the walk, which must not see topics vanish from _by_space under it.
+            for session_id in failed:
+                self._unsubscribe(session_id)
+
+    def _publish(self, topic: Topic, scan_id: int, failed: set) -> None:
+        values = self.mem._read(topic.dev, topic.space, topic.addr, topic.count, source=self.source)
+        diff = [[topic.addr + i, v] for i, (v, old) in enumerate(zip(values, topic.last)) if v != old]
+        topic.last = values
+        if not diff:
+            return
+        # Encoded once per topic per scan and shared by every subscriber of that range.
+        frame = (
+            json.dumps({"ok": True, "event": "change", "sub": topic.name, "scan": scan_id, "changes": diff}) + "\n"
+        ).encode("utf-8")
+        # Each subscriber queues the frame for its own writer, so a client that stops reading
+        # neither stalls the scan loop nor delays the others.
+        for session_id, push in topic.subscribers.items():
+            if session_id in failed:
+                continue
+            try:
+                push(frame)
+            except Exception:
+                # A broken session (closed event loop, failing overflow callback) must not stop the scan
+                # or the other subscribers; it loses all its subscriptions.
+                failed.add(session_id)
+                self.mem.metrics.inc("subscription_push_errors_total")
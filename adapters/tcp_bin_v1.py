@@ -0,0 +1,189 @@
+import socket
+import struct
+
+from core.errors import (
+    InvalidRequestError,
+    LockTimeoutError,
+    OutOfRangeError,
+    ReadOnlyError,
+    SimError,
+    TooManyClientsError,
+    TooManyPointsError,
+    TypeMismatchError,
+    UnknownDeviceError,
+    UnknownInstanceError,
+    WalWriteError,
+)
+from core.memory_bank import pack_bits, unpack_bits
+from .tcp_json_v1 import TcpJsonV1Server
+
+# Frame:    u32 LE payload length | payload
+# Request:  u32 id | u8 op | u8 space | u8 dev_len | dev (ascii) | u32 addr | u32 count | [values]
+# Response: u32 id | u8 status | u32 scan | ok read: u32 count + values | error: u16 len + utf-8 message
+# Values are little-endian uint16/uint32 arrays; bits are packed LSB-first, ceil(count / 8) bytes.
+OP_READ = 1
+OP_WRITE = 2
+SPACES = ("bit", "word", "dword")
+WIDTHS = {"word": 2, "dword": 4}
+
+STATUS_OK = 0
+# Status byte n (n >= 1) is ERROR_CLASSES[n - 1]; the numbering is part of the wire format.
+ERROR_CLASSES = (
+    SimError,
+    UnknownDeviceError,
+    OutOfRangeError,
+    TypeMismatchError,
+    ReadOnlyError,
+    LockTimeoutError,
+    InvalidRequestError,
+    TooManyPointsError,
+    TooManyClientsError,
+    WalWriteError,
+    UnknownInstanceError,
+)
+ERROR_CODES = {cls.code: i + 1 for i, cls in enumerate(ERROR_CLASSES)}
+
+_LEN = struct.Struct("<I")
+_REQ_HEAD = struct.Struct("<IBBB")
+_REQ_RANGE = struct.Struct("<II")
+_RESP_HEAD = struct.Struct("<IBI")
+_ERR_LEN = struct.Struct("<H")
+
+
+def values_nbytes(space: str, count: int) -> int:
+    if space == "bit":
+        return (count + 7) // 8
+    return count * WIDTHS[space]
+
+
+def encode_error(req_id: int, scan_id: int, exc: SimError) -> bytes:
+    message = exc.message.encode("utf-8")[:65535]
+    payload = _RESP_HEAD.pack(req_id, ERROR_CODES.get(exc.code, 1), scan_id) + _ERR_LEN.pack(len(message)) + message
+    return _LEN.pack(len(payload)) + payload
+
+
+class TcpBinV1Server(TcpJsonV1Server):
+    def _reject(self, client: socket.socket):
+        with client:
+            try:
+                client.sendall(encode_error(0, 0, TooManyClientsError("max_clients reached")))
+            except OSError:
+                pass
+
+    def handle_client(self, conn: socket.socket):
+        max_frame = self.limits["max_frame_bytes"]
+        with conn:
+            if self.timeout_ms:
+                conn.settimeout(self.timeout_ms / 1000)
+            buffer = bytearray()
+            while True:
+                try:
+                    chunk = conn.recv(65536)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                buffer += chunk
+                out = []
+                start = 0
+                while len(buffer) - start >= _LEN.size:
+                    (size,) = _LEN.unpack_from(buffer, start)
+                    if size > max_frame:
+                        out.append(encode_error(0, self.device_memory.current_scan_id, InvalidRequestError("frame too large")))
+                        conn.sendall(b"".join(out))
+                        return
+                    if len(buffer) - start - _LEN.size < size:
+                        break
+                    payload = bytes(buffer[start + _LEN.size : start + _LEN.size + size])
+                    out.append(self._handle_frame(payload))
+                    start += _LEN.size + size
+                del buffer[:start]
+                if out:
+                    conn.sendall(b"".join(out))
+
+    def _handle_frame(self, payload: bytes) -> bytes:
+        req_id = 0
+        try:
+            if len(payload) < _REQ_HEAD.size:
+                raise InvalidRequestError("short frame")
+            req_id, op, space_code, dev_len = _REQ_HEAD.unpack_from(payload, 0)
+            pos = _REQ_HEAD.size
+            dev = payload[pos : pos + dev_len].decode("ascii")
+            pos += dev_len
+            if len(payload) < pos + _REQ_RANGE.size or not dev:
+                raise InvalidRequestError("short frame")
+            addr, count = _REQ_RANGE.unpack_from(payload, pos)
+            pos += _REQ_RANGE.size
+            if space_code >= len(SPACES):
+                raise InvalidRequestError("space must be bit/word/dword")
+            space = SPACES[space_code]
+            if count < 1:
+                raise InvalidRequestError("count must be >=1")
+            if count > self.limits["max_points_per_request"]:
+                raise TooManyPointsError("count over limit")
+            source = f"adapter:{self.name}"
+            if op == OP_READ:
+                raw = self.device_memory.read_raw(dev, space, addr, count, source=source)
+                body = _LEN.pack(count) + (pack_bits(raw) if space == "bit" else raw)
+            elif op == OP_WRITE:
+                if self.readonly:
+                    raise SimError("adapter in readonly mode")
+                data = payload[pos:]
+                if len(data) != values_nbytes(space, count):
+                    raise InvalidRequestError("values length does not match count")
+                if space == "bit":
+                    data = unpack_bits(data, count)
+                self.device_memory.write_raw(dev, space, addr, data, source=source)
+                body = b""
+            else:
+                raise InvalidRequestError("op must be read/write")
+            head = _RESP_HEAD.pack(req_id, STATUS_OK, self.device_memory.current_scan_id)
+            return _LEN.pack(len(head) + len(body)) + head + body
+        except SimError as exc:
+            return encode_error(req_id, self.device_memory.current_scan_id, exc)
+        except (UnicodeDecodeError, struct.error) as exc:
+            return encode_error(req_id, self.device_memory.current_scan_id, InvalidRequestError(str(exc)))
+        except Exception as exc:
+            return encode_error(req_id, self.device_memory.current_scan_id, SimError(str(exc)))
+
+
+class TcpBinV1Client:
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._next_id = 0
+
+    def close(self):
+        self.sock.close()
+
+    def _recv_exact(self, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("connection closed")
+            data += chunk
+        return bytes(data)
+
+    def _call(self, op: int, space: str, dev: str, addr: int, count: int, data: bytes = b"") -> tuple[int, bytes]:
+        self._next_id += 1
+        name = dev.encode("ascii")
+        payload = _REQ_HEAD.pack(self._next_id, op, SPACES.index(space), len(name)) + name + _REQ_RANGE.pack(addr, count) + data
+        self.sock.sendall(_LEN.pack(len(payload)) + payload)
+        (size,) = _LEN.unpack(self._recv_exact(_LEN.size))
+        resp = self._recv_exact(size)
+        _, status, scan_id = _RESP_HEAD.unpack_from(resp, 0)
+        body = resp[_RESP_HEAD.size :]
+        if status != STATUS_OK:
+            (length,) = _ERR_LEN.unpack_from(body, 0)
+            message = body[_ERR_LEN.size : _ERR_LEN.size + length].decode("utf-8")
+            cls = ERROR_CLASSES[status - 1] if status <= len(ERROR_CLASSES) else SimError
+            raise cls(message, detail={"scan": scan_id})
+        return scan_id, body
+
+    def read(self, dev: str, space: str, addr: int, count: int) -> bytes:
+        _, body = self._call(OP_READ, space, dev, addr, count)
+        (n,) = _LEN.unpack_from(body, 0)
+        return body[_LEN.size : _LEN.size + values_nbytes(space, n)]
+
+    def write(self, dev: str, space: str, addr: int, data: bytes, count: int) -> None:
+        self._call(OP_WRITE, space, dev, addr, count, data)
@@ -1,29 +1,106 @@
 import json
+import queue
 import socket
 import threading
 import time
 
-from core.errors import SimError, TooManyPointsError
+from core.errors import InvalidRequestError, SimError, TooManyClientsError, TooManyPointsError
 from .schema import SchemaValidator
 
 
+def error_frame(exc: SimError) -> dict:
+    return {"ok": False, "err": {"code": exc.code, "message": exc.message, "detail": exc.detail}}
+
+
+def encode_frame(out: dict) -> bytes:
+    return (json.dumps(out, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+FRAME_TOO_LARGE = {"ok": False, "err": {"code": "INVALID_REQUEST", "message": "frame too large"}}
+
+
+class ClientSession:
+    # Change pushes come from the scan thread and must never block it: push() only queues the frame
+    # and the session's own writer, started on its first subscription, sends it. A client more than
+    # max_pending frames behind is disconnected through on_overflow rather than letting the queue grow.
+    def __init__(self, send, max_pending: int = 256, on_overflow=None, start_writer=None):
+        self.send = send
+        self.outbox: queue.Queue = queue.Queue(max_pending)
+        self.overflowed = False
+        self.on_overflow = on_overflow
+        self.wake = None
+        self._start_writer = start_writer
+
+    def ensure_writer(self) -> None:
+        if self._start_writer is not None:
+            start, self._start_writer = self._start_writer, None
+            start(self)
+
+    def push(self, frame: bytes) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.outbox.put_nowait(frame)
+        except queue.Full:
+            self.overflowed = True
+            if self.on_overflow is not None:
+                self.on_overflow()
+            return
+        if self.wake is not None:
+            self.wake()
+
+    def close(self) -> None:
+        # Stops the writer; if the queue is full it is sending to a socket about to close and exits on its own.
+        try:
+            self.outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.wake is not None:
+            self.wake()
+
+
 class TcpJsonV1Server:
-    def __init__(self, device_memory, name: str, bind_ip: str, port: int, limits: dict | None = None, readonly: bool = False):
+    def __init__(
+        self,
+        device_memory,
+        name: str,
+        bind_ip: str,
+        port: int,
+        limits: dict | None = None,
+        readonly: bool = False,
+        max_clients: int = 0,
+        timeout_ms: int = 0,
+        hub=None,
+        clock=None,
+        profiler=None,
+    ):
         self.device_memory = device_memory
+        # Adapter-side counters; servers without a DeviceMemory of their own (InstanceRouter) replace it.
+        self.metrics = device_memory.metrics if device_memory is not None else None
         self.name = name
         self.bind_ip = bind_ip
         self.port = port
         self.readonly = readonly
         self.limits = limits or {"max_points_per_request": 1024, "max_frame_bytes": 1024 * 1024}
+        self.max_push_backlog = self.limits.get("max_push_backlog", 256)
+        self.max_clients = max_clients
+        self.timeout_ms = timeout_ms
+        self.hub = hub
+        self.clock = clock
+        self.profiler = profiler
+        self._op_metrics: dict[str, str] = {}
         self.validator = SchemaValidator()
         self._server = None
         self._running = False
+        self._clients = 0
+        self._clients_lock = threading.Lock()
 
     def start(self):
         self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self._server.bind((self.bind_ip, self.port))
         self._server.listen()
+        self.port = self._server.getsockname()[1]
         self._running = True
         threading.Thread(target=self._accept_loop, daemon=True).start()
 
@@ -38,58 +115,272 @@ class TcpJsonV1Server:
                 client, _ = self._server.accept()
             except OSError:
                 break
-            threading.Thread(target=self.handle_client, args=(client,), daemon=True).start()
+            with self._clients_lock:
+                admitted = not self.max_clients or self._clients < self.max_clients
+                if admitted:
+                    self._clients += 1
+            if not admitted:
+                self._reject(client)
+                continue
+            threading.Thread(target=self._serve_client, args=(client,), daemon=True).start()
 
-    def _dispatch_read(self, req):
+    def _reject(self, client: socket.socket):
+        with client:
+            try:
+                client.sendall(encode_frame(error_frame(TooManyClientsError("max_clients reached"))))
+            except OSError:
+                pass
+
+    def _serve_client(self, conn: socket.socket):
+        try:
+            self.handle_client(conn)
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+
+    def _read_values(self, req):
         count = req["count"]
         if count > self.limits["max_points_per_request"]:
             raise TooManyPointsError("count over limit")
         if req["space"] == "bit":
-            values = self.device_memory.read_bits(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
-        elif req["space"] == "word":
-            values = self.device_memory.read_words(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
-        else:
-            values = self.device_memory.read_dwords(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
-        return {"ok": True, "values": values, "diag": {"scan": self.device_memory.current_scan_id}}
+            return self.device_memory.read_bits(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
+        if req["space"] == "word":
+            return self.device_memory.read_words(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
+        return self.device_memory.read_dwords(req["dev"], req["addr"], count, source=f"adapter:{self.name}")
 
-    def _dispatch_write(self, req):
+    def _write_values(self, req, defer: bool = False):
         values = req["values"]
         if len(values) > self.limits["max_points_per_request"]:
             raise TooManyPointsError("values over limit")
         if self.readonly:
             raise SimError("adapter in readonly mode")
+        source = f"adapter:{self.name}"
         if req["space"] == "bit":
-            self.device_memory.write_bits(req["dev"], req["addr"], values, source=f"adapter:{self.name}")
+            self.device_memory.write_bits(req["dev"], req["addr"], values, source=source, defer=defer)
         elif req["space"] == "word":
-            self.device_memory.write_words(req["dev"], req["addr"], values, source=f"adapter:{self.name}")
+            self.device_memory.write_words(req["dev"], req["addr"], values, source=source, defer=defer)
         else:
-            self.device_memory.write_dwords(req["dev"], req["addr"], values, source=f"adapter:{self.name}")
+            self.device_memory.write_dwords(req["dev"], req["addr"], values, source=source, defer=defer)
+
+    def _dispatch_read(self, req):
+        values = self._read_values(req)
+        return {"ok": True, "values": values, "diag": {"scan": self.device_memory.current_scan_id}}
+
+    def _dispatch_write(self, req):
+        self._write_values(req)
         return {"ok": True, "diag": {"scan": self.device_memory.current_scan_id, "time_ms": int(time.time() * 1000)}}
 
+    def _check_batch_item(self, item):
+        if item["op"] == "read":
+            if item["count"] > self.limits["max_points_per_request"]:
+                raise TooManyPointsError("count over limit")
+            self.device_memory.validate_read(item["dev"], item["space"], item["addr"], item["count"])
+        else:
+            if len(item["values"]) > self.limits["max_points_per_request"]:
+                raise TooManyPointsError("values over limit")
+            if self.readonly:
+                raise SimError("adapter in readonly mode")
+            self.device_memory.validate_write(item["dev"], item["space"], item["addr"], item["values"])
+
+    def _dispatch_batch(self, req):
+        items = req["items"]
+        if len(items) > self.limits.get("max_batch_items", 256):
+            raise TooManyPointsError("batch items over limit")
+        atomic = req.get("atomic", False)
+        results = []
+        # One view for the whole batch: no scan boundary (IO image refresh, WAL apply) can split it.
+        with self.device_memory.consistent_view():
+            if atomic:
+                # All-or-nothing: every item is checked first, and writes to every device are
+                # deferred so they land together at the next scan boundary.
+                for item in items:
+                    self._check_batch_item(item)
+                self.device_memory.wal.check_sink()
+                for item in items:
+                    if item["op"] == "read":
+                        results.append({"ok": True, "values": self._read_values(item)})
+                    else:
+                        self._write_values(item, defer=True)
+                        results.append({"ok": True})
+            else:
+                for item in items:
+                    try:
+                        if item["op"] == "read":
+                            results.append({"ok": True, "values": self._read_values(item)})
+                        else:
+                            self._write_values(item)
+                            results.append({"ok": True})
+                    except SimError as exc:
+                        results.append(error_frame(exc))
+            scan_id = self.device_memory.current_scan_id
+        return {"ok": True, "results": results, "diag": {"scan": scan_id, "time_ms": int(time.time() * 1000)}}
+
+    def _dispatch_subscribe(self, req, session):
+        if self.hub is None or session is None:
+            raise InvalidRequestError("subscriptions are not enabled")
+        subs = []
+        values = []
+        for item in req["items"]:
+            if item["count"] > self.limits["max_points_per_request"]:
+                raise TooManyPointsError("count over limit")
+            self.device_memory.validate_read(item["dev"], item["space"], item["addr"], item["count"])
+        for item in req["items"]:
+            session.ensure_writer()
+            name, current = self.hub.subscribe(session, session.push, item["dev"], item["space"], item["addr"], item["count"])
+            subs.append(name)
+            values.append(current)
+        return {"ok": True, "subs": subs, "values": values, "diag": {"scan": self.device_memory.current_scan_id}}
+
+    def _dispatch_unsubscribe(self, req, session):
+        if self.hub is None or session is None:
+            raise InvalidRequestError("subscriptions are not enabled")
+        removed = self.hub.unsubscribe(session, req.get("subs"))
+        return {"ok": True, "removed": removed, "diag": {"scan": self.device_memory.current_scan_id}}
+
+    def _dispatch_clock(self, req):
+        if self.clock is None:
+            raise InvalidRequestError("virtual clock not available")
+        reached = True
+        if "until_ms" in req:
+            reached = self.clock.wait_until(req["until_ms"], self._clock_timeout(req))
+        return self._clock_reply(reached)
+
+    def _clock_timeout(self, req) -> float:
+        return min(req.get("timeout_ms", 0), self.limits.get("max_wait_ms", 10000)) / 1000
+
+    def _clock_reply(self, reached: bool) -> dict:
+        return {"ok": True, "time_ms": self.clock.now_ms, "reached": reached, "diag": {"scan": self.clock.scan_id}}
+
+    def _dispatch_profile(self, req):
+        if self.profiler is None:
+            raise InvalidRequestError("profiler not available")
+        action = req.get("action", "report")
+        if action == "start":
+            self.profiler.start(req.get("every"))
+        elif action == "stop":
+            self.profiler.stop()
+        elif action == "reset":
+            self.profiler.reset()
+        return {"ok": True, "profile": self.profiler.report(), "diag": {"scan": self.device_memory.current_scan_id}}
+
     def handle_client(self, conn: socket.socket):
+        max_frame = self.limits["max_frame_bytes"]
+        send_lock = threading.Lock()
+
+        def send(data: bytes):
+            with send_lock:
+                conn.sendall(data)
+
+        def overflow():
+            self.metrics.inc(f'adapter_push_overflows_total{{adapter="{self.name}"}}')
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        def start_writer(session: ClientSession):
+            threading.Thread(target=self._push_loop, args=(session,), daemon=True).start()
+
+        session = ClientSession(send, self.max_push_backlog, overflow, start_writer)
         with conn:
-            buffer = b""
-            while True:
-                chunk = conn.recv(4096)
-                if not chunk:
-                    break
-                buffer += chunk
-                while b"\n" in buffer:
-                    line, buffer = buffer.split(b"\n", 1)
-                    if len(line) > self.limits["max_frame_bytes"]:
-                        out = {"ok": False, "err": {"code": "INVALID_REQUEST", "message": "frame too large"}}
-                    else:
-                        out = self._handle_line(line)
-                    conn.sendall((json.dumps(out, ensure_ascii=False) + "\n").encode("utf-8"))
+            if self.timeout_ms:
+                conn.settimeout(self.timeout_ms / 1000)
+            buffer = bytearray()
+            try:
+                while True:
+                    try:
+                        chunk = conn.recv(65536)
+                    except OSError:
+                        break
+                    if not chunk:
+                        break
+                    buffer += chunk
+                    out = []
+                    start = 0
+                    while True:
+                        end = buffer.find(b"\n", start)
+                        if end < 0:
+                            break
+                        if end - start > max_frame:
+                            out.append(encode_frame(FRAME_TOO_LARGE))
+                        else:
+                            out.append(encode_frame(self._handle_line(bytes(buffer[start:end]), session)))
+                        start = end + 1
+                    # Compact once per recv instead of re-slicing the buffer for every line.
+                    del buffer[:start]
+                    if len(buffer) > max_frame:
+                        out.append(encode_frame(FRAME_TOO_LARGE))
+                        send(b"".join(out))
+                        break
+                    if out:
+                        send(b"".join(out))
+            finally:
+                self._close_session(session)
+
+    def _push_loop(self, session: ClientSession):
+        while True:
+            frame = session.outbox.get()
+            if frame is None:
+                return
+            try:
+                session.send(frame)
+            except OSError:
+                return
 
-    def _handle_line(self, line: bytes):
+    def _close_session(self, session: ClientSession):
+        if self.hub is not None:
+            self.hub.unsubscribe(session)
+        session.close()
+
+    def _dispatch_stats(self, req):
+        return {"ok": True, "stats": self.device_memory.metrics.snapshot(), "diag": {"scan": self.device_memory.current_scan_id}}
+
+    def _request_metric(self, op: str) -> str:
+        name = self._op_metrics.get(op)
+        if name is None:
+            name = self._op_metrics[op] = f'adapter_request_us{{adapter="{self.name}",op="{op}"}}'
+        return name
+
+    def _handle_line(self, line: bytes, session: ClientSession | None = None):
+        t0 = time.perf_counter_ns()
         try:
             req = json.loads(line.decode("utf-8"))
+        except Exception as exc:
+            return self._finish("invalid", {"ok": False, "err": {"code": "INTERNAL_ERROR", "message": str(exc)}}, t0)
+        return self.handle_request(req, session, t0)
+
+    def handle_request(self, req, session: ClientSession | None = None, t0: int | None = None):
+        if t0 is None:
+            t0 = time.perf_counter_ns()
+        op = "invalid"
+        try:
             self.validator.validate_request(req)
-            if req["op"] == "read":
-                return self._dispatch_read(req)
-            return self._dispatch_write(req)
+            op = req["op"]
+            if op == "read":
+                out = self._dispatch_read(req)
+            elif op == "batch":
+                out = self._dispatch_batch(req)
+            elif op == "subscribe":
+                out = self._dispatch_subscribe(req, session)
+            elif op == "unsubscribe":
+                out = self._dispatch_unsubscribe(req, session)
+            elif op == "clock":
+                out = self._dispatch_clock(req)
+            elif op == "stats":
+                out = self._dispatch_stats(req)
+            elif op == "profile":
+                out = self._dispatch_profile(req)
+            else:
+                out = self._dispatch_write(req)
         except SimError as exc:
-            return {"ok": False, "err": {"code": exc.code, "message": exc.message, "detail": exc.detail}}
+            out = error_frame(exc)
         except Exception as exc:
-            return {"ok": False, "err": {"code": "INTERNAL_ERROR", "message": str(exc)}}
+            out = {"ok": False, "err": {"code": "INTERNAL_ERROR", "message": str(exc)}}
+        return self._finish(op, out, t0)
+
+    def _finish(self, op: str, out: dict, t0: int) -> dict:
+        metrics = self.metrics
+        metrics.observe(self._request_metric(op), (time.perf_counter_ns() - t0) // 1000)
+        if not out["ok"]:
+            metrics.inc(f'adapter_errors_total{{adapter="{self.name}",code="{out["err"]["code"]}"}}')
+        return out
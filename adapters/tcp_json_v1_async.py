@@ -0,0 +1,180 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.errors import TooManyClientsError
+from .tcp_json_v1 import FRAME_TOO_LARGE, ClientSession, TcpJsonV1Server, encode_frame, error_frame
+
+
+class _ClockWait(dict):
+    # Returned by a worker in place of the clock reply; the wait itself runs on the event loop,
+    # so clients waiting on virtual time do not occupy the request workers.
+    def __init__(self, until_ms: int, timeout: float):
+        super().__init__(ok=True)
+        self.until_ms = until_ms
+        self.timeout = timeout
+
+
+class AsyncTcpJsonV1Server(TcpJsonV1Server):
+    def __init__(self, *args, workers: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._ready = threading.Event()
+        self._start_error: OSError | None = None
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"tcp-{self.name}")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name=f"tcp-{self.name}-loop", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            raise self._start_error
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=False)
+        self._loop = None
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(
+                    self._serve_stream,
+                    self.bind_ip,
+                    self.port,
+                    limit=self.limits["max_frame_bytes"] + 1,
+                    reuse_address=True,
+                )
+            )
+        except OSError as exc:
+            self._start_error = exc
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._running = True
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._running = False
+            self._server.close()
+            for task in asyncio.all_tasks(self._loop):
+                task.cancel()
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+
+    async def _serve_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Only the event loop thread touches the counter, so no lock is needed here.
+        if self.max_clients and self._clients >= self.max_clients:
+            writer.write(encode_frame(error_frame(TooManyClientsError("max_clients reached"))))
+            await self._close(writer)
+            return
+        self._clients += 1
+        timeout = self.timeout_ms / 1000 if self.timeout_ms else None
+        loop = asyncio.get_running_loop()
+        pushers = []
+
+        def start_writer(session: ClientSession):
+            # Called from a request worker thread; the task itself runs on the loop.
+            wake = asyncio.Event()
+            session.wake = lambda: loop.call_soon_threadsafe(wake.set)
+            loop.call_soon_threadsafe(lambda: pushers.append(loop.create_task(self._push_loop_async(session, writer, wake))))
+
+        session = ClientSession(
+            lambda data: loop.call_soon_threadsafe(writer.write, data),
+            self.max_push_backlog,
+            lambda: loop.call_soon_threadsafe(self._overflow, writer),
+            start_writer,
+        )
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readuntil(b"\n"), timeout)
+                except asyncio.LimitOverrunError:
+                    writer.write(encode_frame(FRAME_TOO_LARGE))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                out = await loop.run_in_executor(self._executor, self._handle_line, line[:-1], session)
+                if isinstance(out, _ClockWait):
+                    out = await self._wait_clock(out.until_ms, out.timeout)
+                writer.write(encode_frame(out))
+                # Pipelined requests already buffered are answered before waiting on the socket.
+                if writer.transport.get_write_buffer_size() > self.limits["max_frame_bytes"]:
+                    await writer.drain()
+        finally:
+            self._clients -= 1
+            self._close_session(session)
+            for task in pushers:
+                task.cancel()
+            await self._close(writer)
+
+    def _dispatch_clock(self, req):
+        if self.clock is None or "until_ms" not in req or self.clock.now_ms >= req["until_ms"]:
+            return super()._dispatch_clock(req)
+        return _ClockWait(req["until_ms"], self._clock_timeout(req))
+
+    async def _wait_clock(self, until_ms: int, timeout: float) -> dict:
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass
+
+        self.clock.watch(notify)
+        try:
+            deadline = loop.time() + timeout
+            while True:
+                # Cleared before the check, so an advance in between still wakes the wait below.
+                changed.clear()
+                remaining = deadline - loop.time()
+                if self.clock.now_ms >= until_ms or remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            self.clock.unwatch(notify)
+        return self._clock_reply(self.clock.now_ms >= until_ms)
+
+    async def _push_loop_async(self, session: ClientSession, writer: asyncio.StreamWriter, wake: asyncio.Event):
+        while True:
+            await wake.wait()
+            wake.clear()
+            while True:
+                try:
+                    frame = session.outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if frame is None:
+                    return
+                writer.write(frame)
+            try:
+                await writer.drain()
+            except (ConnectionError, OSError):
+                return
+
+    def _overflow(self, writer: asyncio.StreamWriter):
+        self.metrics.inc(f'adapter_push_overflows_total{{adapter="{self.name}"}}')
+        writer.transport.abort()
+
+    async def _close(self, writer: asyncio.StreamWriter):
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
@@ -0,0 +1,49 @@
+"""begin_scan cost versus populated IO_IMAGE range.
+
+Fills the first N points of R (bit and word space), then measures begin_scan
+while only a handful of points change between scans. With dirty-page
+tracking the per-scan cost should stay flat as N grows.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+POPULATED = (1000, 4000, 16000, 32000)
+SCANS = 2000
+WRITES_PER_SCAN = 4
+QUICK = {"scans": 200}
+
+
+def measure(storage: str, populated: int, scans: int = SCANS) -> float:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions(storage=storage))
+    mem._write_cs("R", "bit", 0, [1] * populated)
+    mem._write_cs("R", "word", 0, [7] * min(populated // 16, 2000))
+    mem.begin_scan(0, 10)
+    total = 0.0
+    for scan_id in range(1, scans + 1):
+        for i in range(WRITES_PER_SCAN):
+            mem._write_cs("R", "bit", (scan_id * 31 + i * 997) % populated, [scan_id & 1])
+        t0 = time.perf_counter()
+        mem.begin_scan(scan_id, 10)
+        total += time.perf_counter() - t0
+    return total / scans * 1e6
+
+
+def run(scans: int = SCANS) -> dict:
+    results = {}
+    for storage in ("array", "dict"):
+        results[storage] = {str(n): round(measure(storage, n, scans), 2) for n in POPULATED}
+    return {"bench": "begin_scan", "unit": "us_per_scan", "writes_per_scan": WRITES_PER_SCAN, "results": results}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,83 @@
+"""Per-instance cost of the multi-instance host.
+
+Builds N copies of simulator.yaml in one process (no per-instance adapters,
+routing through the instance_id front end only) and reports build time and
+traced heap per instance. Then, for each worker count, runs the whole host
+for a few seconds and reports the share of scheduled scans that ran, skipped
+scans and the worst per-instance p99 lateness, read back through the same
+backends the front end uses. workers=0 puts every scan loop on one thread.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from host import InstanceSet, RemoteInstance, SimulatorHost, expand_instances, preload
+
+INSTANCES = 100
+PERIOD_MS = 10
+RUN_SEC = 3.0
+WORKERS = (0, 4)
+QUICK = {"instances": 10, "run_sec": 1.0}
+
+
+def host_config(instances: int, period_ms: int, workers: int = 0) -> dict:
+    return {
+        "host": {"workers": workers, "front": {"enabled": False}},
+        "instances": [
+            {
+                "id": "plc{n:03d}",
+                "count": instances,
+                "config": "simulator.yaml",
+                "overrides": {"scan": {"mode": "real", "period_ms": period_ms}, "adapters": []},
+            }
+        ],
+    }
+
+
+def footprint(instances: int, period_ms: int) -> dict:
+    cfgs = expand_instances(host_config(instances, period_ms))
+    preload(cfgs)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    InstanceSet(cfgs, {})
+    build_sec = time.perf_counter() - t0
+    heap = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return {
+        "build_ms_per_instance": round(build_sec / instances * 1000, 3),
+        "heap_kib_per_instance": round(heap / instances / 1024, 1),
+    }
+
+
+def throughput(instances: int, period_ms: int, workers: int, run_sec: float) -> dict:
+    host = SimulatorHost(host_config(instances, period_ms, workers))
+    if host.local is not None:
+        backends = host.local.backends
+    else:
+        backends = {iid: RemoteInstance(w, iid) for w in host.processes for iid in w.instance_ids}
+    host.start()
+    time.sleep(run_sec)
+    stats = [backend.handle_request({"op": "stats"})["stats"] for backend in backends.values()]
+    host.stop()
+    scans = sum(s["counters"].get("scans_total", 0) for s in stats)
+    return {
+        "scans_run_pct": round(scans / (instances * run_sec * 1000 / period_ms) * 100, 1),
+        "skipped_scans": sum(s["counters"].get("scan_skipped_total", 0) for s in stats),
+        "worst_lateness_p99_us": max(s["histograms"]["scan_lateness_us"]["p99"] or 0 for s in stats),
+    }
+
+
+def run(instances: int = INSTANCES, period_ms: int = PERIOD_MS, run_sec: float = RUN_SEC, workers=WORKERS) -> dict:
+    out = {"bench": "host", "instances": instances, "period_ms": period_ms, **footprint(instances, period_ms)}
+    out["by_workers"] = {str(w): throughput(instances, period_ms, w, run_sec) for w in workers}
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
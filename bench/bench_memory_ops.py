@@ -0,0 +1,67 @@
+"""read_words/write_words throughput by range size.
+
+Reads go through the stable (seqlock) read path as an adapter would.
+Writes are timed on DM (IMMEDIATE: straight into the bank) and on MR
+words (NEXT_SCAN: one WAL entry each, applied every APPLY_EVERY writes
+outside the timed region). Each figure is the best of three rounds.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+SIZES = (1, 16, 256, 1024)
+OPS = 20_000
+APPLY_EVERY = 1000
+QUICK = {"sizes": (1, 256), "ops": 2000}
+
+
+def ops_per_sec(fn, ops: int, between=None) -> float:
+    best = None
+    for _ in range(3):
+        elapsed = 0.0
+        done = 0
+        while done < ops:
+            batch = min(APPLY_EVERY, ops - done)
+            t0 = time.perf_counter()
+            for _ in range(batch):
+                fn()
+            elapsed += time.perf_counter() - t0
+            done += batch
+            if between is not None:
+                between()
+        best = elapsed if best is None else min(best, elapsed)
+    return round(ops / best, 1)
+
+
+def run(sizes=SIZES, ops: int = OPS) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(max_entries=10 * APPLY_EVERY), DeviceMemoryOptions())
+    scan = [0]
+
+    def apply():
+        scan[0] += 1
+        mem.apply_wal("scan_end", scan[0] + 1)
+
+    out = {}
+    for size in sizes:
+        values = [i & 0xFFFF for i in range(size)]
+        out[str(size)] = {
+            "read_words": ops_per_sec(lambda: mem.read_words("DM", 0, size, source="adapter:bench"), ops),
+            "write_words_immediate": ops_per_sec(lambda: mem.write_words("DM", 0, values, source="adapter:bench"), ops),
+            "write_words_next_scan": ops_per_sec(
+                lambda: mem.write_words("MR", 0, values, source="adapter:bench"), ops, between=apply
+            ),
+        }
+    return {"bench": "memory_ops", "unit": "ops_per_sec", "sizes": out}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,87 @@
+"""Per-scan cost of N timers and counters through PlcParts.
+
+Compares the string-id calls (now a dict lookup to a handle), the handle
+calls (*_at on slots allocated once) and, for TON, one TonGroup.update per
+scan. Inputs toggle every few scans so edges and resets are exercised.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.plc_parts import PlcParts
+from core.state_store import StateStore
+
+TIMERS = 5000
+SCANS = 50
+QUICK = {"n": 500, "scans": 10}
+
+
+def _inputs(scans: int, n: int) -> list[list[bool]]:
+    return [[(s + i) % 5 != 0 for i in range(n)] for s in range(scans)]
+
+
+def measure_ids(n: int, scans: int) -> dict:
+    parts = PlcParts(StateStore(), lambda: 10)
+    ids = [f"t{i}" for i in range(n)]
+    inputs = _inputs(scans, n)
+    out = {}
+    t0 = time.perf_counter()
+    for row in inputs:
+        for id, x in zip(ids, row):
+            parts.ton(id, x, 100)
+    out["ton"] = (time.perf_counter() - t0) / scans
+    t0 = time.perf_counter()
+    for row in inputs:
+        for id, x in zip(ids, row):
+            parts.ctu(id, x, 100)
+    out["ctu"] = (time.perf_counter() - t0) / scans
+    t0 = time.perf_counter()
+    for row in inputs:
+        for id, x in zip(ids, row):
+            parts.tp(id, x, 100)
+    out["tp"] = (time.perf_counter() - t0) / scans
+    return out
+
+
+def measure_handles(n: int, scans: int) -> dict:
+    parts = PlcParts(StateStore(), lambda: 10)
+    ids = [f"t{i}" for i in range(n)]
+    inputs = _inputs(scans, n)
+    out = {}
+    for kind, alloc, call in (
+        ("ton", parts.alloc_ton, parts.ton_at),
+        ("ctu", parts.alloc_ctu, parts.ctu_at),
+        ("tp", parts.alloc_tp, parts.tp_at),
+    ):
+        handles = [alloc(id) for id in ids]
+        t0 = time.perf_counter()
+        for row in inputs:
+            for h, x in zip(handles, row):
+                call(h, x, 100)
+        out[kind] = (time.perf_counter() - t0) / scans
+    group = PlcParts(StateStore(), lambda: 10).ton_group(ids, [100] * n)
+    t0 = time.perf_counter()
+    for row in inputs:
+        group.update(row)
+    out["ton_group"] = (time.perf_counter() - t0) / scans
+    return out
+
+
+def run(n: int = TIMERS, scans: int = SCANS) -> dict:
+    by_id = measure_ids(n, scans)
+    by_handle = measure_handles(n, scans)
+    return {
+        "bench": "plc_parts",
+        "unit": "us_per_scan",
+        "instructions": n,
+        "string_id": {k: round(v * 1e6, 1) for k, v in by_id.items()},
+        "handle": {k: round(v * 1e6, 1) for k, v in by_handle.items()},
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
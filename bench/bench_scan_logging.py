@@ -0,0 +1,73 @@
+"""Scan cost with DEBUG scan logging in each mode, relative to INFO (no logger).
+
+Runs the three shipped ladder modules in step mode, twice: back to back
+(the writer thread competes with the scan thread for the GIL) and paced
+with a short idle gap per scan, as in real mode, where the writer drains
+in the gap. Paced async scans should stay within a few percent of INFO;
+sync pays for formatting and file I/O on the scan thread either way.
+"""
+
+import importlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.scan_engine import ScanConfig, ScanEngine
+from core.sim_logger import build_scan_logger
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+SCANS = 5000
+PACED_SCANS = 1000
+PACE_SEC = 0.001
+QUICK = {"scans": 500, "paced_scans": 100}
+MODES = {
+    "info": None,
+    "debug_sync": {"mode": "sync"},
+    "debug_async_text": {"mode": "async"},
+    "debug_async_binary": {"mode": "async", "format": "binary"},
+}
+
+
+def measure(log_cfg: dict | None, directory: Path, scans: int = SCANS, pace: float = 0.0) -> float:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    modules = [importlib.import_module(f"modules.{name}").Module() for name in ("A", "B", "X")]
+    sim_cfg = {"log_level": "INFO" if log_cfg is None else "DEBUG"}
+    logger = build_scan_logger(
+        sim_cfg, {**(log_cfg or {}), "file_path": str(directory / "scan.log"), "max_bytes": 1 << 26, "backup_count": 1}
+    )
+    engine = ScanEngine(mem, modules, ScanConfig(mode="step", period_ms=10), logger=logger)
+    elapsed = 0.0
+    for _ in range(scans):
+        t0 = time.perf_counter()
+        engine.step()
+        elapsed += time.perf_counter() - t0
+        if pace:
+            time.sleep(pace)
+    engine.close()
+    return elapsed / scans * 1e6
+
+
+def run(scans: int = SCANS, paced_scans: int = PACED_SCANS) -> dict:
+    out = {"bench": "scan_logging", "unit": "us_per_scan"}
+    for label, n, pace in (("back_to_back", scans, 0.0), ("paced", paced_scans, PACE_SEC)):
+        results = {}
+        for name, cfg in MODES.items():
+            with tempfile.TemporaryDirectory() as d:
+                results[name] = round(measure(cfg, Path(d), n, pace), 2)
+        base = results["info"]
+        out[label] = {
+            "results": results,
+            "overhead_pct": {name: round((us / base - 1) * 100, 1) for name, us in results.items() if name != "info"},
+        }
+    return out
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
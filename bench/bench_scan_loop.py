@@ -0,0 +1,78 @@
+"""Scans per second with N synthetic ladder modules.
+
+Each module is a LadderModuleBase that reads a DM word and an input bit,
+runs a TON on a PlcParts handle and writes a DM word and an MR coil, so a
+scan exercises reads, the immediate and NEXT_SCAN write paths, and WAL
+apply. Scans run back to back in step mode, each one timed on its own.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench.common import percentiles
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.scan_engine import ScanConfig, ScanEngine
+from core.wal import WalStore
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+MODULE_COUNTS = (1, 10, 100)
+SCANS = 2000
+QUICK = {"module_counts": (1, 10), "scans": 200}
+
+
+class Synthetic(LadderModuleBase):
+    def __init__(self, index: int):
+        self.name = f"syn{index}"
+        self.index = index
+        self.source = f"ladder:{self.name}"
+
+    def on_load(self, ctx):
+        self.timer = ctx.plc.alloc_ton(self.name)
+
+    def execute(self, ctx):
+        mem, i = ctx.mem, self.index
+        value = mem.read_words("DM", i, 1, source=self.source)[0]
+        start = mem.read_bits("R", i, 1, source=self.source)[0]
+        done = ctx.plc.ton_at(self.timer, start or value & 1, 50)
+        mem.write_words("DM", 1000 + i, [(value + 1) & 0xFFFF], source=self.source)
+        mem.write_bits("MR", i, [1 if done else 0], source=self.source)
+
+
+def measure(modules: int, scans: int) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    engine = ScanEngine(mem, [Synthetic(i) for i in range(modules)], ScanConfig(mode="step", period_ms=10))
+    for _ in range(10):
+        engine.step()
+    samples = []
+    clock = time.perf_counter_ns
+    t0 = clock()
+    for _ in range(scans):
+        t = clock()
+        engine.step()
+        samples.append((clock() - t) / 1000)
+    wall = (clock() - t0) / 1e9
+    engine.close()
+    return {
+        "scans_per_sec": round(scans / wall, 1),
+        "us_per_scan": round(wall / scans * 1e6, 1),
+        **{k: round(v, 1) for k, v in percentiles(samples).items()},
+    }
+
+
+def run(module_counts=MODULE_COUNTS, scans: int = SCANS) -> dict:
+    return {
+        "bench": "scan_loop",
+        "unit": "us",
+        "scans": scans,
+        "modules": {str(n): measure(n, scans) for n in module_counts},
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,71 @@
+"""Bulk reads of the full VM range: shared-memory snapshot vs tcp_json_v1.
+
+The snapshot side attaches a SharedBankClient to a storage="shm"
+DeviceMemory and copies VM (and, separately, every bank) under the epoch
+seqlock into reused buffers. The JSON side is a lower bound for TCP: the
+same range read through TcpJsonV1Server._handle_line in
+max_points_per_request chunks with the response encoded, but no socket.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adapters.tcp_json_v1 import TcpJsonV1Server, encode_frame
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.shared_banks import SharedBankClient
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+SNAPSHOTS = 200
+JSON_ROUNDS = 2
+QUICK = {"snapshots": 20, "json_rounds": 1}
+
+
+def run(snapshots: int = SNAPSHOTS, json_rounds: int = JSON_ROUNDS) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions(storage="shm"))
+    client = SharedBankClient(name=mem.shared.name)
+    vm = ("VM", "word")
+    points = client.banks[vm].count
+    try:
+        out, _ = client.snapshot([vm])
+        t0 = time.perf_counter()
+        for _ in range(snapshots):
+            client.snapshot([vm], out)
+        vm_us = (time.perf_counter() - t0) / snapshots * 1e6
+
+        everything, _ = client.snapshot()
+        t0 = time.perf_counter()
+        for _ in range(snapshots):
+            client.snapshot(None, everything)
+        all_us = (time.perf_counter() - t0) / snapshots * 1e6
+
+        server = TcpJsonV1Server(mem, name="bench", bind_ip="127.0.0.1", port=0)
+        chunk = server.limits["max_points_per_request"]
+        t0 = time.perf_counter()
+        for _ in range(json_rounds):
+            for addr in range(0, points, chunk):
+                line = json.dumps({"op": "read", "space": "word", "dev": "VM", "addr": addr, "count": min(chunk, points - addr)})
+                encode_frame(server._handle_line(line.encode("utf-8")))
+        json_us = (time.perf_counter() - t0) / json_rounds * 1e6
+    finally:
+        client.close()
+        mem.close()
+    return {
+        "bench": "shared_snapshot",
+        "unit": "us",
+        "vm_points": points,
+        "shm_snapshot_vm": round(vm_us, 1),
+        "shm_snapshot_all_banks": round(all_us, 1),
+        "all_banks_bytes": sum(len(b) for b in everything.values()),
+        "json_read_vm": round(json_us, 1),
+        "speedup_vm": round(json_us / vm_us, 1),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,111 @@
+"""In-process multi-client load against the tcp_json_v1 server.
+
+Starts a TcpJsonV1Server (thread per client) or AsyncTcpJsonV1Server on
+an ephemeral port, plus a real-mode ScanEngine applying the WAL, and
+drives it from N client threads. Each client sends one request at a time
+and waits for the reply. The request mix is reads and writes of DM/MR
+ranges. Reported latency is per request round trip, in microseconds.
+"""
+
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adapters.tcp_json_v1 import TcpJsonV1Server
+from adapters.tcp_json_v1_async import AsyncTcpJsonV1Server
+from bench.common import percentiles
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.scan_engine import ScanConfig, ScanEngine
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+CLIENTS = (1, 8, 32)
+REQUESTS_PER_CLIENT = 500
+SERVERS = ("thread", "async")
+WRITE_RATIO = 0.3
+QUICK = {"clients": (1, 8), "requests_per_client": 100, "servers": ("thread",)}
+
+
+def requests(seed: int, n: int) -> list[bytes]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        addr = rng.randrange(0, 1000)
+        if rng.random() < WRITE_RATIO:
+            dev = rng.choice(("DM", "MR"))
+            space = "word" if dev == "DM" else "bit"
+            req = {"id": i, "op": "write", "space": space, "dev": dev, "addr": addr, "values": [rng.randrange(2)] * 8}
+        else:
+            req = {"id": i, "op": "read", "space": "word", "dev": "DM", "addr": addr, "count": rng.choice((1, 16, 64))}
+        out.append((json.dumps(req) + "\n").encode("utf-8"))
+    return out
+
+
+def client(port: int, frames: list[bytes], samples: list[float], errors: list[int], start: threading.Barrier) -> None:
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        start.wait()
+        clock = time.perf_counter_ns
+        for frame in frames:
+            t0 = clock()
+            sock.sendall(frame)
+            line = reader.readline()
+            samples.append((clock() - t0) / 1000)
+            if not json.loads(line).get("ok"):
+                errors.append(1)
+
+
+def measure(server_kind: str, clients: int, per_client: int) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    engine = ScanEngine(mem, [], ScanConfig(mode="real", period_ms=10))
+    scan_thread = threading.Thread(target=engine.run_forever, daemon=True)
+    scan_thread.start()
+    cls = AsyncTcpJsonV1Server if server_kind == "async" else TcpJsonV1Server
+    server = cls(mem, name="bench", bind_ip="127.0.0.1", port=0)
+    server.start()
+    samples: list[float] = []
+    errors: list[int] = []
+    start = threading.Barrier(clients + 1)
+    threads = [
+        threading.Thread(target=client, args=(server.port, requests(c, per_client), samples, errors, start))
+        for c in range(clients)
+    ]
+    try:
+        for t in threads:
+            t.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+    finally:
+        server.stop()
+        engine.stop()
+        scan_thread.join()
+        engine.close()
+    return {
+        "requests_per_sec": round(len(samples) / wall, 1),
+        **{k: round(v, 1) for k, v in percentiles(samples).items()},
+        "errors": len(errors),
+    }
+
+
+def run(clients=CLIENTS, requests_per_client: int = REQUESTS_PER_CLIENT, servers=SERVERS) -> dict:
+    return {
+        "bench": "tcp_load",
+        "unit": "us",
+        "requests_per_client": requests_per_client,
+        "servers": {kind: {str(n): measure(kind, n, requests_per_client) for n in clients} for kind in servers},
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
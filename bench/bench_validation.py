@@ -0,0 +1,52 @@
+"""Per-call overhead of request validation and the memory read/write path.
+
+Compares the compiled (dev, space) accessors against the MemoryModel.validate
+path they replaced, then measures full read/write calls and SchemaValidator.
+All figures are nanoseconds per call.
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adapters.schema import SchemaValidator
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+NUMBER = 200_000
+QUICK = {"number": 20_000}
+
+
+def per_call_ns(fn, number: int = NUMBER) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=3))
+    return round(best / number * 1e9, 1)
+
+
+def run(number: int = NUMBER) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    validator = SchemaValidator()
+    acc = profile.accessor("DM", "word")
+    values_64 = list(range(64))
+    read_req = {"id": 1, "op": "read", "space": "word", "dev": "DM", "addr": 0, "count": 8}
+    write_req = {"id": 2, "op": "write", "space": "word", "dev": "DM", "addr": 0, "values": values_64}
+    cases = {
+        "model_validate": lambda: profile.get_model("DM").validate("word", 100, 8),
+        "accessor_check": lambda: profile.accessor("DM", "word").check(100, 8),
+        "check_values_64_loop": lambda: [int(v) for v in values_64 if 0 <= int(v) <= 65535],
+        "check_values_64": lambda: acc.check_values(values_64),
+        "read_words_8": lambda: mem.read_words("DM", 100, 8, source="adapter:bench"),
+        "write_words_1": lambda: mem.write_words("DM", 100, [1], source="adapter:bench"),
+        "write_words_64": lambda: mem.write_words("DM", 100, values_64, source="adapter:bench"),
+        "validate_read_request": lambda: validator.validate_request(read_req),
+        "validate_write_request": lambda: validator.validate_request(write_req),
+    }
+    return {"bench": "validation", "unit": "ns_per_call", "results": {name: per_call_ns(fn, number) for name, fn in cases.items()}}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
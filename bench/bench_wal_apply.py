@@ -0,0 +1,60 @@
+"""Scan-end WAL apply of many single-point coil writes.
+
+Queues N one-point NEXT_SCAN writes (every MR coil once, plus a second
+writer on every other coil) and times apply_wal, which merges them per
+(dev, space) into contiguous runs. The baseline replays the same entries
+one _write_cs each, which is what apply_wal did before merging.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.device_memory import DeviceMemory
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+COILS = 10_000
+ROUNDS = 5
+QUICK = {"coils": 1000, "rounds": 2}
+
+
+def fill(mem: DeviceMemory, coils: int) -> None:
+    for i in range(coils):
+        mem.write_bits("MR", i, [1], source="ladder:A")
+    for i in range(0, coils, 2):
+        mem.write_bits("MR", i, [0], source="ladder:B")
+
+
+def run(coils: int = COILS, rounds: int = ROUNDS) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(max_entries=10 * coils))
+    merged = per_entry = 0.0
+    for scan_id in range(1, rounds + 1):
+        fill(mem, coils)
+        t0 = time.perf_counter()
+        for entry in mem.wal.iter_ready(scan_id):
+            mem._write_cs(entry.dev, entry.space, entry.addr, entry.values)
+        mem.wal.remove_applied(scan_id)
+        per_entry += time.perf_counter() - t0
+        fill(mem, coils)
+        t0 = time.perf_counter()
+        mem.apply_wal("scan_end", scan_id)
+        merged += time.perf_counter() - t0
+    counters = mem.metrics.counters()
+    return {
+        "bench": "wal_apply",
+        "unit": "ms_per_apply",
+        "entries": counters["wal_applied_entries_total"] // rounds,
+        "bank_writes": counters["wal_apply_writes_total"] // rounds,
+        "per_entry": round(per_entry / rounds * 1e3, 2),
+        "merged": round(merged / rounds * 1e3, 2),
+        "speedup": round(per_entry / merged, 1),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,62 @@
+"""WAL append, apply and discard cost at various queue depths.
+
+For each depth, DEPTH entries from a handful of sources are appended for
+one scan (WalStore.append only; entries are prebuilt), then either applied
+by DeviceMemory.apply_wal or dropped by discard_scan. Entries are
+one-point MR writes spread over 4096 coils, so apply also merges them.
+Figures are nanoseconds per entry.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalEntry, WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+DEPTHS = (100, 1_000, 10_000, 100_000)
+SOURCES = ("ladder:A", "ladder:B", "ladder:C", "adapter:main")
+QUICK = {"depths": (100, 1_000)}
+
+
+def entries(depth: int, scan_id: int) -> list[WalEntry]:
+    return [
+        WalEntry(0, 0, scan_id, scan_id + 1, SOURCES[i % len(SOURCES)], "MR", "bit", (i * 37) % 4096, [i & 1], "NEXT_SCAN")
+        for i in range(depth)
+    ]
+
+
+def measure(depth: int) -> dict:
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(max_entries=depth), DeviceMemoryOptions())
+    wal = mem.wal
+    out = {}
+    batch = entries(depth, 1)
+    t0 = time.perf_counter_ns()
+    for e in batch:
+        wal.append(e)
+    out["append"] = (time.perf_counter_ns() - t0) / depth
+    t0 = time.perf_counter_ns()
+    mem.apply_wal("scan_end", 2)
+    out["apply"] = (time.perf_counter_ns() - t0) / depth
+
+    batch = entries(depth, 3)
+    for e in batch:
+        wal.append(e)
+    t0 = time.perf_counter_ns()
+    mem.discard_scan(3)
+    out["discard_ladder"] = (time.perf_counter_ns() - t0) / depth
+    out["left_after_discard"] = wal.size()
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in out.items()}
+
+
+def run(depths=DEPTHS) -> dict:
+    return {"bench": "wal_depth", "unit": "ns_per_entry", "depths": {str(d): measure(d) for d in depths}}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,11 @@
+"""Helpers shared by the bench scripts and the suite runner."""
+
+
+def percentiles(samples, points=(50, 99)) -> dict:
+    # Nearest-rank percentiles of raw samples, keyed "p50", "p99", ... plus "max".
+    ordered = sorted(samples)
+    if not ordered:
+        return {f"p{p}": None for p in points} | {"max": None}
+    out = {f"p{p}": ordered[min(len(ordered) - 1, max(0, -(-len(ordered) * p // 100) - 1))] for p in points}
+    out["max"] = ordered[-1]
+    return out
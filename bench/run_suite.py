@@ -0,0 +1,183 @@
+"""Run the bench scripts and emit one JSON document.
+
+    python bench/run_suite.py                      # every bench/bench_*.py
+    python bench/run_suite.py scan_loop tcp_load   # selected ones
+    python bench/run_suite.py --quick --out results.json
+    python bench/run_suite.py --compare baseline.json
+    python bench/run_suite.py wal_depth --profile cprofile --profile-dir prof/
+
+Each bench module exposes run(**kwargs) -> dict; --quick passes its QUICK
+kwargs (smaller runs for CI) where it defines them. The output holds run
+metadata (git commit, Python, platform) and the results keyed by name.
+--compare adds, for every numeric result also present in the baseline, the
+baseline value and the ratio current/baseline; whether higher is better
+depends on the unit each bench reports. --profile wraps every run in
+cProfile (stats dumped per bench, top functions in the output; the main
+thread only, so server threads in tcp_load are not covered) or tracemalloc
+(peak traced bytes and the top allocation sites).
+"""
+
+import argparse
+import cProfile
+import importlib.util
+import json
+import os
+import platform
+import pstats
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = ROOT / "bench"
+sys.path.insert(0, str(ROOT))
+
+
+def discover() -> dict[str, Path]:
+    return {p.stem[len("bench_") :]: p for p in sorted(BENCH_DIR.glob("bench_*.py"))}
+
+
+def load(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+
+def metadata(quick: bool) -> dict:
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": quick,
+    }
+
+
+def run_profiled(name: str, fn, mode: str | None, profile_dir: Path | None, top: int) -> tuple[dict, dict | None]:
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn)
+        stats = pstats.Stats(profiler)
+        if profile_dir is not None:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(profile_dir / f"{name}.prof")
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+        return result, {
+            "mode": "cprofile",
+            "top_cumulative": [
+                {
+                    "function": f"{Path(file).name}:{line}({func})",
+                    "calls": nc,
+                    "tottime_ms": round(tt * 1e3, 2),
+                    "cumtime_ms": round(ct * 1e3, 2),
+                }
+                for (file, line, func), (_, nc, tt, ct, _) in rows
+            ],
+        }
+    if mode == "tracemalloc":
+        tracemalloc.start()
+        try:
+            result = fn()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats = snapshot.statistics("lineno")[:top]
+        return result, {
+            "mode": "tracemalloc",
+            "peak_bytes": peak,
+            "top_sites": [
+                {"where": f"{Path(s.traceback[0].filename).name}:{s.traceback[0].lineno}", "size_bytes": s.size, "count": s.count}
+                for s in stats
+            ],
+        }
+    return fn(), None
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            out.update(flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    old = flatten(baseline.get("results", {}))
+    out = {}
+    for path, value in flatten(results).items():
+        before = old.get(path)
+        if before is None:
+            continue
+        out[path] = {"baseline": before, "current": value, "ratio": round(value / before, 3) if before else None}
+    return out
+
+
+def main(argv=None) -> int:
+    available = discover()
+    parser = argparse.ArgumentParser(description="Run the simulator benchmarks and print JSON results.")
+    parser.add_argument("benches", nargs="*", help=f"subset to run (default: all of {', '.join(available)})")
+    parser.add_argument("--quick", action="store_true", help="use each bench's QUICK parameters")
+    parser.add_argument("--out", help="also write the JSON document to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--profile", choices=("cprofile", "tracemalloc"))
+    parser.add_argument("--profile-dir", help="where cProfile stats are dumped as <bench>.prof")
+    parser.add_argument("--top", type=int, default=20, help="rows kept in the profile summary")
+    args = parser.parse_args(argv)
+
+    unknown = [b for b in args.benches if b not in available]
+    if unknown:
+        parser.error(f"unknown bench: {', '.join(unknown)}")
+    # Paths given on the command line are relative to the caller, resolved before the chdir below.
+    out = Path(args.out).resolve() if args.out else None
+    baseline = Path(args.compare).resolve() if args.compare else None
+    profile_dir = Path(args.profile_dir).resolve() if args.profile_dir else None
+    # The scripts open profiles/ and example/ by relative path.
+    os.chdir(ROOT)
+    document = {"meta": metadata(args.quick), "results": {}}
+    profiles = {}
+    for name in args.benches or list(available):
+        module = load(name, available[name])
+        kwargs = getattr(module, "QUICK", {}) if args.quick else {}
+        print(f"running {name} ...", file=sys.stderr, flush=True)
+        t0 = time.perf_counter()
+        result, profile = run_profiled(
+            name,
+            lambda: module.run(**kwargs),
+            args.profile,
+            profile_dir,
+            args.top,
+        )
+        result["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+        document["results"][name] = result
+        if profile is not None:
+            profiles[name] = profile
+    if profiles:
+        document["profile"] = profiles
+    if baseline is not None:
+        document["compare"] = compare(document["results"], json.loads(baseline.read_text(encoding="utf-8")))
+    text = json.dumps(document, indent=2)
+    if out is not None:
+        out.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .scan_engine import Hook
+from .wal import WalEntry
+
+# File layout: b"KVCK" | u32 header length | JSON header | bank blobs.
+# Bank offsets in the header are relative to the first byte after the header.
+MAGIC = b"KVCK"
+VERSION = 1
+_PREFIX = struct.Struct("<4sI")
+
+
+@dataclass
+class RestoreReport:
+    checkpoint: str | None = None
+    scan_id: int = 0
+    replayed: int = 0
+    pending: int = 0
+    elapsed_ms: float = 0.0
+
+
+class CheckpointStore:
+    def __init__(self, directory: str, keep: int = 2):
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writer: threading.Thread | None = None
+
+    def paths(self) -> list[Path]:
+        return sorted(self.directory.glob("ckpt.*.bin"))
+
+    def latest(self) -> Path | None:
+        paths = self.paths()
+        return paths[-1] if paths else None
+
+    def capture(self, mem, scan_id: int, state: dict) -> dict:
+        wal_seq = mem.wal.last_seq
+        wal_segment = getattr(mem.wal.sink, "current_segment", 0)
+        blobs = [(key, bank.tobytes()) for key, bank in mem._cs.items()]
+        return {
+            "scan_id": scan_id,
+            "wal_seq": wal_seq,
+            "wal_segment": wal_segment,
+            "state": state,
+            "pending": [vars(e) for e in mem.wal.pending()],
+            "blobs": blobs,
+        }
+
+    def submit(self, snapshot: dict) -> bool:
+        if self._writer is not None and self._writer.is_alive():
+            return False
+        self._writer = threading.Thread(target=self.write, args=(snapshot,), name="checkpoint-writer", daemon=True)
+        self._writer.start()
+        return True
+
+    def wait(self) -> None:
+        if self._writer is not None:
+            self._writer.join()
+
+    def write(self, snapshot: dict) -> Path:
+        banks = []
+        offset = 0
+        for (dev, space), blob in snapshot["blobs"]:
+            banks.append({"dev": dev, "space": space, "offset": offset, "nbytes": len(blob)})
+            offset += len(blob)
+        header = {
+            "version": VERSION,
+            "byteorder": sys.byteorder,
+            "created_ms": int(time.time() * 1000),
+            "scan_id": snapshot["scan_id"],
+            "wal_seq": snapshot["wal_seq"],
+            "wal_segment": snapshot["wal_segment"],
+            "state": snapshot["state"],
+            "pending": snapshot["pending"],
+            "banks": banks,
+        }
+        raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        path = self.directory / f"ckpt.{snapshot['scan_id']:012d}.bin"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(_PREFIX.pack(MAGIC, len(raw)))
+            fp.write(raw)
+            for _, blob in snapshot["blobs"]:
+                fp.write(blob)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, path)
+        for old in self.paths()[: -self.keep]:
+            old.unlink()
+        return path
+
+    def load_into(self, path: Path, mem) -> dict:
+        with open(path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, header_len = _PREFIX.unpack_from(mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a checkpoint file")
+            header = json.loads(mm[_PREFIX.size : _PREFIX.size + header_len].decode("utf-8"))
+            if header["version"] != VERSION:
+                raise ValueError(f"unsupported checkpoint version {header['version']}")
+            swap = header["byteorder"] != sys.byteorder
+            data_start = _PREFIX.size + header_len
+            with memoryview(mm) as view:
+                for bank in header["banks"]:
+                    target = mem._cs.get((bank["dev"], bank["space"]))
+                    if target is None:
+                        continue
+                    start = data_start + bank["offset"]
+                    target.load_bytes(view[start : start + bank["nbytes"]], swap)
+        return header
+
+
+def _read_frames(segments):
+    for path in segments:
+        with open(path, encoding="utf-8") as fp:
+            for line in fp:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def replay_wal(mem, segments, after_seq: int, scan_id: int, pending: list[dict]) -> tuple[int, int, int, list[dict]]:
+    waiting = {e["seq"]: e for e in pending}
+    max_seq = after_seq
+    replayed = 0
+    for frame in _read_frames(segments):
+        mark = frame.get("mark")
+        if mark == "commit":
+            if frame["scan_id"] <= scan_id:
+                continue
+            scan_id = frame["scan_id"]
+            for seq in sorted(s for s, e in waiting.items() if e["target_scan_id"] <= scan_id):
+                e = waiting.pop(seq)
+                mem._write_cs(e["dev"], e["space"], e["addr"], e["values"])
+                replayed += 1
+        elif mark == "discard":
+            for seq in [
+                s
+                for s, e in waiting.items()
+                if e["scan_id"] == frame["scan_id"] and e["source"].startswith(frame["source_prefix"])
+            ]:
+                del waiting[seq]
+        elif mark is None and frame["seq"] > after_seq:
+            max_seq = max(max_seq, frame["seq"])
+            if frame["result"] == "applied":
+                mem._write_cs(frame["dev"], frame["space"], frame["addr"], frame["values"])
+                replayed += 1
+            else:
+                waiting[frame["seq"]] = frame
+    return scan_id, replayed, max_seq, [waiting[s] for s in sorted(waiting)]
+
+
+def restore_latest(engine, store: CheckpointStore) -> RestoreReport:
+    t0 = time.perf_counter()
+    report = RestoreReport()
+    path = store.latest()
+    if path is None:
+        return report
+    mem = engine.mem
+    header = store.load_into(path, mem)
+    segments = []
+    sink = mem.wal.sink
+    if sink is not None and hasattr(sink, "segments"):
+        segments = [p for index, p in sink.segments() if index >= header["wal_segment"]]
+    scan_id, replayed, max_seq, pending = replay_wal(
+        mem, segments, header["wal_seq"], header["scan_id"], header["pending"]
+    )
+    mem.wal.restore_seq(max_seq)
+    for e in pending:
+        mem.wal.append(WalEntry(**{**e, "seq": 0}))
+    engine.restore_state(scan_id, header["state"])
+    mem.resync_images()
+    report.checkpoint = str(path)
+    report.scan_id = scan_id
+    report.replayed = replayed
+    report.pending = len(pending)
+    report.elapsed_ms = (time.perf_counter() - t0) * 1000
+    return report
+
+
+class CheckpointHook(Hook):
+    def __init__(self, store: CheckpointStore, interval_scans: int = 1000):
+        self.store = store
+        self.interval_scans = max(1, interval_scans)
+
+    def on_scan_end(self, ctx):
+        if ctx.scan_id % self.interval_scans == 0:
+            self.store.submit(self.store.capture(ctx.mem, ctx.scan_id, ctx.state.snapshot()))
@@ -0,0 +1,49 @@
+import threading
+
+
+class VirtualClock:
+    # PLC time: the sum of scan deltas, advanced by the scan engine at each scan end.
+    def __init__(self, start_ms: int = 0):
+        self._now_ms = start_ms
+        self._scan_id = 0
+        self._cond = threading.Condition()
+        # Called after every change, on the thread making it; event-loop waiters use these instead of blocking.
+        self._watchers: tuple = ()
+
+    @property
+    def now_ms(self) -> int:
+        return self._now_ms
+
+    @property
+    def scan_id(self) -> int:
+        return self._scan_id
+
+    def advance(self, delta_ms: int, scan_id: int) -> int:
+        with self._cond:
+            self._now_ms += delta_ms
+            self._scan_id = scan_id
+            self._cond.notify_all()
+            now = self._now_ms
+        for fn in self._watchers:
+            fn()
+        return now
+
+    def reset(self, now_ms: int, scan_id: int = 0) -> None:
+        with self._cond:
+            self._now_ms = now_ms
+            self._scan_id = scan_id
+            self._cond.notify_all()
+        for fn in self._watchers:
+            fn()
+
+    def watch(self, fn) -> None:
+        with self._cond:
+            self._watchers = self._watchers + (fn,)
+
+    def unwatch(self, fn) -> None:
+        with self._cond:
+            self._watchers = tuple(w for w in self._watchers if w is not fn)
+
+    def wait_until(self, target_ms: int, timeout: float | None = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._now_ms >= target_ms, timeout)
@@ -1,11 +1,15 @@
-from collections import defaultdict
 from dataclasses import dataclass
-from threading import Lock
+from threading import Lock, RLock
+import time
 
 from .device_profile import DeviceProfile
 from .errors import OutOfRangeError
 from .lock_manager import LockManager
-from .wal import WalEntry, WalStore
+from .memory_bank import SPACE_ITEMSIZE, build_banks, values_from_bytes
+from .metrics import MetricsRegistry
+from .overlay import IntervalMap
+from .shared_banks import SharedSegment
+from .wal import WalEntry, WalStore, WriteCoalescer
 
 
 @dataclass
@@ -13,108 +17,285 @@ class DeviceMemoryOptions:
     lock_timeout_ms: int = 5000
     read_your_writes: bool = False
     apply_phase: str = "scan_end"
+    storage: str = "array"
+    lock_granularity: str = "device"
+    lock_stripe_size: int = 256
+    shared_name: str = ""
+    shared_path: str = ""
+
+
+SHARED_STORAGES = ("shm", "mmap")
 
 
 class DeviceMemory:
-    def __init__(self, profile: DeviceProfile, wal: WalStore, options: DeviceMemoryOptions | None = None):
+    def __init__(
+        self,
+        profile: DeviceProfile,
+        wal: WalStore,
+        options: DeviceMemoryOptions | None = None,
+        metrics: MetricsRegistry | None = None,
+    ):
         self.profile = profile
         self.wal = wal
         self.options = options or DeviceMemoryOptions()
-        self.locks = LockManager()
+        self.metrics = metrics or MetricsRegistry()
+        self.locks = LockManager(profile, self.options.lock_granularity, self.options.lock_stripe_size, self.metrics)
         self.current_scan_id = 0
         self.current_delta_ms = 0
-        self._cs = defaultdict(dict)  # (dev,space)->addr->value
-        self._image = defaultdict(dict)
-        self._scan_lock = Lock()
+        self.shared = None
+        if self.options.storage in SHARED_STORAGES:
+            # Banks live in a segment other processes can map; see core/shared_banks.py for the layout.
+            self.shared = SharedSegment(profile, self.options.storage, self.options.shared_name, self.options.shared_path)
+            self._cs = self.shared.banks
+        else:
+            self._cs = build_banks(profile, self.options.storage)  # (dev,space)->bank
+        self._io_keys = [
+            key for key in self._cs if self.profile.devices[key[0]].scan_consistency_rule == "IO_IMAGE"
+        ]
+        self._image = {}
+        self._scan_lock = RLock()
+        self._changes: dict[tuple[str, str], list[tuple[int, int]]] | None = None
+        self._changes_lock = Lock()
+        # read_your_writes: target scan -> ladder source -> (dev, space) -> that source's pending writes.
+        self._overlays: dict[int, dict[str, dict[tuple[str, str], IntervalMap]]] = {}
+        self._overlay_lock = Lock()
+        self.resync_images()
+
+    def nbytes(self) -> int:
+        return sum(bank.nbytes for bank in self._cs.values()) + sum(bank.nbytes for bank in self._image.values())
 
     def begin_scan(self, scan_id: int, delta_ms: int) -> None:
         with self._scan_lock:
             self.current_scan_id = scan_id
             self.current_delta_ms = delta_ms
-            self._image = defaultdict(dict)
-            for dev, model in self.profile.devices.items():
-                if model.scan_consistency_rule == "IO_IMAGE":
-                    for space in model.supported_spaces:
-                        self._image[(dev, space)] = dict(self._cs[(dev, space)])
+            for key in self._io_keys:
+                self._cs[key].sync_to(self._image[key])
+
+    def resync_images(self) -> None:
+        with self._scan_lock:
+            for key in self._io_keys:
+                self._image[key] = self._cs[key].copy()
+                self._cs[key].track_dirty()
 
     def end_scan(self, scan_id: int) -> None:
         self.current_scan_id = scan_id
+        if self.shared is not None:
+            self.shared.publish_scan(scan_id)
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def consistent_view(self):
+        # Held by begin_scan and apply_wal, so no scan boundary falls inside the block.
+        return self._scan_lock
 
     def apply_wal(self, phase: str, scan_id: int) -> None:
         if phase != self.options.apply_phase:
             return
-        pending = sorted(self.wal.iter_ready(scan_id), key=lambda e: e.seq)
-        for entry in pending:
-            self._write_cs(entry.dev, entry.space, entry.addr, entry.values)
-        self.wal.remove_applied(scan_id)
+        applied = nbytes = writes = 0
+        shared = self.shared
+        with self._scan_lock:
+            # Entries stay one per write for the audit trail; the bank sees one write per merged run.
+            merged = WriteCoalescer()
+            for entry in self.wal.iter_ready(scan_id):
+                merged.add(entry.dev, entry.space, entry.addr, entry.values)
+                applied += 1
+                nbytes += len(entry.values) * SPACE_ITEMSIZE[entry.space]
+            # One shared-memory epoch for the whole apply: external snapshots see all of a scan's writes or none.
+            if shared is not None:
+                shared.begin_write()
+            try:
+                for dev, space, addr, values in merged.runs():
+                    self._write_cs(dev, space, addr, values)
+                    writes += 1
+            finally:
+                if shared is not None:
+                    shared.end_write()
+            self.wal.remove_applied(scan_id)
+            with self._overlay_lock:
+                for target in [t for t in self._overlays if t <= scan_id]:
+                    del self._overlays[target]
+        if applied:
+            self.metrics.inc("wal_applied_entries_total", applied)
+            self.metrics.inc("wal_applied_bytes_total", nbytes)
+            self.metrics.inc("wal_apply_writes_total", writes)
 
-    def _resolve_reads(self, dev: str, space: str, source: str) -> dict[int, int]:
-        model = self.profile.get_model(dev)
-        if source.startswith("ladder") and model.scan_consistency_rule == "IO_IMAGE":
-            return self._image[(dev, space)]
-        return self._cs[(dev, space)]
+    def discard_scan(self, scan_id: int, source_prefix: str = "ladder:") -> None:
+        self.wal.discard_scan(scan_id, source_prefix)
+        with self._overlay_lock:
+            sources = self._overlays.get(scan_id + 1)
+            if sources:
+                for source in [s for s in sources if s.startswith(source_prefix)]:
+                    del sources[source]
+
+    def _stable_read(self, key: tuple[str, str], read, addr: int, count: int):
+        # Seqlock read: retry until no writer touched the covered stripes, so multi-point reads are never
+        # torn and readers never block writers.
+        versions = self.locks.versions[key]
+        lo, hi = self.locks.stripe_span(key, addr, count)
+        if lo == hi:
+            while True:
+                before = versions[lo]
+                if not before & 1:
+                    out = read(addr, count)
+                    if versions[lo] == before:
+                        return out
+                time.sleep(0)
+        while True:
+            before = versions[lo : hi + 1]
+            if not any(v & 1 for v in before):
+                out = read(addr, count)
+                if versions[lo : hi + 1] == before:
+                    return out
+            time.sleep(0)
 
     def _read(self, dev: str, space: str, addr: int, count: int, *, source: str) -> list[int]:
-        model = self.profile.get_model(dev)
-        model.validate(space, addr, count)
-        data = self._resolve_reads(dev, space, source)
-        return [int(data.get(i, model.default_value)) for i in range(addr, addr + count)]
+        acc = self.profile.accessor(dev, space)
+        acc.check(addr, count)
+        key = (dev, space)
+        if acc.io_image and source.startswith("ladder"):
+            # IO images are only written at scan begin, by the scan thread itself.
+            out = self._image[key].read(addr, count)
+        else:
+            out = self._stable_read(key, self._cs[key].read, addr, count)
+        if self._overlays and source.startswith("ladder"):
+            # Oldest pending scan first, so the newest write of this source wins. Held across apply: the
+            # interval maps are mutated in place by deferred writes from other threads.
+            with self._overlay_lock:
+                for target in sorted(self._overlays):
+                    overlay = self._overlays[target].get(source)
+                    if overlay is not None and key in overlay:
+                        overlay[key].apply(addr, out)
+        return out
+
+    def read_raw(self, dev: str, space: str, addr: int, count: int, *, source: str) -> bytes:
+        # Little-endian packed values (one byte per bit point) straight from the bank.
+        acc = self.profile.accessor(dev, space)
+        acc.check(addr, count)
+        key = (dev, space)
+        if acc.io_image and source.startswith("ladder"):
+            return self._image[key].read_bytes(addr, count)
+        return self._stable_read(key, self._cs[key].read_bytes, addr, count)
+
+    def write_raw(self, dev: str, space: str, addr: int, raw: bytes, *, source: str) -> None:
+        self._write(dev, space, addr, values_from_bytes(space, raw), source=source)
 
     def _write_cs(self, dev: str, space: str, addr: int, values: list[int]) -> None:
-        model = self.profile.get_model(dev)
-        store = self._cs[(dev, space)]
-        for i, val in enumerate(values):
-            if space == "bit" and val not in (0, 1, True, False):
-                raise OutOfRangeError("bit value must be 0/1")
-            if space == "word" and not (0 <= int(val) <= 65535):
-                raise OutOfRangeError("word value must be 0..65535")
-            if space == "dword" and not (0 <= int(val) <= (2**32 - 1)):
-                raise OutOfRangeError("dword value must be 0..2^32-1")
-            store[addr + i] = int(val)
-
-    def _write(self, dev: str, space: str, addr: int, values: list[int], *, source: str) -> None:
-        model = self.profile.get_model(dev)
-        model.validate(space, addr, len(values))
-        model.validate_writeable()
-        lock = self.locks.acquire(dev, self.options.lock_timeout_ms)
+        key = (dev, space)
+        count = len(values)
+        held = self.locks.acquire_range(dev, space, addr, count, self.options.lock_timeout_ms)
         try:
-            policy = model.scan_consistency_rule
-            if policy == "IMMEDIATE":
-                self._write_cs(dev, space, addr, values)
-            elif policy in ("NEXT_SCAN", "IO_IMAGE"):
-                self.wal.append(
+            versions = self.locks.versions[key]
+            lo, hi = self.locks.stripe_span(key, addr, count)
+            for i in range(lo, hi + 1):
+                versions[i] += 1
+            shared = self.shared
+            if shared is not None:
+                shared.begin_write()
+            try:
+                self._cs[key].write(addr, values)
+            finally:
+                if shared is not None:
+                    shared.end_write()
+                for i in range(lo, hi + 1):
+                    versions[i] += 1
+        finally:
+            self.locks.release_all(held)
+        if self._changes is not None:
+            with self._changes_lock:
+                self._changes.setdefault((dev, space), []).append((addr, addr + len(values)))
+
+    def track_changes(self) -> None:
+        with self._changes_lock:
+            if self._changes is None:
+                self._changes = {}
+
+    def drain_changes(self) -> dict[tuple[str, str], list[tuple[int, int]]]:
+        # (dev, space) -> written [start, end) ranges since the previous drain.
+        with self._changes_lock:
+            if not self._changes:
+                return {}
+            changes, self._changes = self._changes, {}
+        return changes
+
+    def validate_read(self, dev: str, space: str, addr: int, count: int) -> None:
+        self.profile.accessor(dev, space).check(addr, count)
+
+    def validate_write(self, dev: str, space: str, addr: int, values: list[int]) -> None:
+        acc = self.profile.accessor(dev, space)
+        acc.check(addr, len(values))
+        acc.check_writable()
+        acc.check_values(values)
+
+    def _write(self, dev: str, space: str, addr: int, values: list[int], *, source: str, defer: bool = False) -> None:
+        acc = self.profile.accessor(dev, space)
+        acc.check(addr, len(values))
+        acc.check_writable()
+        values = acc.check_values(values)
+        # Device/stripe locks are taken by _write_cs; deferred writes only touch the WAL, which locks itself.
+        policy = acc.policy
+        if policy == "IMMEDIATE" and not defer:
+            # Applied before it is logged, so a failed WAL writer must refuse the write up front.
+            self.wal.check_sink()
+            self._write_cs(dev, space, addr, values)
+            if self.wal.sink is not None:
+                self.wal.record(
                     WalEntry(
                         seq=0,
                         time_ms=0,
                         scan_id=self.current_scan_id,
-                        target_scan_id=self.current_scan_id + 1,
+                        target_scan_id=self.current_scan_id,
                         source=source,
                         dev=dev,
                         space=space,
                         addr=addr,
-                        values=[int(v) for v in values],
+                        values=values,
                         policy=policy,
+                        result="applied",
                     )
                 )
-            else:
-                raise OutOfRangeError(f"unsupported policy {policy}")
-        finally:
-            lock.release()
+        elif policy in ("NEXT_SCAN", "IO_IMAGE", "IMMEDIATE"):
+            target = self.current_scan_id + 1
+            self.wal.append(
+                WalEntry(
+                    seq=0,
+                    time_ms=0,
+                    scan_id=self.current_scan_id,
+                    target_scan_id=target,
+                    source=source,
+                    dev=dev,
+                    space=space,
+                    addr=addr,
+                    values=values,
+                    policy=policy,
+                )
+            )
+            if self.options.read_your_writes and source.startswith("ladder"):
+                with self._overlay_lock:
+                    by_key = self._overlays.setdefault(target, {}).setdefault(source, {})
+                    overlay = by_key.get((dev, space))
+                    if overlay is None:
+                        overlay = by_key[(dev, space)] = IntervalMap()
+                    overlay.write(addr, values)
+        else:
+            raise OutOfRangeError(f"unsupported policy {policy}")
 
     def read_bits(self, dev: str, addr: int, count: int, *, source: str) -> list[int]:
         return self._read(dev, "bit", addr, count, source=source)
 
-    def write_bits(self, dev: str, addr: int, values: list[int], *, source: str) -> None:
-        self._write(dev, "bit", addr, values, source=source)
+    def write_bits(self, dev: str, addr: int, values: list[int], *, source: str, defer: bool = False) -> None:
+        self._write(dev, "bit", addr, values, source=source, defer=defer)
 
     def read_words(self, dev: str, addr: int, count: int, *, source: str) -> list[int]:
         return self._read(dev, "word", addr, count, source=source)
 
-    def write_words(self, dev: str, addr: int, values: list[int], *, source: str) -> None:
-        self._write(dev, "word", addr, values, source=source)
+    def write_words(self, dev: str, addr: int, values: list[int], *, source: str, defer: bool = False) -> None:
+        self._write(dev, "word", addr, values, source=source, defer=defer)
 
     def read_dwords(self, dev: str, addr: int, count: int, *, source: str) -> list[int]:
         return self._read(dev, "dword", addr, count, source=source)
 
-    def write_dwords(self, dev: str, addr: int, values: list[int], *, source: str) -> None:
-        self._write(dev, "dword", addr, values, source=source)
+    def write_dwords(self, dev: str, addr: int, values: list[int], *, source: str, defer: bool = False) -> None:
+        self._write(dev, "dword", addr, values, source=source, defer=defer)
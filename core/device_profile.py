@@ -1,7 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from .errors import UnknownDeviceError
-from .memory_model import MemoryModel
+from .memory_model import MemoryModel, SpaceAccessor
 
 
 @dataclass
@@ -10,6 +10,20 @@ class DeviceProfile:
     version: int
     description: str
     devices: dict[str, MemoryModel]
+    accessors: dict[tuple[str, str], SpaceAccessor] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.accessors = {
+            (dev, space): accessor for dev, model in self.devices.items() for space, accessor in model.compile().items()
+        }
+
+    def accessor(self, dev: str, space: str) -> SpaceAccessor:
+        acc = self.accessors.get((dev, space))
+        if acc is None:
+            # Unknown device, unsupported space or missing bounds: let the model raise the precise error.
+            self.get_model(dev).validate(space, 0, 1)
+            raise UnknownDeviceError(f"Unknown device: {dev}")
+        return acc
 
     def get_model(self, dev: str) -> MemoryModel:
         try:
@@ -33,3 +33,15 @@ class InvalidRequestError(SimError):
 
 class TooManyPointsError(SimError):
     code = "TOO_MANY_POINTS"
+
+
+class TooManyClientsError(SimError):
+    code = "TOO_MANY_CLIENTS"
+
+
+class UnknownInstanceError(SimError):
+    code = "UNKNOWN_INSTANCE"
+
+
+class WalWriteError(SimError):
+    code = "WAL_WRITE_FAILED"
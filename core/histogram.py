@@ -0,0 +1,66 @@
+import bisect
+
+# Upper bucket bounds in microseconds; the last bucket is open-ended.
+DEFAULT_BOUNDS_US = (50, 100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 250000, 1000000)
+
+
+class Histogram:
+    def __init__(self, bounds: tuple[int, ...] = DEFAULT_BOUNDS_US):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value: int) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        if other.bounds != self.bounds:
+            raise ValueError("cannot merge histograms with different bounds")
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, p: float) -> int | None:
+        # Upper bound of the bucket holding the p-th percentile (max for the open-ended bucket).
+        if not self.count:
+            return None
+        rank = max(1, int(self.count * p / 100 + 0.5))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def snapshot(self) -> dict:
+        counts = list(self.counts)
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": [[bound, n] for bound, n in zip(list(self.bounds) + ["inf"], counts)],
+        }
@@ -0,0 +1,280 @@
+from dataclasses import dataclass, field
+
+# Program format (JSON):
+#   {"name": "L1", "rungs": [{"if": <cond>, "do": [<instr>, ...]}, ...]}
+# <cond>:  "R000" (NO contact) | "!R001" (NC contact) | [<cond>, ...] (series) |
+#          {"and": [...]} | {"or": [...]} | {"not": <cond>} | true/false; a missing "if" is always on.
+# <instr>: {"out": op} | {"set": op} | {"rst": op} | {"mov": op|int, "to": op} |
+#          {"ton"|"tof"|"tp": id, "pt": ms, "q": op} |
+#          {"ctu"|"ctd": id, "pv": n, "reset": <cond>, "q": op, "cv": op}
+# Operands use device names ("MR100", "DM20"); out/set/rst/mov accept a list of targets.
+# Within a program, later rungs see coils set by earlier ones, like one PLC program.
+
+READ_GAP = 32  # points; nearby reads of one (dev, space) merge into a single range read
+TIMERS = ("ton", "tof", "tp")
+COUNTERS = ("ctu", "ctd")
+SPACE_TAG = {"bit": "b", "word": "w", "dword": "d"}
+
+
+@dataclass
+class _Instr:
+    op: str
+    cond: object
+    targets: list = field(default_factory=list)
+    id: str = ""
+    preset: int = 0
+    src: object = None
+    reset: object = None
+    q: tuple | None = None
+    cv: tuple | None = None
+
+
+def _runs(points: list[int], gap: int) -> list[tuple[int, int]]:
+    out = []
+    for p in sorted(points):
+        if out and p - out[-1][1] <= gap + 1:
+            out[-1] = (out[-1][0], p)
+        else:
+            out.append((p, p))
+    return out
+
+
+class LadderProgram:
+    # Parsed at construction, so reads/writes are known before the engine builds its schedule;
+    # compile() allocates instruction state and returns one scan(mem) function.
+    def __init__(self, program: dict, parse):
+        if not isinstance(program, dict) or not isinstance(program.get("rungs"), list):
+            raise ValueError("ladder program needs a 'rungs' list")
+        self.name = program.get("name", "ladder")
+        self.source_tag = f"ladder:{self.name}"
+        self._parse = parse
+        self._operands: dict[str, tuple[str, str, int]] = {}
+        self.rungs = [self._parse_rung(i, rung) for i, rung in enumerate(program["rungs"])]
+        self._plan()
+        self.source = ""
+
+    def _operand(self, name) -> tuple[str, str, int]:
+        if not isinstance(name, str):
+            raise ValueError(f"{self.name}: operand must be a device name, got {name!r}")
+        op = self._operands.get(name)
+        if op is None:
+            op = self._operands[name] = self._parse(name)
+        return op
+
+    def _targets(self, value) -> list:
+        return [self._operand(v) for v in (value if isinstance(value, list) else [value])]
+
+    def _cond(self, c):
+        if c is None or isinstance(c, bool):
+            return ("const", c is None or c)
+        if isinstance(c, str):
+            if c.startswith("!"):
+                return ("not", self._cond(c[1:]))
+            return ("pt", self._operand(c))
+        if isinstance(c, list):
+            return ("and", [self._cond(x) for x in c])
+        if isinstance(c, dict) and len(c) == 1:
+            (kind, arg), = c.items()
+            if kind in ("and", "or") and isinstance(arg, list):
+                return (kind, [self._cond(x) for x in arg])
+            if kind == "not":
+                return ("not", self._cond(arg))
+        raise ValueError(f"{self.name}: bad condition {c!r}")
+
+    def _parse_rung(self, index: int, rung) -> list[_Instr]:
+        if not isinstance(rung, dict):
+            raise ValueError(f"{self.name}: rung {index} must be an object")
+        cond = self._cond(rung.get("if"))
+        body = rung.get("do", [])
+        out = []
+        for instr in body if isinstance(body, list) else [body]:
+            kinds = [k for k in ("out", "set", "rst", "mov") + TIMERS + COUNTERS if k in instr]
+            if len(kinds) != 1:
+                raise ValueError(f"{self.name}: rung {index}: cannot tell instruction {instr!r}")
+            op = kinds[0]
+            q = self._operand(instr["q"]) if instr.get("q") is not None else None
+            if op in ("out", "set", "rst"):
+                out.append(_Instr(op, cond, self._targets(instr[op])))
+            elif op == "mov":
+                src = instr["mov"]
+                src = ("const", int(src)) if isinstance(src, int) else ("pt", self._operand(src))
+                out.append(_Instr(op, cond, self._targets(instr["to"]), src=src))
+            elif op in TIMERS:
+                out.append(_Instr(op, cond, id=str(instr[op]), preset=int(instr["pt"]), q=q))
+            else:
+                reset = self._cond(instr["reset"]) if "reset" in instr else ("const", False)
+                cv = self._operand(instr["cv"]) if instr.get("cv") is not None else None
+                out.append(_Instr(op, cond, id=str(instr[op]), preset=int(instr["pv"]), reset=reset, q=q, cv=cv))
+        return out
+
+    def _plan(self) -> None:
+        # Walk in program order: a point needs its memory value at scan start if it is read, or only
+        # conditionally written, before anything assigns it unconditionally.
+        assigned, init = set(), set()
+        always, latched = set(), set()
+
+        def uses(c):
+            if c[0] == "pt" and c[1] not in assigned:
+                init.add(c[1])
+            elif c[0] in ("and", "or"):
+                for x in c[1]:
+                    uses(x)
+            elif c[0] == "not":
+                uses(c[1])
+
+        for rung in self.rungs:
+            for ins in rung:
+                uses(ins.cond)
+                if ins.reset is not None:
+                    uses(ins.reset)
+                if ins.src is not None:
+                    uses(ins.src)
+                if ins.op in ("set", "rst", "mov"):
+                    for t in ins.targets:
+                        if t not in assigned:
+                            init.add(t)
+                        latched.add(t)
+                        assigned.add(t)
+                else:
+                    for t in ins.targets + [p for p in (ins.q, ins.cv) if p is not None]:
+                        always.add(t)
+                        assigned.add(t)
+        latched -= always
+        self._init = init
+        self._always = always
+        self._latched = latched
+        self.read_ranges = self._ranges(init, READ_GAP)
+        # Unconditional and latched outputs are separate runs: a latched run is only written when it changed.
+        self.write_ranges = [(r, False) for r in self._ranges(always, 0)] + [(r, True) for r in self._ranges(latched, 0)]
+        self.reads = [(dev, space, lo, hi) for dev, space, lo, hi in self.read_ranges]
+        self.writes = [(dev, space, lo, hi) for (dev, space, lo, hi), _ in self.write_ranges]
+
+    @staticmethod
+    def _ranges(points, gap: int) -> list[tuple[str, str, int, int]]:
+        by_key: dict[tuple[str, str], list[int]] = {}
+        for dev, space, addr in points:
+            by_key.setdefault((dev, space), []).append(addr)
+        return [(dev, space, lo, hi) for (dev, space), addrs in sorted(by_key.items()) for lo, hi in _runs(addrs, gap)]
+
+    @staticmethod
+    def _var(p) -> str:
+        return f"{p[0]}_{SPACE_TAG[p[1]]}{p[2]}"
+
+    def _expr(self, c) -> str:
+        kind = c[0]
+        if kind == "const":
+            return str(int(c[1]))
+        if kind == "pt":
+            return self._var(c[1])
+        if kind == "not":
+            return f"not {self._expr(c[1])}"
+        parts = [self._expr(x) for x in c[1]]
+        if not parts:
+            return "1" if kind == "and" else "0"
+        return "(" + f" {kind} ".join(parts) + ")"
+
+    def _alloc(self, plc, ins: _Instr) -> int:
+        if ins.op == "ctd":
+            return plc.alloc_ctd(ins.id, ins.preset)
+        return getattr(plc, f"alloc_{ins.op}")(ins.id)
+
+    def _emit_instr(self, lines: list[str], ins: _Instr, h: int | None, c: str) -> None:
+        # Timer/counter bodies mirror PlcParts.*_at on the same slots, so state and snapshots match.
+        q = self._var(ins.q) if ins.q is not None else "_q"
+        pt = ins.preset
+        if ins.op == "out":
+            for t in ins.targets:
+                lines.append(f"    {self._var(t)} = 1 if {c} else 0")
+        elif ins.op in ("set", "rst"):
+            lines.append(f"    if {c}:")
+            lines.extend(f"        {self._var(t)} = {1 if ins.op == 'set' else 0}" for t in ins.targets)
+        elif ins.op == "mov":
+            src = self._expr(ins.src)
+            lines.append(f"    if {c}:")
+            lines.extend(f"        {self._var(t)} = {src}" for t in ins.targets)
+        elif ins.op == "ton":
+            lines += [
+                f"    if {c}:",
+                f"        _t = slots[{h}] + delta",
+                f"        slots[{h}] = _t",
+                f"        {q} = 1 if _t >= {pt} else 0",
+                "    else:",
+                f"        slots[{h}] = 0",
+                f"        {q} = 0",
+            ]
+        elif ins.op == "tof":
+            lines += [
+                f"    if {c}:",
+                f"        slots[{h}] = 0",
+                f"        {q} = 1",
+                "    else:",
+                f"        _t = slots[{h}] + delta",
+                f"        slots[{h}] = _t",
+                f"        {q} = 1 if _t < {pt} else 0",
+            ]
+        elif ins.op == "tp":
+            lines += [
+                f"    if {c} and not slots[{h + 2}]:",
+                f"        slots[{h + 1}] = 1",
+                "        _t = 0",
+                "    else:",
+                f"        _t = slots[{h}]",
+                f"    slots[{h + 2}] = 1 if {c} else 0",
+                f"    if slots[{h + 1}]:",
+                "        _t += delta",
+                f"        if _t >= {pt}:",
+                f"            slots[{h + 1}] = 0",
+                f"    slots[{h}] = _t",
+                f"    {q} = slots[{h + 1}]",
+            ]
+        else:
+            up = ins.op == "ctu"
+            if ins.reset == ("const", False):
+                lines.append(f"    _v = slots[{h}]")
+            else:
+                lines.append(f"    _v = {pt if not up else 0} if {self._expr(ins.reset)} else slots[{h}]")
+            lines += [
+                f"    if {c} and not slots[{h + 1}]:",
+                f"        _v {'+' if up else '-'}= 1",
+                f"    slots[{h + 1}] = 1 if {c} else 0",
+                f"    slots[{h}] = _v",
+            ]
+            if ins.q is not None:
+                lines.append(f"    {q} = 1 if _v {'>=' if up else '<='} {pt if up else 0} else 0")
+            if ins.cv is not None:
+                lines.append(f"    {self._var(ins.cv)} = _v")
+
+    def compile(self, plc):
+        # Slots, the delta source and the WAL tag are bound as defaults so the body only touches locals.
+        lines = ["def scan(mem, slots=slots, _delta=_delta, SOURCE=SOURCE):"]
+        if any(ins.op in TIMERS for rung in self.rungs for ins in rung):
+            lines.append("    delta = _delta()")
+        for i, (dev, space, lo, hi) in enumerate(self.read_ranges):
+            lines.append(f"    _r{i} = mem.read_{space}s({dev!r}, {lo}, {hi - lo + 1}, source=SOURCE)")
+            for addr in range(lo, hi + 1):
+                p = (dev, space, addr)
+                if p in self._init:
+                    lines.append(f"    {self._var(p)} = _r{i}[{addr - lo}]")
+                    if p in self._latched:
+                        lines.append(f"    _o_{self._var(p)} = {self._var(p)}")
+        for rung in self.rungs:
+            c = self._expr(rung[0].cond) if rung else "1"
+            # A condition used once goes inline; otherwise it is evaluated once into _c.
+            if len(rung) != 1 or rung[0].op in ("tp", "ctu", "ctd") or len(rung[0].targets) > 1:
+                lines.append(f"    _c = {c}")
+                c = "_c"
+            for ins in rung:
+                h = self._alloc(plc, ins) if ins.op in TIMERS + COUNTERS else None
+                self._emit_instr(lines, ins, h, c)
+        for (dev, space, lo, hi), latched in self.write_ranges:
+            names = [self._var((dev, space, a)) for a in range(lo, hi + 1)]
+            write = f"mem.write_{space}s({dev!r}, {lo}, [{', '.join(names)}], source=SOURCE)"
+            if latched:
+                lines.append(f"    if {' or '.join(f'{n} != _o_{n}' for n in names)}:")
+                lines.append(f"        {write}")
+            else:
+                lines.append(f"    {write}")
+        self.source = "\n".join(lines) + "\n"
+        namespace = {"slots": plc.slots, "_delta": plc.delta_provider, "SOURCE": self.source_tag}
+        exec(compile(self.source, f"<{self.source_tag}>", "exec"), namespace)
+        return namespace["scan"]
@@ -1,22 +1,66 @@
 import threading
+import time
 
 from .errors import LockTimeoutError
 
+GRANULARITIES = ("device", "stripe")
+STRIPE_SIZE = 256
+# Device granularity is one stripe spanning any address.
+_WHOLE_DEVICE = 1 << 62
+
 
 class LockManager:
-    def __init__(self):
+    def __init__(self, profile=None, granularity: str = "device", stripe_size: int = STRIPE_SIZE, metrics=None):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown lock granularity {granularity!r}")
+        if stripe_size < 1:
+            raise ValueError("stripe_size must be >= 1")
+        self.granularity = granularity
+        self.metrics = metrics
+        self.stripe_size = stripe_size if granularity == "stripe" else _WHOLE_DEVICE
         self._locks: dict[str, threading.RLock] = {}
         self._meta_lock = threading.Lock()
+        # (dev, space) -> writer locks and seqlock versions, one per stripe; odd version = write in progress.
+        self._stripes: dict[tuple[str, str], list[threading.RLock]] = {}
+        self._bases: dict[tuple[str, str], int] = {}
+        self.versions: dict[tuple[str, str], list[int]] = {}
+        if profile is not None:
+            # Created up front so the hot path never needs _meta_lock.
+            for dev in profile.devices:
+                self._locks[dev] = threading.RLock()
+            for key, acc in profile.accessors.items():
+                count = (acc.max_address - acc.min_address) // self.stripe_size + 1
+                if granularity == "device":
+                    self._stripes[key] = [self._locks[acc.dev]]
+                else:
+                    self._stripes[key] = [threading.RLock() for _ in range(count)]
+                self._bases[key] = acc.min_address
+                self.versions[key] = [0] * count
 
     def _get_lock(self, dev: str) -> threading.RLock:
+        lock = self._locks.get(dev)
+        if lock is not None:
+            return lock
         with self._meta_lock:
             if dev not in self._locks:
                 self._locks[dev] = threading.RLock()
             return self._locks[dev]
 
+    def _take(self, lock, timeout: float) -> bool:
+        # Only contended acquisitions are timed, so the uncontended path stays a single try-acquire.
+        if lock.acquire(blocking=False):
+            return True
+        t0 = time.perf_counter_ns()
+        ok = lock.acquire(timeout=timeout)
+        if self.metrics is not None:
+            self.metrics.observe("lock_wait_us", (time.perf_counter_ns() - t0) // 1000)
+            if not ok:
+                self.metrics.inc("lock_timeouts_total")
+        return ok
+
     def acquire(self, dev: str, timeout_ms: int):
         lock = self._get_lock(dev)
-        ok = lock.acquire(timeout=timeout_ms / 1000)
+        ok = self._take(lock, timeout_ms / 1000)
         if not ok:
             raise LockTimeoutError(f"timeout acquiring lock for {dev}")
         return lock
@@ -24,3 +68,32 @@ class LockManager:
     def release(self, dev: str) -> None:
         lock = self._get_lock(dev)
         lock.release()
+
+    def stripe_span(self, key: tuple[str, str], addr: int, count: int) -> tuple[int, int]:
+        base = self._bases.get(key, 0)
+        return (addr - base) // self.stripe_size, (addr + count - 1 - base) // self.stripe_size
+
+    def acquire_range(self, dev: str, space: str, addr: int, count: int, timeout_ms: int) -> list:
+        stripes = self._stripes.get((dev, space))
+        if stripes is None:
+            return [self.acquire(dev, timeout_ms)]
+        lo, hi = self.stripe_span((dev, space), addr, count)
+        if lo == hi:
+            lock = stripes[lo]
+            if not self._take(lock, timeout_ms / 1000):
+                raise LockTimeoutError(f"timeout acquiring lock for {dev}/{space} [{addr}, {addr + count - 1}]")
+            return [lock]
+        deadline = time.monotonic() + timeout_ms / 1000
+        held = []
+        # Always ascending stripe order, so overlapping range writers cannot deadlock.
+        for lock in stripes[lo : hi + 1]:
+            if not self._take(lock, max(0.0, deadline - time.monotonic())):
+                self.release_all(held)
+                raise LockTimeoutError(f"timeout acquiring lock for {dev}/{space} [{addr}, {addr + count - 1}]")
+            held.append(lock)
+        return held
+
+    @staticmethod
+    def release_all(held: list) -> None:
+        for lock in reversed(held):
+            lock.release()
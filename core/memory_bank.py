@@ -0,0 +1,244 @@
+import sys
+from array import array
+
+from .errors import OutOfRangeError
+
+SPACE_MAX = {"bit": 1, "word": 65535, "dword": 2**32 - 1}
+SPACE_ERRORS = {
+    "bit": "bit value must be 0/1",
+    "word": "word value must be 0..65535",
+    "dword": "dword value must be 0..2^32-1",
+}
+
+
+def _dword_typecode() -> str:
+    for code in ("I", "L"):
+        if array(code).itemsize == 4:
+            return code
+    raise RuntimeError("no 32-bit unsigned array typecode on this platform")
+
+
+# Bits are kept one byte per point so that a range read/write stays a single slice copy.
+SPACE_TYPECODES = {"bit": "B", "word": "H", "dword": _dword_typecode()}
+SPACE_ITEMSIZE = {space: array(code).itemsize for space, code in SPACE_TYPECODES.items()}
+
+# Dirty tracking granularity for banks mirrored into an IO image (points per page).
+PAGE_SHIFT = 8
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+
+_SWAP = sys.byteorder != "little"
+
+
+def pack_bits(data: bytes) -> bytes:
+    # One 0/1 byte per point -> LSB-first packed bits, using big-int ops instead of a per-point loop.
+    nbytes = (len(data) + 7) // 8
+    padded = bytes(data).ljust(nbytes * 8, b"\x00")
+    acc = 0
+    for k in range(8):
+        acc |= int.from_bytes(padded[k::8], "little") << k
+    return acc.to_bytes(nbytes, "little")
+
+
+def unpack_bits(packed: bytes, count: int) -> bytes:
+    nbytes = (count + 7) // 8
+    acc = int.from_bytes(packed[:nbytes], "little")
+    mask = int.from_bytes(b"\x01" * nbytes, "little")
+    out = bytearray(nbytes * 8)
+    for k in range(8):
+        out[k::8] = ((acc >> k) & mask).to_bytes(nbytes, "little")
+    return bytes(out[:count])
+
+
+def values_from_bytes(space: str, raw: bytes) -> array:
+    values = array(SPACE_TYPECODES[space])
+    values.frombytes(raw)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def check_values(space: str, values) -> list[int]:
+    # Whole-list conversion in C; the per-value loop only runs to reject or coerce odd inputs.
+    try:
+        packed = array(SPACE_TYPECODES[space], values)
+    except (OverflowError, TypeError, ValueError):
+        packed = None
+    if packed is not None and not (space == "bit" and packed and max(packed) > 1):
+        return packed.tolist()
+    limit = SPACE_MAX[space]
+    out = []
+    for val in values:
+        if space == "bit" and val not in (0, 1, True, False):
+            raise OutOfRangeError(SPACE_ERRORS[space])
+        ival = int(val)
+        if not (0 <= ival <= limit):
+            raise OutOfRangeError(SPACE_ERRORS[space])
+        out.append(ival)
+    return out
+
+
+class ArrayBank:
+    def __init__(self, space: str, min_address: int, max_address: int, default_value: int = 0):
+        self.space = space
+        self.base = min_address
+        self.size = max_address - min_address + 1
+        self.typecode = SPACE_TYPECODES[space]
+        self.default_value = default_value
+        self.data = array(self.typecode, [default_value]) * self.size
+        self.dirty: set[int] | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.data.itemsize
+
+    def pack(self, values) -> array:
+        try:
+            packed = array(self.typecode, values)
+        except (OverflowError, TypeError, ValueError):
+            return array(self.typecode, check_values(self.space, values))
+        if self.space == "bit" and packed and max(packed) > 1:
+            raise OutOfRangeError(SPACE_ERRORS["bit"])
+        return packed
+
+    def read(self, addr: int, count: int) -> list[int]:
+        start = addr - self.base
+        return self.data[start : start + count].tolist()
+
+    def read_bytes(self, addr: int, count: int) -> bytes:
+        start = addr - self.base
+        chunk = self.data[start : start + count]
+        if _SWAP:
+            chunk.byteswap()
+        return chunk.tobytes()
+
+    def write(self, addr: int, values) -> None:
+        packed = self.pack(values)
+        start = addr - self.base
+        self.data[start : start + len(packed)] = packed
+        if self.dirty is not None and packed:
+            self.dirty.update(range(start >> PAGE_SHIFT, ((start + len(packed) - 1) >> PAGE_SHIFT) + 1))
+
+    def track_dirty(self) -> None:
+        self.dirty = set()
+
+    def sync_to(self, other: "ArrayBank") -> int:
+        src, dst = self.data, other.data
+        for page in self.dirty:
+            lo = page << PAGE_SHIFT
+            dst[lo : lo + PAGE_SIZE] = src[lo : lo + PAGE_SIZE]
+        synced = len(self.dirty)
+        self.dirty.clear()
+        return synced
+
+    def tobytes(self) -> bytes:
+        return self.data.tobytes()
+
+    def load_bytes(self, buf, swap: bool = False) -> None:
+        loaded = array(self.typecode)
+        loaded.frombytes(buf)
+        if len(loaded) != self.size:
+            raise ValueError(f"bank size mismatch: {len(loaded)} != {self.size}")
+        if swap:
+            loaded.byteswap()
+        self.data[:] = loaded
+
+    def copy(self) -> "ArrayBank":
+        other = ArrayBank.__new__(ArrayBank)
+        other.__dict__.update(self.__dict__)
+        other.data = array(self.typecode, self.data)
+        other.dirty = None
+        return other
+
+
+class DictBank:
+    def __init__(self, space: str, min_address: int, max_address: int, default_value: int = 0):
+        self.space = space
+        self.base = min_address
+        self.size = max_address - min_address + 1
+        self.default_value = default_value
+        self.data: dict[int, int] = {}
+        self.dirty: set[int] | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.data) + sum(sys.getsizeof(v) for v in self.data.values())
+
+    def read(self, addr: int, count: int) -> list[int]:
+        get = self.data.get
+        default = self.default_value
+        return [get(i, default) for i in range(addr, addr + count)]
+
+    def read_bytes(self, addr: int, count: int) -> bytes:
+        chunk = array(SPACE_TYPECODES[self.space], self.read(addr, count))
+        if _SWAP:
+            chunk.byteswap()
+        return chunk.tobytes()
+
+    def write(self, addr: int, values) -> None:
+        packed = check_values(self.space, values)
+        self.data.update(zip(range(addr, addr + len(packed)), packed))
+        if self.dirty is not None:
+            self.dirty.update(range(addr, addr + len(packed)))
+
+    def track_dirty(self) -> None:
+        self.dirty = set()
+
+    def sync_to(self, other: "DictBank") -> int:
+        src, dst = self.data, other.data
+        for addr in self.dirty:
+            dst[addr] = src[addr]
+        synced = len(self.dirty)
+        self.dirty.clear()
+        return synced
+
+    def tobytes(self) -> bytes:
+        dense = ArrayBank(self.space, self.base, self.base + self.size - 1, self.default_value)
+        for addr, val in self.data.items():
+            dense.data[addr - self.base] = val
+        return dense.tobytes()
+
+    def load_bytes(self, buf, swap: bool = False) -> None:
+        dense = ArrayBank(self.space, self.base, self.base + self.size - 1, self.default_value)
+        dense.load_bytes(buf, swap)
+        default = self.default_value
+        self.data = {self.base + i: v for i, v in enumerate(dense.data) if v != default}
+
+    def copy(self) -> "DictBank":
+        other = DictBank.__new__(DictBank)
+        other.__dict__.update(self.__dict__)
+        other.data = dict(self.data)
+        other.dirty = None
+        return other
+
+
+BANK_TYPES = {"array": ArrayBank, "dict": DictBank}
+
+
+def build_banks(profile, storage: str = "array") -> dict:
+    try:
+        bank_type = BANK_TYPES[storage]
+    except KeyError as exc:
+        raise ValueError(f"unknown memory storage {storage!r}") from exc
+    banks = {}
+    for dev, model in profile.devices.items():
+        for space in model.supported_spaces:
+            bounds = model.ranges.get(space)
+            if not bounds:
+                continue
+            banks[(dev, space)] = bank_type(
+                space, int(bounds["min_address"]), int(bounds["max_address"]), model.default_value
+            )
+    return banks
+
+
+def profile_footprint_bytes(profile) -> int:
+    total = 0
+    for model in profile.devices.values():
+        for space in model.supported_spaces:
+            bounds = model.ranges.get(space)
+            if bounds:
+                size = int(bounds["max_address"]) - int(bounds["min_address"]) + 1
+                copies = 2 if model.scan_consistency_rule == "IO_IMAGE" else 1
+                total += copies * size * array(SPACE_TYPECODES[space]).itemsize
+    return total
@@ -1,6 +1,36 @@
 from dataclasses import dataclass
 
 from .errors import OutOfRangeError, ReadOnlyError, TypeMismatchError
+from .memory_bank import check_values
+
+
+class SpaceAccessor:
+    # One (device, space) pair with bounds and value limits resolved at profile load.
+    __slots__ = ("dev", "space", "min_address", "max_address", "writable", "policy", "io_image")
+
+    def __init__(self, model: "MemoryModel", space: str, min_address: int, max_address: int):
+        self.dev = model.device_suffix
+        self.space = space
+        self.min_address = min_address
+        self.max_address = max_address
+        self.writable = model.writable
+        self.policy = model.scan_consistency_rule
+        self.io_image = model.scan_consistency_rule == "IO_IMAGE"
+
+    def check(self, addr: int, count: int) -> None:
+        if count < 1 or addr < self.min_address or addr + count - 1 > self.max_address:
+            if count < 1:
+                raise OutOfRangeError("count must be >= 1")
+            raise OutOfRangeError(
+                f"{self.dev}/{self.space} [{addr}, {addr + count - 1}] out of range [{self.min_address}, {self.max_address}]"
+            )
+
+    def check_writable(self) -> None:
+        if not self.writable:
+            raise ReadOnlyError(f"{self.dev} is read-only")
+
+    def check_values(self, values) -> list[int]:
+        return check_values(self.space, values)
 
 
 @dataclass(frozen=True)
@@ -27,6 +57,14 @@ class MemoryModel:
                 f"{self.device_suffix}/{space} [{addr}, {addr + count - 1}] out of range [{min_address}, {max_address}]"
             )
 
+    def compile(self) -> dict[str, SpaceAccessor]:
+        accessors = {}
+        for space in self.supported_spaces:
+            bounds = self.ranges.get(space)
+            if bounds:
+                accessors[space] = SpaceAccessor(self, space, int(bounds["min_address"]), int(bounds["max_address"]))
+        return accessors
+
     def validate_writeable(self) -> None:
         if not self.writable:
             raise ReadOnlyError(f"{self.device_suffix} is read-only")
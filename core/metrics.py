@@ -0,0 +1,156 @@
+import threading
+import weakref
+
+from .histogram import Histogram
+
+
+def _series(base: int, top: int) -> tuple[int, ...]:
+    bounds = []
+    scale = base
+    while scale <= top:
+        bounds.extend(scale * m for m in (1, 2, 5))
+        scale *= 10
+    return tuple(b for b in bounds if b <= top)
+
+
+# 1-2-5 log buckets from 1 us to 10 s: constant relative error across the whole range.
+LATENCY_BOUNDS_US = _series(1, 10_000_000)
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+
+class _Owner:
+    # Lives in the thread-local only; its finalizer retires the shard when the thread exits.
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard: _Shard):
+        self.shard = shard
+
+
+def split_name(name: str) -> tuple[str, str]:
+    # 'name{a="b"}' -> ('name', 'a="b"')
+    base, _, labels = name.partition("{")
+    return base, labels.rstrip("}")
+
+
+def _retire(ref, shard: _Shard) -> None:
+    # Holds the registry weakly: a finalizer must not keep it alive past its last user.
+    registry = ref()
+    if registry is not None:
+        registry._fold(shard)
+
+
+class MetricsRegistry:
+    # Each recording thread owns a shard it alone writes to, so recording takes no lock;
+    # readers merge all shards, so a snapshot may lag a concurrent writer slightly. A shard is
+    # folded into _retired when its thread exits (the threaded servers run one per connection).
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._retired = _Shard()
+        self._gauges: dict[str, float] = {}
+        self._attached: dict[str, Histogram] = {}
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.owner.shard
+        except AttributeError:
+            shard = _Shard()
+            owner = self._local.owner = _Owner(shard)
+            with self._shards_lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, _retire, weakref.ref(self), shard)
+            return shard
+
+    def _fold(self, shard: _Shard) -> None:
+        retired = self._retired
+        with self._shards_lock:
+            self._shards.remove(shard)
+            for name, n in shard.counters.items():
+                retired.counters[name] = retired.counters.get(name, 0) + n
+            for name, hist in shard.histograms.items():
+                merged = retired.histograms.get(name)
+                if merged is None:
+                    merged = retired.histograms[name] = Histogram(hist.bounds)
+                merged.merge(hist)
+
+    def _live(self, out_counters: dict | None, out_histograms: dict | None) -> list[_Shard]:
+        # The retired totals are read under the lock, so a shard being folded is counted exactly once.
+        with self._shards_lock:
+            if out_counters is not None:
+                out_counters.update(self._retired.counters)
+            if out_histograms is not None:
+                for name, hist in self._retired.histograms.items():
+                    merged = out_histograms[name] = Histogram(hist.bounds)
+                    merged.merge(hist)
+            return list(self._shards)
+
+    def inc(self, name: str, n: int = 1) -> None:
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + n
+
+    def observe(self, name: str, value_us: int) -> None:
+        histograms = self._shard().histograms
+        hist = histograms.get(name)
+        if hist is None:
+            hist = histograms[name] = Histogram(LATENCY_BOUNDS_US)
+        hist.record(value_us)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self._gauges[name] = value
+
+    def attach(self, name: str, hist: Histogram) -> None:
+        # Histograms owned elsewhere (e.g. scheduler timing), exported under this name.
+        self._attached[name] = hist
+
+    def counters(self) -> dict[str, int]:
+        out: dict[str, int] = {}
+        for shard in self._live(out, None):
+            for name, n in list(shard.counters.items()):
+                out[name] = out.get(name, 0) + n
+        return out
+
+    def histograms(self) -> dict[str, Histogram]:
+        out: dict[str, Histogram] = {}
+        for shard in self._live(None, out):
+            for name, hist in list(shard.histograms.items()):
+                merged = out.get(name)
+                if merged is None:
+                    merged = out[name] = Histogram(hist.bounds)
+                merged.merge(hist)
+        for name, hist in self._attached.items():
+            out[name] = hist
+        return out
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(sorted(self.counters().items())),
+            "gauges": dict(sorted(self._gauges.items())),
+            "histograms": {name: hist.snapshot() for name, hist in sorted(self.histograms().items())},
+        }
+
+    def render_text(self) -> str:
+        # Prometheus text exposition format.
+        lines = []
+        for name, n in sorted(self.counters().items()):
+            lines.append(f"{name} {n}")
+        for name, value in sorted(self._gauges.items()):
+            lines.append(f"{name} {value}")
+        for name, hist in sorted(self.histograms().items()):
+            base, labels = split_name(name)
+            sep = "," if labels else ""
+            seen = 0
+            for bound, n in zip(list(hist.bounds) + ["+Inf"], hist.counts):
+                seen += n
+                lines.append(f'{base}_bucket{{{labels}{sep}le="{bound}"}} {seen}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{base}_sum{suffix} {hist.total}")
+            lines.append(f"{base}_count{suffix} {hist.count}")
+        return "\n".join(lines) + "\n"
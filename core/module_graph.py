@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+
+# An access is (dev, space, start, end): space None = every space of the device,
+# start/end None = the whole address range (both inclusive otherwise).
+Access = tuple[str, str | None, int | None, int | None]
+
+
+@dataclass
+class ModuleAccess:
+    reads: frozenset
+    writes: frozenset
+
+
+def normalize(entries) -> frozenset:
+    # Modules declare "DM", ("DM", "word") or ("DM", "word", 100, 101).
+    out = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            out.add((entry, None, None, None))
+        elif len(entry) == 2:
+            out.add((entry[0], entry[1], None, None))
+        elif len(entry) == 4:
+            out.add(tuple(entry))
+        else:
+            raise ValueError(f"bad module access entry {entry!r}")
+    return frozenset(out)
+
+
+def declared_access(module) -> ModuleAccess | None:
+    reads = getattr(module, "reads", None)
+    writes = getattr(module, "writes", None)
+    if reads is None and writes is None:
+        return None
+    return ModuleAccess(normalize(reads or ()), normalize(writes or ()))
+
+
+def _overlap(a: Access, b: Access) -> bool:
+    if a[0] != b[0]:
+        return False
+    if a[1] is not None and b[1] is not None and a[1] != b[1]:
+        return False
+    if a[2] is None or b[2] is None:
+        return True
+    return a[2] <= b[3] and b[2] <= a[3]
+
+
+def _any_overlap(xs: frozenset, ys: frozenset) -> bool:
+    return any(_overlap(x, y) for x in xs for y in ys)
+
+
+def conflicts(a: ModuleAccess | None, b: ModuleAccess | None) -> bool:
+    # Unknown access sets conflict with everything, so such a module runs alone.
+    if a is None or b is None:
+        return True
+    return _any_overlap(a.writes, b.reads) or _any_overlap(a.reads, b.writes) or _any_overlap(a.writes, b.writes)
+
+
+def build_waves(accesses: list[ModuleAccess | None]) -> list[list[int]]:
+    # Module i goes one wave after the latest earlier module it conflicts with, so every
+    # read-after-write, write-after-read and write-after-write pair keeps the sequential order.
+    level = []
+    for i, acc in enumerate(accesses):
+        level.append(max((level[j] + 1 for j in range(i) if conflicts(accesses[j], acc)), default=0))
+    waves: list[list[int]] = [[] for _ in range(max(level, default=-1) + 1)]
+    for i, lv in enumerate(level):
+        waves[lv].append(i)
+    return waves
+
+
+class AccessRecorder:
+    # Stands in for DeviceMemory in a module's ScanContext and notes every range the module touches.
+    def __init__(self, mem):
+        self._mem = mem
+        self.reads: set[Access] = set()
+        self.writes: set[Access] = set()
+
+    def __getattr__(self, name):
+        return getattr(self._mem, name)
+
+    def read_bits(self, dev, addr, count, *, source):
+        self.reads.add((dev, "bit", addr, addr + count - 1))
+        return self._mem.read_bits(dev, addr, count, source=source)
+
+    def read_words(self, dev, addr, count, *, source):
+        self.reads.add((dev, "word", addr, addr + count - 1))
+        return self._mem.read_words(dev, addr, count, source=source)
+
+    def read_dwords(self, dev, addr, count, *, source):
+        self.reads.add((dev, "dword", addr, addr + count - 1))
+        return self._mem.read_dwords(dev, addr, count, source=source)
+
+    def write_bits(self, dev, addr, values, *, source, defer=False):
+        self.writes.add((dev, "bit", addr, addr + len(values) - 1))
+        self._mem.write_bits(dev, addr, values, source=source, defer=defer)
+
+    def write_words(self, dev, addr, values, *, source, defer=False):
+        self.writes.add((dev, "word", addr, addr + len(values) - 1))
+        self._mem.write_words(dev, addr, values, source=source, defer=defer)
+
+    def write_dwords(self, dev, addr, values, *, source, defer=False):
+        self.writes.add((dev, "dword", addr, addr + len(values) - 1))
+        self._mem.write_dwords(dev, addr, values, source=source, defer=defer)
+
+
+class ModuleSchedule:
+    # Waves of mutually independent modules. Declared sets are trusted as-is; modules that declare
+    # nothing are barriers unless learn_scans > 0, in which case they run sequentially under an
+    # AccessRecorder for that many scans and stay recorded afterwards so the schedule can widen.
+    def __init__(self, modules: list, learn_scans: int = 0):
+        self.declared = [declared_access(m) for m in modules]
+        self.learned: list[ModuleAccess | None] = [None] * len(modules)
+        self.learn_scans = learn_scans
+        self.scans_seen = 0
+        self.violations = 0
+        if learn_scans:
+            self.waves = [[i] for i in range(len(modules))]
+        else:
+            self.waves = build_waves(self.declared)
+
+    def effective(self) -> list[ModuleAccess | None]:
+        return [d if d is not None else self.learned[i] for i, d in enumerate(self.declared)]
+
+    def recording(self, i: int) -> bool:
+        return self.learn_scans > 0 and self.declared[i] is None
+
+    def observe(self, recorders: dict[int, AccessRecorder]) -> int:
+        # Returns how many modules touched something outside their learned sets after learning ended.
+        learning = self.scans_seen < self.learn_scans
+        self.scans_seen += 1
+        violations = 0
+        changed = False
+        for i, rec in recorders.items():
+            old = self.learned[i]
+            if old is None:
+                self.learned[i] = ModuleAccess(frozenset(rec.reads), frozenset(rec.writes))
+                changed = True
+            elif not (rec.reads <= old.reads and rec.writes <= old.writes):
+                self.learned[i] = ModuleAccess(old.reads | rec.reads, old.writes | rec.writes)
+                changed = True
+                if not learning:
+                    violations += 1
+        self.violations += violations
+        if self.scans_seen >= self.learn_scans and (changed or self.scans_seen == self.learn_scans):
+            self.waves = build_waves(self.effective())
+        return violations
@@ -0,0 +1,44 @@
+from bisect import bisect_left, bisect_right
+
+
+class IntervalMap:
+    # Non-overlapping [start, start + len(values)) runs sorted by start. A write replaces whatever it
+    # overlaps, so the map always holds the latest value per point.
+    def __init__(self):
+        self._starts: list[int] = []
+        self._runs: list[tuple[int, list[int]]] = []
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def write(self, addr: int, values) -> None:
+        end = addr + len(values)
+        starts, runs = self._starts, self._runs
+        first = bisect_right(starts, addr) - 1
+        if first < 0 or runs[first][0] + len(runs[first][1]) <= addr:
+            first += 1
+        last = bisect_left(starts, end)
+        start, merged = addr, list(values)
+        if first < last:
+            s0, v0 = runs[first]
+            if s0 < addr:
+                start, merged = s0, v0[: addr - s0] + merged
+            s1, v1 = runs[last - 1]
+            if s1 + len(v1) > end:
+                merged += v1[end - s1 :]
+        starts[first:last] = [start]
+        runs[first:last] = [(start, merged)]
+
+    def apply(self, addr: int, out: list[int]) -> None:
+        # Overwrites the points of out (read from addr) that this map covers.
+        end = addr + len(out)
+        starts, runs = self._starts, self._runs
+        i = max(bisect_right(starts, addr) - 1, 0)
+        n = len(runs)
+        while i < n and starts[i] < end:
+            s, values = runs[i]
+            e = s + len(values)
+            if e > addr:
+                lo, hi = max(s, addr), min(e, end)
+                out[lo - addr : hi - addr] = values[lo - s : hi - s]
+            i += 1
@@ -1,75 +1,191 @@
+from array import array
+
 from .state_store import StateStore
 
 
+class TonGroup:
+    # Many TON timers on contiguous slots, updated for a whole scan in one pass.
+    def __init__(self, parts: "PlcParts", ids: list[str], pt_ms: list[int]):
+        if len(ids) != len(pt_ms):
+            raise ValueError("ids and pt_ms must have the same length")
+        self.parts = parts
+        self.ids = list(ids)
+        self.pt_ms = list(pt_ms)
+        self.handles = [parts.alloc_ton(id) for id in ids]
+        # Timers already allocated one by one may not be contiguous; then fall back to per-handle updates.
+        self.base = self.handles[0] if self.handles else 0
+        self.contiguous = self.handles == list(range(self.base, self.base + len(self.handles)))
+
+    def update(self, inputs) -> list[bool]:
+        delta = self.parts.delta_provider()
+        slots = self.parts.slots
+        if self.contiguous:
+            lo, hi = self.base, self.base + len(self.handles)
+            ets = [et + delta if on else 0 for et, on in zip(slots[lo:hi], inputs)]
+            slots[lo:hi] = array("q", ets)
+        else:
+            ets = []
+            for h, on in zip(self.handles, inputs):
+                et = slots[h] + delta if on else 0
+                slots[h] = et
+                ets.append(et)
+        return [et >= pt if on else False for et, pt, on in zip(ets, self.pt_ms, inputs)]
+
+
 class PlcParts:
+    # Each instruction has a handle form (alloc_* once, then *_at(handle, ...) per scan: plain index
+    # operations on StateStore.slots) and the original string-id form, which resolves the id to a
+    # handle through a per-kind dict. Slot keys match the old string keys, so snapshots are unchanged.
     def __init__(self, state: StateStore, delta_provider):
         self.state = state
+        # StateStore only ever grows or overwrites this array in place, so the reference stays valid.
+        self.slots = state.slots
         self.delta_provider = delta_provider
+        self._rise: dict[str, int] = {}
+        self._fall: dict[str, int] = {}
+        self._ton: dict[str, int] = {}
+        self._tof: dict[str, int] = {}
+        self._tp: dict[str, int] = {}
+        self._ctu: dict[str, int] = {}
+        self._ctd: dict[str, int] = {}
 
-    def edge_rise(self, id: str, signal: bool) -> bool:
-        key = f"edge:rise:{id}"
-        prev = bool(self.state.get(key, False))
-        self.state.set(key, bool(signal))
-        return (not prev) and bool(signal)
+    def alloc_edge_rise(self, id: str) -> int:
+        h = self._rise.get(id)
+        if h is None:
+            h = self._rise[id] = self.state.alloc((f"edge:rise:{id}",), (0,))
+        return h
 
-    def edge_fall(self, id: str, signal: bool) -> bool:
-        key = f"edge:fall:{id}"
-        prev = bool(self.state.get(key, False))
-        self.state.set(key, bool(signal))
-        return prev and (not bool(signal))
+    def alloc_edge_fall(self, id: str) -> int:
+        h = self._fall.get(id)
+        if h is None:
+            h = self._fall[id] = self.state.alloc((f"edge:fall:{id}",), (0,))
+        return h
 
-    def ton(self, id: str, in_signal: bool, pt_ms: int) -> bool:
-        key = f"ton:{id}:et"
-        et = int(self.state.get(key, 0))
+    def alloc_ton(self, id: str) -> int:
+        h = self._ton.get(id)
+        if h is None:
+            h = self._ton[id] = self.state.alloc((f"ton:{id}:et",), (0,))
+        return h
+
+    def alloc_tof(self, id: str) -> int:
+        h = self._tof.get(id)
+        if h is None:
+            h = self._tof[id] = self.state.alloc((f"tof:{id}:et",), (0,))
+        return h
+
+    def alloc_tp(self, id: str) -> int:
+        # Slots: et, running, rise edge.
+        h = self._tp.get(id)
+        if h is None:
+            keys = (f"tp:{id}:et", f"tp:{id}:running", f"edge:rise:tp:{id}:rise")
+            h = self._tp[id] = self.state.alloc(keys, (0, 0, 0))
+        return h
+
+    def alloc_ctu(self, id: str) -> int:
+        # Slots: cv, rise edge.
+        h = self._ctu.get(id)
+        if h is None:
+            h = self._ctu[id] = self.state.alloc((f"ctu:{id}:cv", f"edge:rise:ctu:{id}:edge"), (0, 0))
+        return h
+
+    def alloc_ctd(self, id: str, pv: int) -> int:
+        h = self._ctd.get(id)
+        if h is None:
+            h = self._ctd[id] = self.state.alloc((f"ctd:{id}:cv", f"edge:rise:ctd:{id}:edge"), (pv, 0))
+        return h
+
+    def ton_group(self, ids: list[str], pt_ms: list[int]) -> TonGroup:
+        return TonGroup(self, ids, pt_ms)
+
+    def edge_rise_at(self, h: int, signal: bool) -> bool:
+        slots = self.slots
+        prev = slots[h]
+        slots[h] = 1 if signal else 0
+        return not prev and bool(signal)
+
+    def edge_fall_at(self, h: int, signal: bool) -> bool:
+        slots = self.slots
+        prev = slots[h]
+        slots[h] = 1 if signal else 0
+        return bool(prev) and not signal
+
+    def ton_at(self, h: int, in_signal: bool, pt_ms: int) -> bool:
+        slots = self.slots
         if in_signal:
-            et += self.delta_provider()
-            self.state.set(key, et)
+            et = slots[h] + self.delta_provider()
+            slots[h] = et
             return et >= pt_ms
-        self.state.set(key, 0)
+        slots[h] = 0
         return False
 
-    def tof(self, id: str, in_signal: bool, pt_ms: int) -> bool:
-        key = f"tof:{id}:et"
+    def tof_at(self, h: int, in_signal: bool, pt_ms: int) -> bool:
+        slots = self.slots
         if in_signal:
-            self.state.set(key, 0)
+            slots[h] = 0
             return True
-        et = int(self.state.get(key, 0)) + self.delta_provider()
-        self.state.set(key, et)
+        et = slots[h] + self.delta_provider()
+        slots[h] = et
         return et < pt_ms
 
-    def tp(self, id: str, in_signal: bool, pt_ms: int) -> bool:
-        rise = self.edge_rise(f"tp:{id}:rise", in_signal)
-        running_key = f"tp:{id}:running"
-        et_key = f"tp:{id}:et"
-        running = bool(self.state.get(running_key, False))
-        et = int(self.state.get(et_key, 0))
+    def tp_at(self, h: int, in_signal: bool, pt_ms: int) -> bool:
+        slots = self.slots
+        rise = not slots[h + 2] and bool(in_signal)
+        slots[h + 2] = 1 if in_signal else 0
+        running = slots[h + 1]
+        et = slots[h]
         if rise:
-            running = True
+            running = 1
             et = 0
         if running:
             et += self.delta_provider()
             if et >= pt_ms:
-                running = False
-        self.state.set(running_key, running)
-        self.state.set(et_key, et)
-        return running
+                running = 0
+        slots[h + 1] = running
+        slots[h] = et
+        return bool(running)
 
-    def ctu(self, id: str, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
-        cv_key = f"ctu:{id}:cv"
-        cv = int(self.state.get(cv_key, 0))
-        if reset:
-            cv = 0
-        if self.edge_rise(f"ctu:{id}:edge", in_signal):
+    def ctu_at(self, h: int, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
+        slots = self.slots
+        cv = 0 if reset else slots[h]
+        if not slots[h + 1] and in_signal:
             cv += 1
-        self.state.set(cv_key, cv)
+        slots[h + 1] = 1 if in_signal else 0
+        slots[h] = cv
         return cv >= pv, cv
 
-    def ctd(self, id: str, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
-        cv_key = f"ctd:{id}:cv"
-        cv = int(self.state.get(cv_key, pv))
-        if reset:
-            cv = pv
-        if self.edge_rise(f"ctd:{id}:edge", in_signal):
+    def ctd_at(self, h: int, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
+        slots = self.slots
+        cv = pv if reset else slots[h]
+        if not slots[h + 1] and in_signal:
             cv -= 1
-        self.state.set(cv_key, cv)
+        slots[h + 1] = 1 if in_signal else 0
+        slots[h] = cv
         return cv <= 0, cv
+
+    def edge_rise(self, id: str, signal: bool) -> bool:
+        h = self._rise.get(id)
+        return self.edge_rise_at(self.alloc_edge_rise(id) if h is None else h, signal)
+
+    def edge_fall(self, id: str, signal: bool) -> bool:
+        h = self._fall.get(id)
+        return self.edge_fall_at(self.alloc_edge_fall(id) if h is None else h, signal)
+
+    def ton(self, id: str, in_signal: bool, pt_ms: int) -> bool:
+        h = self._ton.get(id)
+        return self.ton_at(self.alloc_ton(id) if h is None else h, in_signal, pt_ms)
+
+    def tof(self, id: str, in_signal: bool, pt_ms: int) -> bool:
+        h = self._tof.get(id)
+        return self.tof_at(self.alloc_tof(id) if h is None else h, in_signal, pt_ms)
+
+    def tp(self, id: str, in_signal: bool, pt_ms: int) -> bool:
+        h = self._tp.get(id)
+        return self.tp_at(self.alloc_tp(id) if h is None else h, in_signal, pt_ms)
+
+    def ctu(self, id: str, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
+        h = self._ctu.get(id)
+        return self.ctu_at(self.alloc_ctu(id) if h is None else h, in_signal, pv, reset=reset)
+
+    def ctd(self, id: str, in_signal: bool, pv: int, *, reset: bool = False) -> tuple[bool, int]:
+        h = self._ctd.get(id)
+        return self.ctd_at(self.alloc_ctd(id, pv) if h is None else h, in_signal, pv, reset=reset)
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from .scan_engine import Hook
+
+
+class AccessCounter:
+    # Stands in for DeviceMemory during a sampled scan; counts calls and points per device for the
+    # module running on the calling thread (modules of one parallel wave run on different threads).
+    def __init__(self, mem, local: threading.local):
+        self.mem = mem
+        self._local = local
+
+    def __getattr__(self, name):
+        return getattr(self.mem, name)
+
+    def _count(self, kind: str, dev: str, points: int) -> None:
+        counts = getattr(self._local, "counts", None)
+        if counts is not None:
+            entry = counts[kind].get(dev)
+            if entry is None:
+                counts[kind][dev] = [1, points]
+            else:
+                entry[0] += 1
+                entry[1] += points
+
+    def read_bits(self, dev, addr, count, *, source):
+        self._count("reads", dev, count)
+        return self.mem.read_bits(dev, addr, count, source=source)
+
+    def read_words(self, dev, addr, count, *, source):
+        self._count("reads", dev, count)
+        return self.mem.read_words(dev, addr, count, source=source)
+
+    def read_dwords(self, dev, addr, count, *, source):
+        self._count("reads", dev, count)
+        return self.mem.read_dwords(dev, addr, count, source=source)
+
+    def write_bits(self, dev, addr, values, *, source, defer=False):
+        self._count("writes", dev, len(values))
+        self.mem.write_bits(dev, addr, values, source=source, defer=defer)
+
+    def write_words(self, dev, addr, values, *, source, defer=False):
+        self._count("writes", dev, len(values))
+        self.mem.write_words(dev, addr, values, source=source, defer=defer)
+
+    def write_dwords(self, dev, addr, values, *, source, defer=False):
+        self._count("writes", dev, len(values))
+        self.mem.write_dwords(dev, addr, values, source=source, defer=defer)
+
+
+class ScanProfiler(Hook):
+    # Registered on the engine only while enabled, so it costs nothing when off. While on, one scan in
+    # `every` is sampled: modules see an AccessCounter and their time and accesses are attributed by name.
+    def __init__(self, engine, every: int = 100):
+        self.engine = engine
+        self.every = max(1, int(every))
+        self.enabled = False
+        self._sampling = False
+        self._counter = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def start(self, every: int | None = None) -> None:
+        if every is not None:
+            self.every = max(1, int(every))
+        with self._lock:
+            if not self.enabled:
+                self.enabled = True
+                self.engine.register_hook(self)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.enabled:
+                self.enabled = False
+                self.engine.unregister_hook(self)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.sampled_scans = 0
+            self._modules: dict[str, dict] = {}
+
+    def on_scan_begin(self, ctx):
+        self._sampling = ctx.scan_id % self.every == 0
+        if self._sampling:
+            self._counter = AccessCounter(ctx.mem, self._local)
+            ctx.mem = self._counter
+
+    def before_module(self, ctx, module):
+        if self._sampling:
+            self._local.counts = {"reads": {}, "writes": {}}
+            self._local.t0 = time.perf_counter_ns()
+
+    def after_module(self, ctx, module, outcome):
+        if not self._sampling:
+            return
+        counts = getattr(self._local, "counts", None)
+        if counts is None:
+            # Enabled in the middle of this module.
+            return
+        elapsed_us = (time.perf_counter_ns() - self._local.t0) / 1000
+        self._local.counts = None
+        name = getattr(module, "name", module.__class__.__name__)
+        with self._lock:
+            stats = self._modules.get(name)
+            if stats is None:
+                stats = self._modules[name] = {"samples": 0, "errors": 0, "total_us": 0.0, "max_us": 0.0, "reads": {}, "writes": {}}
+            stats["samples"] += 1
+            stats["errors"] += outcome == "error"
+            stats["total_us"] += elapsed_us
+            stats["max_us"] = max(stats["max_us"], elapsed_us)
+            for kind in ("reads", "writes"):
+                for dev, (calls, points) in counts[kind].items():
+                    entry = stats[kind].setdefault(dev, {"calls": 0, "points": 0})
+                    entry["calls"] += calls
+                    entry["points"] += points
+
+    def on_scan_end(self, ctx):
+        if self._sampling:
+            self._sampling = False
+            ctx.mem = self._counter.mem
+            with self._lock:
+                self.sampled_scans += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            modules = {}
+            for name, s in self._modules.items():
+                modules[name] = {
+                    "samples": s["samples"],
+                    "errors": s["errors"],
+                    "mean_us": round(s["total_us"] / s["samples"], 1),
+                    "max_us": round(s["max_us"], 1),
+                    "reads": {dev: dict(e) for dev, e in sorted(s["reads"].items())},
+                    "writes": {dev: dict(e) for dev, e in sorted(s["writes"].items())},
+                }
+            return {"enabled": self.enabled, "every": self.every, "sampled_scans": self.sampled_scans, "modules": modules}
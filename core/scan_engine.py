@@ -1,6 +1,11 @@
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
+from .clock import VirtualClock
+from .histogram import Histogram
+from .module_graph import AccessRecorder, ModuleSchedule
 from .plc_parts import PlcParts
 from .state_store import StateStore
 
@@ -11,6 +16,40 @@ class ScanConfig:
     period_ms: int = 10
     on_module_error: str = "CONTINUE"
     on_scan_error_wal: str = "DISCARD_WAL_FOR_SCAN"
+    fast_scans: int = 0
+    fast_until_ms: int = 0
+    overrun_policy: str = "skip"
+    parallel_workers: int = 0
+    learn_scans: int = 0
+
+
+OVERRUN_POLICIES = ("skip", "catch_up", "stretch")
+
+
+@dataclass
+class ScanTiming:
+    # Real-mode scheduler figures, in microseconds.
+    lateness_us: Histogram = field(default_factory=Histogram)
+    execution_us: Histogram = field(default_factory=Histogram)
+    overruns: int = 0
+    skipped: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "lateness_us": self.lateness_us.snapshot(),
+            "execution_us": self.execution_us.snapshot(),
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+        }
+
+
+@dataclass
+class FastRunReport:
+    scans: int
+    virtual_ms: int
+    wall_sec: float
+    scans_per_sec: float
+    speedup: float
 
 
 class Hook:
@@ -27,6 +66,14 @@ class Hook:
         return None
 
 
+HOOK_EVENTS = ("on_scan_begin", "before_module", "after_module", "on_scan_end")
+
+
+def overridden(hook, event: str) -> bool:
+    impl = getattr(type(hook), event, None)
+    return impl is not None and impl is not getattr(Hook, event)
+
+
 class ScanContext:
     def __init__(self, mem, state, plc, scan_id, delta_ms):
         self.mem = mem
@@ -38,82 +85,242 @@ class ScanContext:
 
 class ScanEngine:
     def __init__(self, mem, modules, config: ScanConfig | None = None, logger=None):
-    def __init__(self, mem, modules, config: ScanConfig | None = None):
         self.mem = mem
         self.modules = modules
         self.config = config or ScanConfig()
+        if self.config.overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"unknown overrun policy {self.config.overrun_policy!r}")
         self.state = StateStore()
         self._hooks = []
+        # Bound methods per event, only for hooks that override it; rebuilt on (un)register and swapped
+        # in whole, so a hook added from another thread never changes a tuple mid-iteration.
+        self._on_scan_begin = self._before_module = self._after_module = self._on_scan_end = ()
         self._scan_id = 0
-        self._last_time = time.time()
+        self._last_ns = time.monotonic_ns()
         self._delta_ms = self.config.period_ms
         self._plc = PlcParts(self.state, self._get_delta)
         self._logger = logger
+        self.clock = VirtualClock()
+        self.timing = ScanTiming()
+        self.metrics = mem.metrics
+        self.metrics.attach("scan_lateness_us", self.timing.lateness_us)
+        self.metrics.attach("scan_execution_us", self.timing.execution_us)
+        self._module_metric = {}
+        self._stop = threading.Event()
+        self._schedule = None
+        self._pool = None
+        if self.config.parallel_workers > 0:
+            self._schedule = ModuleSchedule(modules, self.config.learn_scans)
+            self._pool = ThreadPoolExecutor(self.config.parallel_workers, thread_name_prefix="scan-module")
+        # Modules allocate their timer/counter handles here, before the first scan.
+        load_ctx = ScanContext(mem, self.state, self._plc, 0, self.config.period_ms)
+        for module in modules:
+            module.on_load(load_ctx)
 
     def _get_delta(self):
         return self._delta_ms
 
+    def restore_state(self, scan_id: int, state: dict) -> None:
+        self._scan_id = scan_id
+        self.state.restore(state)
+        self.mem.current_scan_id = scan_id
+        self.clock.reset(self.clock.now_ms, scan_id)
+
     def register_hook(self, hook: Hook) -> None:
-        self._hooks.append(hook)
+        self._hooks = self._hooks + [hook]
+        self._index_hooks()
+
+    def unregister_hook(self, hook: Hook) -> None:
+        self._hooks = [h for h in self._hooks if h is not hook]
+        self._index_hooks()
+
+    def _index_hooks(self) -> None:
+        for event in HOOK_EVENTS:
+            setattr(self, f"_{event}", tuple(getattr(h, event) for h in self._hooks if overridden(h, event)))
+
+    def _module_metric_name(self, module) -> str:
+        name = self._module_metric.get(module)
+        if name is None:
+            name = self._module_metric[module] = f'module_us{{module="{getattr(module, "name", module.__class__.__name__)}"}}'
+        return name
+
+    def _run_module(self, ctx, module, module_ctx=None) -> bool:
+        for before in self._before_module:
+            before(ctx, module)
+        outcome = "ok"
+        if self._logger:
+            self._logger.debug("before_module scan_id=%s module=%s", self._scan_id, getattr(module, "name", module.__class__.__name__))
+        module_t0 = time.perf_counter_ns()
+        try:
+            module.execute(module_ctx or ctx)
+        except Exception:
+            outcome = "error"
+            if self.config.on_module_error == "STOP":
+                raise
+        finally:
+            self.metrics.observe(self._module_metric_name(module), (time.perf_counter_ns() - module_t0) // 1000)
+            if self._logger:
+                self._logger.debug("after_module scan_id=%s module=%s outcome=%s", self._scan_id, getattr(module, "name", module.__class__.__name__), outcome)
+            for after in self._after_module:
+                after(ctx, module, outcome)
+        return outcome == "error"
+
+    def _run_modules(self, ctx) -> bool:
+        schedule = self._schedule
+        if schedule is None:
+            scan_failed = False
+            for module in self.modules:
+                scan_failed |= self._run_module(ctx, module)
+            return scan_failed
+        # Waves run one after another; modules inside a wave share no conflicting range, so any
+        # interleaving gives the sequential result. A STOP error surfaces once its wave has finished.
+        scan_failed = False
+        recorders = {}
+        for wave in schedule.waves:
+            jobs = []
+            for i in wave:
+                module_ctx = None
+                if schedule.recording(i):
+                    recorders[i] = AccessRecorder(self.mem)
+                    module_ctx = ScanContext(recorders[i], self.state, self._plc, ctx.scan_id, ctx.delta_ms)
+                jobs.append((self.modules[i], module_ctx))
+            if len(jobs) == 1:
+                scan_failed |= self._run_module(ctx, *jobs[0])
+                continue
+            futures = [self._pool.submit(self._run_module, ctx, module, module_ctx) for module, module_ctx in jobs]
+            for f in futures:
+                f.exception()
+            for f in futures:
+                scan_failed |= f.result()
+        if recorders:
+            violations = schedule.observe(recorders)
+            if violations:
+                self.metrics.inc("parallel_schedule_violations_total", violations)
+                if self._logger:
+                    self._logger.debug("parallel_schedule_widened scan_id=%s waves=%s", self._scan_id, len(schedule.waves))
+        return scan_failed
 
     def _run_one(self):
-        now = time.time()
-        self._delta_ms = max(1, int((now - self._last_time) * 1000)) if self.config.mode != "step" else self.config.period_ms
-        self._last_time = now
+        scan_t0 = time.perf_counter_ns()
+        if self.config.mode in ("step", "fast"):
+            self._delta_ms = self.config.period_ms
+        else:
+            # Whole ms only; the sub-ms remainder stays in _last_ns so PLC time does not drift.
+            self._delta_ms = max(1, (time.monotonic_ns() - self._last_ns) // 1_000_000)
+            self._last_ns += self._delta_ms * 1_000_000
         self._scan_id += 1
         self.mem.begin_scan(self._scan_id, self._delta_ms)
         if self._logger:
             self._logger.debug("scan_begin scan_id=%s delta_ms=%s mode=%s", self._scan_id, self._delta_ms, self.config.mode)
         ctx = ScanContext(self.mem, self.state, self._plc, self._scan_id, self._delta_ms)
-        for hook in self._hooks:
-            hook.on_scan_begin(ctx)
+        for begin in self._on_scan_begin:
+            begin(ctx)
 
-        scan_failed = False
-        for module in self.modules:
-            for hook in self._hooks:
-                hook.before_module(ctx, module)
-            outcome = "ok"
-            if self._logger:
-                self._logger.debug("before_module scan_id=%s module=%s", self._scan_id, getattr(module, "name", module.__class__.__name__))
-            try:
-                module.execute(ctx)
-            except Exception:
-                outcome = "error"
-                scan_failed = True
-                if self.config.on_module_error == "STOP":
-                    raise
-            finally:
-                if self._logger:
-                    self._logger.debug("after_module scan_id=%s module=%s outcome=%s", self._scan_id, getattr(module, "name", module.__class__.__name__), outcome)
-                for hook in self._hooks:
-                    hook.after_module(ctx, module, outcome)
+        scan_failed = self._run_modules(ctx)
 
         if scan_failed and self.config.on_scan_error_wal == "DISCARD_WAL_FOR_SCAN":
             if self._logger:
                 self._logger.debug("scan_error_wal_policy=discard scan_id=%s", self._scan_id)
-            self.mem.wal.discard_scan(self._scan_id)
+            self.mem.discard_scan(self._scan_id)
         wal_before = self.mem.wal.size()
         self.mem.apply_wal("scan_end", self._scan_id)
+        self.mem.wal.commit(self._scan_id)
         wal_after = self.mem.wal.size()
-        for hook in self._hooks:
-            hook.on_scan_end(ctx)
+        for end in self._on_scan_end:
+            end(ctx)
         self.mem.end_scan(self._scan_id)
+        self.clock.advance(self._delta_ms, self._scan_id)
+        metrics = self.metrics
+        metrics.observe("scan_us", (time.perf_counter_ns() - scan_t0) // 1000)
+        metrics.inc("scans_total")
+        if scan_failed:
+            metrics.inc("scan_errors_total")
+        metrics.set_gauge("wal_depth", wal_after)
         if self._logger:
             self._logger.debug("scan_end scan_id=%s scan_failed=%s wal_entries_before=%s wal_entries_after=%s", self._scan_id, scan_failed, wal_before, wal_after)
-            self.mem.wal.discard_scan(self._scan_id)
-        self.mem.apply_wal("scan_end", self._scan_id)
-        for hook in self._hooks:
-            hook.on_scan_end(ctx)
-        self.mem.end_scan(self._scan_id)
 
     def step(self) -> None:
         self._run_one()
 
-    def run_forever(self) -> None:
-        while True:
-            t0 = time.time()
+    def run_fast(self, scans: int | None = None, until_ms: int | None = None) -> FastRunReport:
+        # Back-to-back scans with a fixed period_ms delta, so timers see the same PLC time as in real mode.
+        if scans is None and until_ms is None:
+            raise ValueError("run_fast needs scans and/or until_ms")
+        start_ms = self.clock.now_ms
+        done = 0
+        t0 = time.perf_counter()
+        while (scans is None or done < scans) and (until_ms is None or self.clock.now_ms < until_ms):
             self._run_one()
-            if self.config.mode == "real":
-                elapsed = (time.time() - t0) * 1000
-                wait_ms = max(0, self.config.period_ms - elapsed)
-                time.sleep(wait_ms / 1000)
+            done += 1
+        wall = time.perf_counter() - t0
+        virtual_ms = self.clock.now_ms - start_ms
+        return FastRunReport(
+            scans=done,
+            virtual_ms=virtual_ms,
+            wall_sec=round(wall, 6),
+            scans_per_sec=round(done / wall, 1) if wall > 0 else 0.0,
+            speedup=round(virtual_ms / 1000 / wall, 1) if wall > 0 else 0.0,
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        unload_ctx = ScanContext(self.mem, self.state, self._plc, self._scan_id, self._delta_ms)
+        for module in self.modules:
+            module.on_unload(unload_ctx)
+        if self._pool is not None:
+            self._pool.shutdown()
+        close = getattr(self._logger, "close", None)
+        if close is not None:
+            close()
+
+    def _next_deadline(self, deadline: int, end: int, period: int) -> int:
+        deadline += period
+        if end <= deadline:
+            return deadline
+        self.timing.overruns += 1
+        self.metrics.inc("scan_overruns_total")
+        policy = self.config.overrun_policy
+        if policy == "catch_up":
+            # Missed slots run back to back until the schedule is met again.
+            return deadline
+        if policy == "stretch":
+            # The late scan becomes the new phase; following scans keep the full period.
+            return end
+        missed = (end - deadline) // period + 1
+        self.timing.skipped += missed
+        self.metrics.inc("scan_skipped_total", missed)
+        return deadline + missed * period
+
+    def start_schedule(self) -> int:
+        # First real-mode deadline is now; PLC time starts one period back so scan 1 sees a full delta.
+        deadline = time.monotonic_ns()
+        self._last_ns = deadline - self.config.period_ms * 1_000_000
+        return deadline
+
+    def run_due(self, deadline: int, now: int) -> int:
+        # Runs the scan scheduled for deadline (now >= deadline) and returns the next deadline.
+        if self.config.mode != "real":
+            self._run_one()
+            return time.monotonic_ns()
+        self.timing.lateness_us.record((now - deadline) // 1000)
+        self._run_one()
+        end = time.monotonic_ns()
+        self.timing.execution_us.record((end - now) // 1000)
+        return self._next_deadline(deadline, end, self.config.period_ms * 1_000_000)
+
+    def run_forever(self) -> None:
+        self._stop.clear()
+        if self.config.mode != "real":
+            while not self._stop.is_set():
+                self._run_one()
+            return
+        # Absolute deadlines on the monotonic clock: a slow scan or sleep overshoot does not shift later scans.
+        deadline = self.start_schedule()
+        while not self._stop.is_set():
+            now = time.monotonic_ns()
+            if now < deadline:
+                time.sleep((deadline - now) / 1e9)
+                now = time.monotonic_ns()
+            deadline = self.run_due(deadline, now)
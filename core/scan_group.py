@@ -0,0 +1,31 @@
+import heapq
+import threading
+import time
+
+
+class ScanGroup:
+    # Many engines on one thread: a heap of absolute deadlines, earliest first. Each engine keeps its own
+    # period and overrun policy; a slow instance delays the others only by its own scan time.
+    def __init__(self, engines: list):
+        self.engines = engines
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        self._stop.clear()
+        heap = [(engine.start_schedule(), i) for i, engine in enumerate(self.engines)]
+        heapq.heapify(heap)
+        while heap and not self._stop.is_set():
+            deadline, i = heap[0]
+            now = time.monotonic_ns()
+            if now < deadline:
+                # Short sleeps so stop() is honoured promptly even with long periods.
+                self._stop.wait(min(deadline - now, 50_000_000) / 1e9)
+                continue
+            heapq.heapreplace(heap, (self.engines[i].run_due(deadline, now), i))
+
+    def close(self) -> None:
+        for engine in self.engines:
+            engine.close()
@@ -0,0 +1,308 @@
+import mmap
+import struct
+import sys
+import threading
+import time
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+from .memory_bank import PAGE_SHIFT, PAGE_SIZE, SPACE_ITEMSIZE, SPACE_TYPECODES, ArrayBank
+
+# Segment layout, version 1. All integers native byte order (the endian byte says which); the segment
+# is only ever shared between processes on one host.
+#
+#   header, 64 bytes
+#     0   4s  magic b"KVSM"
+#     4   H   layout version (1)
+#     6   B   endian: 1 little, 2 big
+#     7   x   pad
+#     8   Q   epoch: odd while the simulator is writing any bank, even when stable
+#     16  Q   scan_id of the last completed scan
+#     24  I   bank count N
+#     28  I   directory offset (64)
+#     32  I   data offset (first bank)
+#     36  28x reserved
+#   directory, N entries of 32 bytes
+#     0   8s  device name, ASCII, NUL padded
+#     8   B   space: 0 bit, 1 word, 2 dword
+#     9   B   item size in bytes (bit points take one byte each)
+#     10  2x  pad
+#     12  I   first address
+#     16  I   point count
+#     20  4x  pad
+#     24  Q   byte offset of the bank from the start of the segment (64-byte aligned)
+#   bank data, in directory order
+#
+# Readers copy epoch, read, then copy epoch again: the read is consistent when both copies are equal
+# and even. The simulator keeps the epoch odd across a whole WAL apply, so a snapshot never sees
+# half of a scan's deferred writes.
+
+MAGIC = b"KVSM"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("=4sHBxQQIII28x")
+ENTRY = struct.Struct("=8sBB2xII4xQ")
+U64 = struct.Struct("=Q")
+EPOCH_OFFSET = 8
+SCAN_ID_OFFSET = 16
+SPACE_CODES = {"bit": 0, "word": 1, "dword": 2}
+SPACE_NAMES = {code: space for space, code in SPACE_CODES.items()}
+ALIGN = 64
+NUMPY_DTYPES = {"bit": "u1", "word": "u2", "dword": "u4"}
+
+# Segments created by this process; their resource tracker entry belongs to the owner.
+_owned: set[str] = set()
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) & ~(ALIGN - 1)
+
+
+def segment_layout(banks: list[tuple[str, str, int, int]]) -> tuple[int, list[int]]:
+    # banks: (dev, space, base, count) -> total size and the offset of each bank.
+    offset = _align(HEADER.size + ENTRY.size * len(banks))
+    offsets = []
+    for _, space, _, count in banks:
+        offsets.append(offset)
+        offset = _align(offset + count * SPACE_ITEMSIZE[space])
+    return offset, offsets
+
+
+class SharedArrayBank(ArrayBank):
+    # ArrayBank over a typed memoryview into the segment instead of a private array.
+    def __init__(self, space: str, min_address: int, max_address: int, view: memoryview, default_value: int = 0):
+        self.space = space
+        self.base = min_address
+        self.size = max_address - min_address + 1
+        self.typecode = SPACE_TYPECODES[space]
+        self.default_value = default_value
+        self.data = view.cast(self.typecode)
+        if default_value:
+            self.data[:] = array(self.typecode, [default_value]) * self.size
+        self.dirty = None
+
+    def read_bytes(self, addr: int, count: int) -> bytes:
+        start = addr - self.base
+        chunk = array(self.typecode, self.data[start : start + count].tobytes())
+        if sys.byteorder != "little":
+            chunk.byteswap()
+        return chunk.tobytes()
+
+    def sync_to(self, other: ArrayBank) -> int:
+        src, dst, typecode = self.data, other.data, self.typecode
+        for page in self.dirty:
+            lo = page << PAGE_SHIFT
+            dst[lo : lo + PAGE_SIZE] = array(typecode, src[lo : lo + PAGE_SIZE].tobytes())
+        synced = len(self.dirty)
+        self.dirty.clear()
+        return synced
+
+    def copy(self) -> ArrayBank:
+        # IO images stay private to the simulator process.
+        other = ArrayBank.__new__(ArrayBank)
+        other.__dict__.update(self.__dict__)
+        other.data = array(self.typecode, self.data.tobytes())
+        other.dirty = None
+        return other
+
+
+class SharedSegment:
+    # Owner side: creates the segment, lays out one SharedArrayBank per (dev, space) and maintains the epoch.
+    def __init__(self, profile, storage: str, name: str = "", path: str = ""):
+        specs = []
+        for dev, model in profile.devices.items():
+            for space in model.supported_spaces:
+                bounds = model.ranges.get(space)
+                if bounds:
+                    base = int(bounds["min_address"])
+                    specs.append((dev, space, base, int(bounds["max_address"]) - base + 1, model.default_value))
+        size, offsets = segment_layout([spec[:4] for spec in specs])
+        self.storage = storage
+        self._shm = None
+        self._mmap = None
+        if storage == "shm":
+            self._shm = shared_memory.SharedMemory(name=name or None, create=True, size=size)
+            self.name = self._shm.name
+            self.buf = self._shm.buf
+            _owned.add(self.name)
+        elif storage == "mmap":
+            if not path:
+                raise ValueError("mmap storage needs memory.shared_path")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w+b") as f:
+                f.truncate(size)
+                self._mmap = mmap.mmap(f.fileno(), size)
+            self.name = path
+            self.buf = memoryview(self._mmap)
+        else:
+            raise ValueError(f"unknown shared storage {storage!r}")
+        self.buf[:size] = bytes(size)
+        HEADER.pack_into(
+            self.buf,
+            0,
+            MAGIC,
+            LAYOUT_VERSION,
+            1 if sys.byteorder == "little" else 2,
+            0,
+            0,
+            len(specs),
+            HEADER.size,
+            offsets[0] if offsets else size,
+        )
+        self.banks = {}
+        for i, ((dev, space, base, count, default), offset) in enumerate(zip(specs, offsets)):
+            ENTRY.pack_into(
+                self.buf,
+                HEADER.size + i * ENTRY.size,
+                dev.encode("ascii"),
+                SPACE_CODES[space],
+                SPACE_ITEMSIZE[space],
+                base,
+                count,
+                offset,
+            )
+            view = self.buf[offset : offset + count * SPACE_ITEMSIZE[space]]
+            self.banks[(dev, space)] = SharedArrayBank(space, base, base + count - 1, view, default)
+        self._epoch = 0
+        self._writers = 0
+        self._lock = threading.Lock()
+
+    def begin_write(self) -> None:
+        with self._lock:
+            self._writers += 1
+            if self._writers == 1:
+                self._epoch += 1
+                U64.pack_into(self.buf, EPOCH_OFFSET, self._epoch)
+
+    def end_write(self) -> None:
+        with self._lock:
+            self._writers -= 1
+            if self._writers == 0:
+                self._epoch += 1
+                U64.pack_into(self.buf, EPOCH_OFFSET, self._epoch)
+
+    def publish_scan(self, scan_id: int) -> None:
+        self.begin_write()
+        U64.pack_into(self.buf, SCAN_ID_OFFSET, scan_id)
+        self.end_write()
+
+    def close(self) -> None:
+        # Bank views must go before the buffer they point into can be released.
+        for bank in self.banks.values():
+            bank.data.release()
+        self.banks = {}
+        self.buf.release()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            _owned.discard(self.name)
+        if self._mmap is not None:
+            self._mmap.close()
+
+
+class BankInfo:
+    __slots__ = ("dev", "space", "base", "count", "offset", "nbytes")
+
+    def __init__(self, dev, space, base, count, offset, nbytes):
+        self.dev = dev
+        self.space = space
+        self.base = base
+        self.count = count
+        self.offset = offset
+        self.nbytes = nbytes
+
+
+class SharedBankClient:
+    # Reader side, for other processes. view() hands out live zero-copy memoryviews; read them inside
+    # consistent() (or take snapshot()) to get a state that no simulator write straddles.
+    def __init__(self, name: str = "", path: str = ""):
+        self._shm = None
+        self._mmap = None
+        if path:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buf = memoryview(self._mmap)
+        else:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Before 3.13 attaching registers the segment for unlink at our exit; only the owner may unlink.
+                self._shm = shared_memory.SharedMemory(name=name)
+                if name not in _owned:
+                    resource_tracker.unregister(self._shm._name, "shared_memory")
+            self.buf = self._shm.buf
+        magic, version, endian, _, _, count, dir_offset, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError(f"not a kv-sim bank segment (magic {magic!r}, version {version})")
+        if endian != (1 if sys.byteorder == "little" else 2):
+            raise ValueError("segment was written with a different byte order")
+        self.banks: dict[tuple[str, str], BankInfo] = {}
+        for i in range(count):
+            dev, code, itemsize, base, points, offset = ENTRY.unpack_from(self.buf, dir_offset + i * ENTRY.size)
+            dev = dev.rstrip(b"\x00").decode("ascii")
+            space = SPACE_NAMES[code]
+            self.banks[(dev, space)] = BankInfo(dev, space, base, points, offset, points * itemsize)
+        self._views: dict[tuple[str, str], memoryview] = {}
+
+    def epoch(self) -> int:
+        return U64.unpack_from(self.buf, EPOCH_OFFSET)[0]
+
+    def scan_id(self) -> int:
+        return U64.unpack_from(self.buf, SCAN_ID_OFFSET)[0]
+
+    def view(self, dev: str, space: str) -> memoryview:
+        # Index 0 is the bank's first address (BankInfo.base), not address 0.
+        view = self._views.get((dev, space))
+        if view is None:
+            info = self.banks[(dev, space)]
+            raw = self.buf[info.offset : info.offset + info.nbytes]
+            view = self._views[(dev, space)] = raw.cast(SPACE_TYPECODES[space])
+        return view
+
+    def numpy(self, dev: str, space: str):
+        import numpy as np
+
+        info = self.banks[(dev, space)]
+        return np.frombuffer(self.buf, dtype=NUMPY_DTYPES[space], count=info.count, offset=info.offset)
+
+    def consistent(self, fn, timeout: float = 1.0):
+        # Runs fn() until it completes with no simulator write in progress or in between; returns
+        # (result, scan_id).
+        deadline = time.monotonic() + timeout
+        while True:
+            before = self.epoch()
+            if not before & 1:
+                result = fn()
+                scan_id = self.scan_id()
+                if self.epoch() == before:
+                    return result, scan_id
+            if time.monotonic() > deadline:
+                raise TimeoutError("no stable epoch within timeout")
+            time.sleep(0)
+
+    def snapshot(self, keys=None, out: dict | None = None) -> tuple[dict, int]:
+        # Copies the requested banks (all by default) into out's bytearrays, allocating them on first use;
+        # pass the same dict back in to snapshot repeatedly without allocating.
+        keys = list(self.banks) if keys is None else list(keys)
+        out = {} if out is None else out
+        for key in keys:
+            if key not in out:
+                out[key] = bytearray(self.banks[key].nbytes)
+
+        def copy():
+            for key in keys:
+                info = self.banks[key]
+                out[key][:] = self.buf[info.offset : info.offset + info.nbytes]
+
+        _, scan_id = self.consistent(copy)
+        return out, scan_id
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self.buf.release()
+        if self._shm is not None:
+            self._shm.close()
+        if self._mmap is not None:
+            self._mmap.close()
@@ -1,7 +1,17 @@
 import logging
+import os
+import struct
+import sys
+import threading
+import time
+import traceback
+from collections import deque
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
+LOG_MODES = ("sync", "async")
+TRACE_FORMATS = ("text", "binary")
+
 
 class NullLogger:
     def debug(self, *args, **kwargs):
@@ -16,6 +26,292 @@ class NullLogger:
     def error(self, *args, **kwargs):
         return None
 
+    def close(self):
+        return None
+
+
+# Binary trace: b"KVTR\x01", then records
+#   0x01 define  u16 id | u16 len | format string (utf-8)      (once per format per file)
+#   0x02 event   u64 time_ns | u8 level | u16 id | u8 argc | argc type tags | arg values
+#   0x03 dropped u64 time_ns | u32 count
+# Tags: b"i" i64, b"b" u8 bool, b"f" f64, b"s" u16 len + utf-8. Every rotated file is self-contained.
+TRACE_MAGIC = b"KVTR\x01"
+_DEFINE = struct.Struct("<BHH")
+_EVENT = struct.Struct("<BQBHB")
+_DROPPED = struct.Struct("<BQI")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U16 = struct.Struct("<H")
+_BOOL = struct.Struct("<?")
+
+
+_PACKERS: dict[tuple, tuple[bytes, struct.Struct] | None] = {}
+_PACKED_TYPES = {int: (b"i", "q"), bool: (b"b", "?")}
+
+
+def _packer(types: tuple) -> tuple[bytes, struct.Struct] | None:
+    if not all(t in _PACKED_TYPES for t in types):
+        return None
+    return b"".join(_PACKED_TYPES[t][0] for t in types), struct.Struct("<" + "".join(_PACKED_TYPES[t][1] for t in types))
+
+
+def _encode_args(args: tuple) -> bytes:
+    # Scan records carry ints (and the odd bool) almost exclusively: a Struct cached per argument type
+    # signature packs them all in a single call. bool keeps its own tag so it prints as False/True.
+    types = tuple(map(type, args))
+    try:
+        packer = _PACKERS[types]
+    except KeyError:
+        packer = _PACKERS[types] = _packer(types)
+    if packer is not None:
+        try:
+            return packer[0] + packer[1].pack(*args)
+        except struct.error:
+            pass
+    tags = []
+    values = []
+    for arg in args:
+        if isinstance(arg, bool):
+            tags.append(b"b")
+            values.append(_BOOL.pack(arg))
+        elif isinstance(arg, int) and -(2**63) <= arg < 2**63:
+            tags.append(b"i")
+            values.append(_I64.pack(arg))
+        elif isinstance(arg, float):
+            tags.append(b"f")
+            values.append(_F64.pack(arg))
+        else:
+            raw = str(arg).encode("utf-8")[:65535]
+            tags.append(b"s")
+            values.append(_U16.pack(len(raw)) + raw)
+    return b"".join(tags) + b"".join(values)
+
+
+class _RotatingFile:
+    # Same naming and rollover as RotatingFileHandler (path, path.1 .. path.N), for bytes written in batches.
+    header = b""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._open()
+
+    def _open(self):
+        self._fp = open(self.path, "ab")
+        if self._fp.tell() == 0:
+            self._fp.write(self.header)
+
+    def _rotate(self):
+        self._fp.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
+
+    def _make_room(self, size: int) -> None:
+        pos = self._fp.tell()
+        if self.max_bytes and pos + size > self.max_bytes and pos > len(self.header):
+            self._rotate()
+
+    def flush(self):
+        self._fp.flush()
+
+    def close(self):
+        self._fp.close()
+
+
+class _TextLogFile(_RotatingFile):
+    # Lines match the sync handler's "%(asctime)s %(levelname)s %(message)s" without building LogRecords.
+    def __init__(self, path: Path, max_bytes: int, backup_count: int):
+        super().__init__(path, max_bytes, backup_count)
+        self._sec = None
+        self._stamp = ""
+
+    def event(self, time_ns: int, level: int, fmt: str, args: tuple):
+        sec, rem = divmod(time_ns, 1_000_000_000)
+        if sec != self._sec:
+            self._sec = sec
+            self._stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        line = f"{self._stamp},{rem // 1_000_000:03d} {logging.getLevelName(level)} {fmt % args}\n".encode("utf-8")
+        self._make_room(len(line))
+        self._fp.write(line)
+
+    def dropped(self, time_ns: int, count: int):
+        self.event(time_ns, logging.WARNING, "log_dropped count=%s", (count,))
+
+
+class _BinaryTraceFile(_RotatingFile):
+    header = TRACE_MAGIC
+
+    def _open(self):
+        super()._open()
+        self._ids: dict[str, int] = {}
+
+    def event(self, time_ns: int, level: int, fmt: str, args: tuple):
+        body = _encode_args(args)
+        raw = None
+        size = _EVENT.size + len(body)
+        if fmt not in self._ids:
+            raw = fmt.encode("utf-8")
+            size += _DEFINE.size + len(raw)
+        self._make_room(size)
+        fmt_id = self._ids.get(fmt)
+        if fmt_id is None:
+            raw = raw if raw is not None else fmt.encode("utf-8")
+            fmt_id = self._ids[fmt] = len(self._ids)
+            self._fp.write(_DEFINE.pack(1, fmt_id, len(raw)) + raw)
+        self._fp.write(_EVENT.pack(2, time_ns, level, fmt_id, len(args)) + body)
+
+    def dropped(self, time_ns: int, count: int):
+        self._make_room(_DROPPED.size)
+        self._fp.write(_DROPPED.pack(3, time_ns, count))
+
+
+def read_trace(path):
+    # Yields (time_ns, levelno, message) from one binary trace file.
+    data = Path(path).read_bytes()
+    if not data.startswith(TRACE_MAGIC):
+        raise ValueError(f"{path}: not a binary scan trace")
+    pos = len(TRACE_MAGIC)
+    formats: dict[int, str] = {}
+    while pos < len(data):
+        tag = data[pos]
+        if tag == 1:
+            _, fmt_id, length = _DEFINE.unpack_from(data, pos)
+            pos += _DEFINE.size
+            formats[fmt_id] = data[pos : pos + length].decode("utf-8")
+            pos += length
+        elif tag == 2:
+            _, time_ns, level, fmt_id, argc = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            tags = data[pos : pos + argc]
+            pos += argc
+            args = []
+            for kind in tags:
+                if kind == 0x69:  # b"i"
+                    args.append(_I64.unpack_from(data, pos)[0])
+                    pos += _I64.size
+                elif kind == 0x62:  # b"b"
+                    args.append(_BOOL.unpack_from(data, pos)[0])
+                    pos += _BOOL.size
+                elif kind == 0x66:  # b"f"
+                    args.append(_F64.unpack_from(data, pos)[0])
+                    pos += _F64.size
+                else:
+                    (length,) = _U16.unpack_from(data, pos)
+                    pos += _U16.size
+                    args.append(data[pos : pos + length].decode("utf-8"))
+                    pos += length
+            yield time_ns, level, formats[fmt_id] % tuple(args)
+        elif tag == 3:
+            _, time_ns, count = _DROPPED.unpack_from(data, pos)
+            pos += _DROPPED.size
+            yield time_ns, logging.WARNING, f"log_dropped count={count}"
+        else:
+            raise ValueError(f"{path}: bad trace record tag {tag} at offset {pos}")
+
+
+def trace_to_text(path) -> list[str]:
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+    lines = []
+    for time_ns, level, message in read_trace(path):
+        record = logging.LogRecord("kvsim.scan", level, "", 0, message, None, None)
+        record.created = time_ns / 1e9
+        record.msecs = (time_ns // 1_000_000) % 1000
+        lines.append(formatter.format(record))
+    return lines
+
+
+class AsyncScanLogger:
+    # The scan thread only appends (time_ns, level, fmt, args) to a bounded ring; formatting and file I/O
+    # happen on a background writer. A full ring drops the record and counts it instead of blocking.
+    def __init__(self, sink, capacity: int = 65536, flush_ms: int = 50):
+        self._sink = sink
+        self.capacity = capacity
+        self.flush_ms = flush_ms
+        self.dropped = 0
+        self.errors = 0
+        self._reported_drops = 0
+        self._ring: deque = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="scan-log-writer", daemon=True)
+        self._thread.start()
+
+    def _log(self, level: int, fmt: str, args: tuple):
+        ring = self._ring
+        if len(ring) >= self.capacity:
+            self.dropped += 1
+            return
+        ring.append((time.time_ns(), level, fmt, args))
+
+    def debug(self, fmt, *args, **kwargs):
+        self._log(logging.DEBUG, fmt, args)
+
+    def info(self, fmt, *args, **kwargs):
+        self._log(logging.INFO, fmt, args)
+
+    def warning(self, fmt, *args, **kwargs):
+        self._log(logging.WARNING, fmt, args)
+
+    def error(self, fmt, *args, **kwargs):
+        self._log(logging.ERROR, fmt, args)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while (self._ring or self._wake.is_set()) and self._thread.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def close(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._sink.close()
+
+    def _error(self, what: str) -> None:
+        # Like logging.Handler.handleError, but only the first failure is printed: a full disk would
+        # otherwise repeat it for every record. The writer keeps going; later records may succeed.
+        self.errors += 1
+        if self.errors == 1:
+            print(f"--- Scan log error ({what}) ---", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+
+    def _drain(self):
+        ring = self._ring
+        sink = self._sink
+        while ring:
+            record = ring.popleft()
+            try:
+                sink.event(*record)
+            except Exception:
+                self._error(f"format {record[2]!r}")
+        if self.dropped != self._reported_drops:
+            try:
+                sink.dropped(time.time_ns(), self.dropped - self._reported_drops)
+            except Exception:
+                self._error("dropped")
+            self._reported_drops = self.dropped
+        try:
+            sink.flush()
+        except Exception:
+            self._error("flush")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_ms / 1000)
+            stopping = self._stopping
+            self._drain()
+            self._wake.clear()
+            if stopping:
+                return
+
 
 def build_scan_logger(sim_cfg: dict, logging_cfg: dict | None):
     log_level = str(sim_cfg.get("log_level", "INFO")).upper()
@@ -26,8 +322,21 @@ def build_scan_logger(sim_cfg: dict, logging_cfg: dict | None):
     path = Path(cfg.get("file_path", "logs/simulator_debug.log"))
     max_bytes = int(cfg.get("max_bytes", 1024 * 1024))
     backup_count = int(cfg.get("backup_count", 5))
+    mode = cfg.get("mode", "sync")
+    fmt = cfg.get("format", "text")
+    if mode not in LOG_MODES:
+        raise ValueError(f"unknown logging mode {mode!r}")
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"unknown logging format {fmt!r}")
+    if fmt == "binary" and mode != "async":
+        raise ValueError("binary trace format requires logging mode async")
 
     path.parent.mkdir(parents=True, exist_ok=True)
+    capacity = int(cfg.get("buffer_records", 65536))
+    flush_ms = int(cfg.get("flush_ms", 50))
+    if mode == "async":
+        sink_type = _BinaryTraceFile if fmt == "binary" else _TextLogFile
+        return AsyncScanLogger(sink_type(path, max_bytes, backup_count), capacity, flush_ms)
 
     logger = logging.getLogger("kvsim.scan")
     logger.setLevel(logging.DEBUG)
@@ -43,3 +352,9 @@ def build_scan_logger(sim_cfg: dict, logging_cfg: dict | None):
     handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
     logger.addHandler(handler)
     return logger
+
+
+if __name__ == "__main__":
+    # python -m core.sim_logger <trace file>: print a binary trace as text log lines.
+    for line in trace_to_text(sys.argv[1]):
+        print(line)
@@ -1,14 +1,59 @@
+import threading
+from array import array
+
+
 class StateStore:
     def __init__(self):
         self._state = {}
+        # Instruction state lives in one typed array; _slot_of maps the legacy string key to its index.
+        self.slots = array("q")
+        self._defaults = array("q")
+        self._slot_of: dict[str, int] = {}
+        self._alloc_lock = threading.Lock()
+
+    def alloc(self, keys: tuple[str, ...], defaults: tuple[int, ...]) -> int:
+        # Contiguous slots for one instruction's keys; returns the first index. Idempotent per key set.
+        with self._alloc_lock:
+            base = self._slot_of.get(keys[0])
+            if base is not None:
+                return base
+            base = len(self.slots)
+            for i, (key, default) in enumerate(zip(keys, defaults)):
+                self._slot_of[key] = base + i
+                self.slots.append(int(self._state.pop(key, default)))
+                self._defaults.append(default)
+            return base
 
     def get(self, key, default=None):
+        idx = self._slot_of.get(key)
+        if idx is not None:
+            return self.slots[idx]
         return self._state.get(key, default)
 
     def set(self, key, val):
-        self._state[key] = val
+        idx = self._slot_of.get(key)
+        if idx is not None:
+            self.slots[idx] = int(val)
+        else:
+            self._state[key] = val
 
     def reset_scope(self, prefix: str):
         keys = [k for k in self._state if str(k).startswith(prefix)]
         for key in keys:
             del self._state[key]
+        for key, idx in self._slot_of.items():
+            if key.startswith(prefix):
+                self.slots[idx] = self._defaults[idx]
+
+    def snapshot(self) -> dict:
+        out = dict(self._state)
+        slots = self.slots
+        out.update((key, slots[idx]) for key, idx in self._slot_of.items())
+        return out
+
+    def restore(self, state: dict) -> None:
+        # Slot indices stay valid: handles already given out keep pointing at the same instruction.
+        self.slots[:] = self._defaults
+        self._state = {}
+        for key, val in state.items():
+            self.set(key, val)
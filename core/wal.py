@@ -1,5 +1,8 @@
+from collections import OrderedDict, deque
 from dataclasses import asdict, dataclass
+import heapq
 import json
+import threading
 import time
 
 
@@ -18,38 +21,186 @@ class WalEntry:
     result: str = "accepted"
 
 
+class WriteCoalescer:
+    # Per-(dev, space) merge of pending writes: fed in seq order, so the last writer wins per point,
+    # and runs() yields one write per contiguous run of touched points.
+    def __init__(self):
+        self._single: dict[tuple[str, str], tuple[int, list[int]]] = {}
+        self._points: dict[tuple[str, str], dict[int, int]] = {}
+
+    def add(self, dev: str, space: str, addr: int, values: list[int]) -> None:
+        key = (dev, space)
+        points = self._points.get(key)
+        if points is None:
+            first = self._single.pop(key, None)
+            if first is None:
+                # The common case of one write per device needs no per-point merge.
+                self._single[key] = (addr, values)
+                return
+            points = self._points[key] = dict(zip(range(first[0], first[0] + len(first[1])), first[1]))
+        if len(values) == 1:
+            points[addr] = values[0]
+        else:
+            points.update(zip(range(addr, addr + len(values)), values))
+
+    def runs(self):
+        for (dev, space), (addr, values) in self._single.items():
+            yield dev, space, addr, values
+        for (dev, space), points in self._points.items():
+            addrs = sorted(points)
+            start = prev = addrs[0]
+            values = [points[start]]
+            for addr in addrs[1:]:
+                if addr != prev + 1:
+                    yield dev, space, start, values
+                    start, values = addr, []
+                values.append(points[addr])
+                prev = addr
+            yield dev, space, start, values
+
+
 class WalStore:
-    def __init__(self, max_entries: int = 100000):
+    def __init__(self, max_entries: int = 100000, sink=None):
         self.max_entries = max_entries
+        self.sink = sink
+        self._sink_dirty = False
         self._seq = 0
-        self._entries: list[WalEntry] = []
+        # seq -> entry in seq order; popping from the front is the retention ring.
+        self._entries: OrderedDict[int, WalEntry] = OrderedDict()
+        # Secondary indexes hold references only, in seq order; entries no longer in _entries are skipped
+        # lazily, and trimmed from the front when the retention ring drops one (see _trim).
+        self._by_target: dict[int, deque[WalEntry]] = {}
+        self._by_scan: dict[int, dict[str, deque[WalEntry]]] = {}
+        self._scan_live: dict[int, int] = {}
+        self._lock = threading.Lock()
 
     def append(self, entry: WalEntry) -> int:
-        self._seq += 1
-        entry.seq = self._seq
-        if entry.time_ms == 0:
-            entry.time_ms = int(time.time() * 1000)
-        self._entries.append(entry)
-        if len(self._entries) > self.max_entries:
-            self._entries = self._entries[-self.max_entries :]
-        return entry.seq
+        with self._lock:
+            seq = self._seq + 1
+            entry.seq = seq
+            if entry.time_ms == 0:
+                entry.time_ms = int(time.time() * 1000)
+            # Handed to the sink first: an entry it refuses is not stored and its seq is not used.
+            if self.sink is not None:
+                self.sink.write_entry(entry)
+                self._sink_dirty = True
+            self._seq = seq
+            self._entries[seq] = entry
+            self._by_target.setdefault(entry.target_scan_id, deque()).append(entry)
+            self._by_scan.setdefault(entry.scan_id, {}).setdefault(entry.source, deque()).append(entry)
+            self._scan_live[entry.scan_id] = self._scan_live.get(entry.scan_id, 0) + 1
+            if len(self._entries) > self.max_entries:
+                _, dropped = self._entries.popitem(last=False)
+                self._release(dropped)
+                self._trim(dropped)
+            return seq
+
+    def record(self, entry: WalEntry) -> int:
+        # Audit-only entries (writes applied immediately) go to the sink, not the pending store.
+        if self.sink is None:
+            return 0
+        with self._lock:
+            entry.seq = self._seq + 1
+            if entry.time_ms == 0:
+                entry.time_ms = int(time.time() * 1000)
+            self.sink.write_entry(entry)
+            self._seq = entry.seq
+            self._sink_dirty = True
+            return entry.seq
+
+    def check_sink(self) -> None:
+        # Raises if the sink can no longer persist entries; called before a write that only logs afterwards.
+        if self.sink is not None:
+            self.sink.check()
+
+    def commit(self, scan_id: int) -> None:
+        # Idle scans with nothing pending do not need a marker.
+        if self.sink is not None and (self._sink_dirty or self._entries):
+            self._sink_dirty = False
+            self.sink.commit(scan_id)
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+
+    def _release(self, entry: WalEntry) -> None:
+        live = self._scan_live[entry.scan_id] - 1
+        if live:
+            self._scan_live[entry.scan_id] = live
+        else:
+            del self._scan_live[entry.scan_id]
+            self._by_scan.pop(entry.scan_id, None)
+
+    def _trim(self, dropped: WalEntry) -> None:
+        # The dropped entry is the oldest live one, so in each of its index lists only dead entries
+        # can precede it; popping dead heads keeps the indexes bounded by max_entries.
+        live = self._entries
+        bucket = self._by_target.get(dropped.target_scan_id)
+        if bucket is not None:
+            while bucket and live.get(bucket[0].seq) is not bucket[0]:
+                bucket.popleft()
+            if not bucket:
+                del self._by_target[dropped.target_scan_id]
+        sources = self._by_scan.get(dropped.scan_id)
+        if sources is not None:
+            entries = sources.get(dropped.source)
+            if entries is not None:
+                while entries and live.get(entries[0].seq) is not entries[0]:
+                    entries.popleft()
+                if not entries:
+                    del sources[dropped.source]
+
+    def _ready_targets(self, scan_id: int) -> list[int]:
+        return sorted(t for t in self._by_target if t <= scan_id)
 
     def iter_ready(self, scan_id: int):
-        for entry in self._entries:
-            if entry.target_scan_id <= scan_id:
+        with self._lock:
+            buckets = [list(self._by_target[t]) for t in self._ready_targets(scan_id)]
+        ordered = buckets[0] if len(buckets) == 1 else heapq.merge(*buckets, key=lambda e: e.seq)
+        live = self._entries
+        for entry in ordered:
+            if live.get(entry.seq) is entry:
                 yield entry
 
     def discard_scan(self, scan_id: int, source_prefix: str = "ladder:") -> None:
-        self._entries = [
-            e for e in self._entries if not (e.scan_id == scan_id and e.source.startswith(source_prefix))
-        ]
+        with self._lock:
+            if self.sink is not None:
+                self.sink.discard(scan_id, source_prefix)
+            sources = self._by_scan.get(scan_id)
+            if not sources:
+                return
+            for source in [s for s in sources if s.startswith(source_prefix)]:
+                for entry in sources.pop(source):
+                    if self._entries.pop(entry.seq, None) is not None:
+                        self._release(entry)
 
     def remove_applied(self, scan_id: int) -> None:
-        self._entries = [e for e in self._entries if e.target_scan_id > scan_id]
+        with self._lock:
+            for target in self._ready_targets(scan_id):
+                for entry in self._by_target.pop(target):
+                    if self._entries.pop(entry.seq, None) is not None:
+                        self._release(entry)
 
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def restore_seq(self, seq: int) -> None:
+        with self._lock:
+            self._seq = max(self._seq, seq)
+
+    def pending(self) -> list[WalEntry]:
+        with self._lock:
+            return list(self._entries.values())
 
     def size(self) -> int:
         return len(self._entries)
 
+    def iter_ndjson(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        for e in entries:
+            yield json.dumps(asdict(e), ensure_ascii=False)
+
     def to_ndjson(self) -> str:
-        return "\n".join(json.dumps(asdict(e), ensure_ascii=False) for e in self._entries)
+        return "\n".join(self.iter_ndjson())
@@ -0,0 +1,185 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from .errors import WalWriteError
+
+SYNC_MODES = ("buffered", "group", "per_write")
+
+_ENTRY = 0
+_COMMIT = 1
+_DISCARD = 2
+_FLUSH = 3
+_STOP = 4
+
+
+def encode_entry(entry) -> str:
+    return json.dumps(vars(entry), ensure_ascii=False)
+
+
+# Append-only NDJSON segments <stem>.<index:08d><suffix>, written from a background thread.
+# WAL entries use the WalStore.to_ndjson() object layout; scan boundaries are
+# {"mark": "commit", "scan_id": ...} and {"mark": "discard", "scan_id": ..., "source_prefix": ...}.
+class WalFileWriter:
+    def __init__(
+        self,
+        file_path: str,
+        sync_mode: str = "buffered",
+        retention_sec: float = 3600,
+        segment_sec: float = 300,
+        max_pending: int = 1_000_000,
+        put_timeout_sec: float = 5.0,
+    ):
+        if sync_mode not in SYNC_MODES:
+            raise ValueError(f"unknown wal sync_mode {sync_mode!r}")
+        path = Path(file_path)
+        self.directory = path.parent
+        self.stem = path.stem
+        self.suffix = path.suffix or ".log"
+        self.sync_mode = sync_mode
+        self.retention_sec = retention_sec
+        self.segment_sec = segment_sec
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Large enough that the scan loop does not normally wait for the disk; a disk that falls
+        # put_timeout_sec behind a full queue is reported as an error instead of growing memory.
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self.put_timeout_sec = put_timeout_sec
+        self._error: BaseException | None = None
+        self._error_lock = threading.Lock()
+        self._fp = None
+        self._segment_started = 0.0
+        self._segment_index = max((index for index, _ in self.segments()), default=0)
+        self._thread = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._thread.start()
+
+    def segments(self) -> list[tuple[int, Path]]:
+        found = []
+        for p in self.directory.glob(f"{self.stem}.*{self.suffix}"):
+            index = p.name[len(self.stem) + 1 : len(p.name) - len(self.suffix)]
+            if index.isdigit():
+                found.append((int(index), p))
+        return sorted(found)
+
+    @property
+    def current_segment(self) -> int:
+        return self._segment_index
+
+    def check(self) -> None:
+        # Raises the writer thread's failure, if any; callers use it before changing state they log.
+        if self._error is not None:
+            raise WalWriteError(f"wal writer failed: {self._error}", {"path": str(self.directory / self.stem)}) from self._error
+
+    def _put(self, item) -> None:
+        self.check()
+        try:
+            self._queue.put(item, timeout=self.put_timeout_sec)
+        except queue.Full:
+            raise WalWriteError("wal writer backlog full", {"pending": self._queue.qsize()}) from None
+
+    def write_entry(self, entry) -> None:
+        self._put((_ENTRY, entry))
+
+    def commit(self, scan_id: int) -> None:
+        self._put((_COMMIT, scan_id))
+
+    def discard(self, scan_id: int, source_prefix: str) -> None:
+        self._put((_DISCARD, (scan_id, source_prefix)))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        done = threading.Event()
+        # Under the lock that _fail takes, so the event is either queued before the failure drains
+        # the queue or the failure is seen here; flush never waits on a dead writer.
+        with self._error_lock:
+            self._put((_FLUSH, done))
+        done.wait(timeout)
+        self.check()
+        return done.is_set()
+
+    def close(self) -> None:
+        if self._thread.is_alive() and self._error is None:
+            self._put((_STOP, None))
+        self._thread.join()
+        self.check()
+
+    def _open_segment(self, now: float) -> None:
+        if self._fp is not None:
+            self._sync()
+            self._fp.close()
+        self._segment_index += 1
+        path = self.directory / f"{self.stem}.{self._segment_index:08d}{self.suffix}"
+        self._fp = open(path, "a", encoding="utf-8")
+        self._segment_started = now
+        self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        for index, p in self.segments():
+            if index == self._segment_index:
+                continue
+            try:
+                if now - p.stat().st_mtime > self.retention_sec:
+                    p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _sync(self) -> None:
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def _write_line(self, line: str) -> None:
+        now = time.time()
+        if self._fp is None or now - self._segment_started >= self.segment_sec:
+            self._open_segment(now)
+        self._fp.write(line)
+        self._fp.write("\n")
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        except Exception as exc:
+            self._fail(exc)
+
+    def _fail(self, exc: Exception) -> None:
+        self._error = exc
+        with self._error_lock:
+            while True:
+                try:
+                    kind, payload = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == _FLUSH:
+                    payload.set()
+        if self._fp is not None:
+            try:
+                self._fp.close()
+            except OSError:
+                pass
+            self._fp = None
+
+    def _loop(self) -> None:
+        get = self._queue.get
+        while True:
+            kind, payload = get()
+            if kind == _ENTRY:
+                self._write_line(encode_entry(payload))
+                if self.sync_mode == "per_write":
+                    self._sync()
+            elif kind == _COMMIT:
+                self._write_line(json.dumps({"mark": "commit", "scan_id": payload, "time_ms": int(time.time() * 1000)}))
+                if self.sync_mode == "group":
+                    self._sync()
+            elif kind == _DISCARD:
+                scan_id, source_prefix = payload
+                self._write_line(json.dumps({"mark": "discard", "scan_id": scan_id, "source_prefix": source_prefix}))
+            elif kind == _FLUSH:
+                if self._fp is not None:
+                    self._sync()
+                payload.set()
+            else:
+                if self._fp is not None:
+                    self._sync()
+                    self._fp.close()
+                    self._fp = None
+                return
@@ -0,0 +1,287 @@
+import copy
+import importlib
+import itertools
+import json
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from adapters.instance_router import InstanceRouter
+from adapters.tcp_json_v1 import TcpJsonV1Server, error_frame
+from core.errors import InvalidRequestError
+from core.scan_group import ScanGroup
+from main import build_instance, load_simulator_config
+from profiles.profile_loader import DeviceProfileLoader
+
+
+def load_host_config(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _merge(base: dict, over: dict) -> dict:
+    for key, value in over.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+    return base
+
+
+def _substitute(value, instance_id: str):
+    if isinstance(value, str):
+        return value.replace("{instance}", instance_id)
+    if isinstance(value, dict):
+        return {k: _substitute(v, instance_id) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, instance_id) for v in value]
+    return value
+
+
+def expand_instances(host_cfg: dict) -> list[dict]:
+    # Each entry is a simulator config plus overrides, repeated count times: ids come from
+    # id.format(n=1..count), non-zero ports move by port_step per copy, "{instance}" in any string
+    # (log, WAL and checkpoint paths) becomes the instance id.
+    out = []
+    seen = set()
+    for spec in host_cfg["instances"]:
+        base = load_simulator_config(spec.get("config", "simulator.yaml"))
+        step = spec.get("port_step", 0)
+        for n in range(spec.get("count", 1)):
+            instance_id = spec["id"].format(n=n + 1)
+            if instance_id in seen:
+                raise ValueError(f"duplicate instance id {instance_id!r}")
+            seen.add(instance_id)
+            cfg = _substitute(_merge(copy.deepcopy(base), spec.get("overrides", {})), instance_id)
+            cfg.setdefault("simulator", {})["instance_id"] = instance_id
+            for a in cfg["adapters"]:
+                if a["port"]:
+                    a["port"] += n * step
+            http_cfg = cfg.get("metrics", {}).get("http", {})
+            if http_cfg.get("enabled", False) and http_cfg.get("port"):
+                http_cfg["port"] += n * step
+            out.append(cfg)
+    return out
+
+
+def preload(cfgs: list[dict]) -> None:
+    # Parse each profile and import each module once, before workers fork, so they share the pages.
+    for cfg in cfgs:
+        DeviceProfileLoader.load_shared(cfg["profile"]["path"])
+        for entry in cfg["modules"]:
+            if isinstance(entry, str):
+                importlib.import_module(f"modules.{entry}")
+
+
+class InstanceSet:
+    # The instances of one process: own adapters (routing by port), one backend each for the
+    # instance_id front end, and a single ScanGroup thread running every scan loop.
+    def __init__(self, cfgs: list[dict], front_cfg: dict):
+        self.engines = {}
+        self.adapters = []
+        for cfg in cfgs:
+            engine, adapters = build_instance(cfg, DeviceProfileLoader.load_shared(cfg["profile"]["path"]))
+            self.engines[cfg["simulator"]["instance_id"]] = engine
+            self.adapters.extend(adapters)
+        self.backends = {
+            instance_id: TcpJsonV1Server(
+                engine.mem,
+                name=front_cfg.get("name", "front"),
+                bind_ip="",
+                port=0,
+                limits=front_cfg.get("limits"),
+                readonly=front_cfg.get("readonly", False),
+                hub=engine.hub,
+                clock=engine.clock,
+                profiler=engine.profiler,
+            )
+            for instance_id, engine in self.engines.items()
+        }
+        self.group = ScanGroup(list(self.engines.values()))
+        self._thread = None
+
+    def start(self):
+        for a in self.adapters:
+            a.start()
+        self._thread = threading.Thread(target=self.group.run_forever, name="scan-group", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.group.stop()
+        if self._thread is not None:
+            self._thread.join()
+        for a in self.adapters:
+            a.stop()
+        self.group.close()
+        for engine in self.engines.values():
+            engine.mem.wal.close()
+            engine.mem.close()
+
+
+def _worker_main(conn, cfgs: list[dict], front_cfg: dict):
+    instances = InstanceSet(cfgs, front_cfg)
+    instances.start()
+    pool = ThreadPoolExecutor(front_cfg.get("workers", 4), thread_name_prefix="host-request")
+    send_lock = threading.Lock()
+
+    def serve(req_id, instance_id, req):
+        out = instances.backends[instance_id].handle_request(req)
+        with send_lock:
+            try:
+                conn.send((req_id, out))
+            except OSError:
+                pass
+
+    conn.send("ready")
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg is None:
+                break
+            pool.submit(serve, *msg)
+    finally:
+        pool.shutdown()
+        instances.stop()
+        conn.close()
+
+
+WORKER_EXITED = {"ok": False, "err": {"code": "INTERNAL_ERROR", "message": "host worker exited"}}
+
+
+class WorkerProcess:
+    # Parent side of one worker: requests are tagged with an id and answered out of order,
+    # so a blocking clock wait on one instance does not hold up the others.
+    def __init__(self, ctx, cfgs: list[dict], front_cfg: dict):
+        self.instance_ids = [cfg["simulator"]["instance_id"] for cfg in cfgs]
+        self._conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, cfgs, front_cfg), daemon=True)
+        self._pending: dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        self.process.start()
+        try:
+            self._conn.recv()
+        except EOFError as exc:
+            raise RuntimeError(f"host worker for {self.instance_ids} exited during startup") from exc
+        threading.Thread(target=self._read_loop, name=f"host-worker-{self.process.pid}", daemon=True).start()
+
+    def _read_loop(self):
+        while True:
+            try:
+                req_id, out = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            self._pending.pop(req_id).set_result(out)
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            fut.set_result(WORKER_EXITED)
+
+    def request(self, instance_id: str, req: dict) -> dict:
+        fut = Future()
+        with self._lock:
+            if self._closed:
+                return WORKER_EXITED
+            req_id = next(self._ids)
+            self._pending[req_id] = fut
+            try:
+                self._conn.send((req_id, instance_id, req))
+            except OSError:
+                del self._pending[req_id]
+                return WORKER_EXITED
+        return fut.result()
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self._conn.close()
+
+
+class RemoteInstance:
+    hub = None
+
+    def __init__(self, worker: WorkerProcess, instance_id: str):
+        self.worker = worker
+        self.instance_id = instance_id
+
+    def handle_request(self, req, session=None):
+        if req.get("op") in ("subscribe", "unsubscribe"):
+            return error_frame(InvalidRequestError("subscriptions need a per-instance port when host workers > 0"))
+        return self.worker.request(self.instance_id, req)
+
+
+class SimulatorHost:
+    def __init__(self, host_cfg: dict):
+        self.cfgs = expand_instances(host_cfg)
+        opts = host_cfg.get("host", {})
+        front_cfg = opts.get("front", {})
+        workers = opts.get("workers", 0)
+        preload(self.cfgs)
+        self.local = None
+        self.processes = []
+        if workers > 0:
+            ctx = multiprocessing.get_context(opts.get("start_method"))
+            # Dealt round robin so consecutive instances (neighbours on a line) land on different workers.
+            chunks = [self.cfgs[i::workers] for i in range(workers)]
+            self.processes = [WorkerProcess(ctx, chunk, front_cfg) for chunk in chunks if chunk]
+            backends = {iid: RemoteInstance(w, iid) for w in self.processes for iid in w.instance_ids}
+        else:
+            self.local = InstanceSet(self.cfgs, front_cfg)
+            backends = self.local.backends
+        self.router = None
+        if front_cfg.get("enabled", True):
+            self.router = InstanceRouter(
+                backends,
+                name=front_cfg.get("name", "front"),
+                bind_ip=front_cfg.get("bind_ip", "127.0.0.1"),
+                port=front_cfg.get("port", 5600),
+                limits=front_cfg.get("limits"),
+                max_clients=front_cfg.get("max_clients", 0),
+                timeout_ms=front_cfg.get("timeout_ms", 0),
+            )
+
+    def start(self):
+        if self.local is not None:
+            self.local.start()
+        for w in self.processes:
+            w.start()
+        if self.router is not None:
+            self.router.start()
+
+    def stop(self):
+        if self.router is not None:
+            self.router.stop()
+        for w in self.processes:
+            w.stop()
+        if self.local is not None:
+            self.local.stop()
+
+
+def main():
+    host = SimulatorHost(load_host_config(sys.argv[1] if len(sys.argv) > 1 else "host.yaml"))
+    host.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        host.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
 import importlib
 import json
+from dataclasses import asdict
 from pathlib import Path
 
+from adapters.kv_hostlink import KvHostLinkServer
+from adapters.mc_protocol import McProtocolServer
+from adapters.metrics_http import MetricsHttpServer
+from adapters.subscriptions import SubscriptionHub
+from adapters.tcp_bin_v1 import TcpBinV1Server
 from adapters.tcp_json_v1 import TcpJsonV1Server
+from adapters.tcp_json_v1_async import AsyncTcpJsonV1Server
+from core.checkpoint import CheckpointHook, CheckpointStore, restore_latest
 from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.profiler import ScanProfiler
 from core.scan_engine import ScanConfig, ScanEngine
 from core.sim_logger import build_scan_logger
 from core.wal import WalStore
+from core.wal_file import WalFileWriter
+from modules.ladder import LadderProgramModule
 from profiles.profile_loader import DeviceProfileLoader
 
 
@@ -14,22 +25,68 @@ def load_simulator_config(path: str) -> dict:
     return json.loads(Path(path).read_text(encoding="utf-8"))
 
 
+def build_module(entry, profile):
+    # "A" imports modules/A.py; {"ladder": path} compiles a declarative rung program.
+    if isinstance(entry, dict):
+        return LadderProgramModule.from_file(entry["ladder"], profile)
+    return importlib.import_module(f"modules.{entry}").Module()
+
+
+def build_adapter(mem, a: dict, hub=None, clock=None, profiler=None):
+    kwargs = dict(
+        name=a["name"],
+        bind_ip=a["bind_ip"],
+        port=a["port"],
+        limits=a["limits"],
+        readonly=a["readonly"],
+        max_clients=a.get("max_clients", 0),
+        timeout_ms=a.get("timeout_ms", 0),
+    )
+    protocol = a.get("protocol", "tcp_json_v1")
+    if protocol == "tcp_bin_v1":
+        return TcpBinV1Server(mem, **kwargs)
+    if protocol == "kv_hostlink":
+        return KvHostLinkServer(mem, **kwargs)
+    if protocol == "mc_3e":
+        return McProtocolServer(mem, **kwargs)
+    if protocol != "tcp_json_v1":
+        raise ValueError(f"unknown adapter protocol {protocol!r}")
+    if a.get("server", "thread") == "asyncio":
+        return AsyncTcpJsonV1Server(mem, workers=a.get("workers", 4), hub=hub, clock=clock, profiler=profiler, **kwargs)
+    return TcpJsonV1Server(mem, hub=hub, clock=clock, profiler=profiler, **kwargs)
+
+
 def build_app(config_path: str = "simulator.yaml"):
-    cfg = load_simulator_config(config_path)
-    profile = DeviceProfileLoader.load(cfg["profile"]["path"])
+    return build_instance(load_simulator_config(config_path))
+
+
+def build_instance(cfg: dict, profile=None):
+    if profile is None:
+        profile = DeviceProfileLoader.load(cfg["profile"]["path"])
+    wal_cfg = cfg["wal"]
+    sink = None
+    if wal_cfg.get("enabled", True) and wal_cfg.get("flush_to_file", False):
+        sink = WalFileWriter(
+            wal_cfg["file_path"],
+            sync_mode=wal_cfg.get("sync_mode", "buffered"),
+            retention_sec=wal_cfg.get("retention_sec", 3600),
+            segment_sec=wal_cfg.get("segment_sec", 300),
+        )
     mem = DeviceMemory(
         profile,
-        WalStore(max_entries=cfg["wal"]["max_entries"]),
+        WalStore(max_entries=wal_cfg["max_entries"], sink=sink),
         DeviceMemoryOptions(
             lock_timeout_ms=cfg["locks"]["timeout_ms"],
+            lock_granularity=cfg["locks"].get("granularity", "device"),
+            lock_stripe_size=cfg["locks"].get("stripe_size", 256),
             read_your_writes=cfg["consistency"]["read_your_writes"],
             apply_phase=cfg["consistency"]["apply_phase"],
+            storage=cfg.get("memory", {}).get("storage", "array"),
+            shared_name=cfg.get("memory", {}).get("shared_name", ""),
+            shared_path=cfg.get("memory", {}).get("shared_path", ""),
         ),
     )
-    modules = []
-    for module_name in cfg["modules"]:
-        mod = importlib.import_module(f"modules.{module_name}")
-        modules.append(mod.Module())
+    modules = [build_module(entry, profile) for entry in cfg["modules"]]
     scan_logger = build_scan_logger(cfg.get("simulator", {}), cfg.get("logging", {}))
     engine = ScanEngine(
         mem,
@@ -39,21 +96,32 @@ def build_app(config_path: str = "simulator.yaml"):
             period_ms=cfg["scan"]["period_ms"],
             on_module_error=cfg["scan"]["on_module_error"],
             on_scan_error_wal=cfg["scan"]["on_scan_error_wal"],
+            fast_scans=cfg["scan"].get("fast_scans", 0),
+            fast_until_ms=cfg["scan"].get("fast_until_ms", 0),
+            overrun_policy=cfg["scan"].get("overrun_policy", "skip"),
+            parallel_workers=cfg["scan"].get("parallel", {}).get("workers", 0),
+            learn_scans=cfg["scan"].get("parallel", {}).get("learn_scans", 0),
         ),
         logger=scan_logger,
     )
-    adapters = []
-    for a in cfg["adapters"]:
-        adapters.append(
-            TcpJsonV1Server(
-                mem,
-                name=a["name"],
-                bind_ip=a["bind_ip"],
-                port=a["port"],
-                limits=a["limits"],
-                readonly=a["readonly"],
-            )
-        )
+    recovery_cfg = cfg.get("recovery", {})
+    if recovery_cfg.get("enabled", False):
+        store = CheckpointStore(recovery_cfg.get("dir", "checkpoints"), keep=recovery_cfg.get("keep", 2))
+        engine.restore_report = restore_latest(engine, store)
+        engine.register_hook(CheckpointHook(store, recovery_cfg.get("interval_scans", 1000)))
+    hub = None
+    if cfg.get("subscriptions", {}).get("enabled", False):
+        hub = SubscriptionHub(mem)
+        engine.register_hook(hub)
+    engine.hub = hub
+    profiling_cfg = cfg.get("profiling", {})
+    engine.profiler = ScanProfiler(engine, profiling_cfg.get("every", 100))
+    if profiling_cfg.get("enabled", False):
+        engine.profiler.start()
+    adapters = [build_adapter(mem, a, hub, engine.clock, engine.profiler) for a in cfg["adapters"]]
+    http_cfg = cfg.get("metrics", {}).get("http", {})
+    if http_cfg.get("enabled", False):
+        adapters.append(MetricsHttpServer(mem.metrics, http_cfg.get("bind_ip", "127.0.0.1"), http_cfg.get("port", 9108)))
     return engine, adapters
 
 
@@ -61,10 +129,18 @@ def main():
     engine, adapters = build_app()
     for a in adapters:
         a.start()
-    if engine.config.mode == "step":
-        engine.step()
-    else:
-        engine.run_forever()
+    try:
+        if engine.config.mode == "step":
+            engine.step()
+        elif engine.config.mode == "fast":
+            report = engine.run_fast(engine.config.fast_scans or None, engine.config.fast_until_ms or None)
+            print(json.dumps(asdict(report)))
+        else:
+            engine.run_forever()
+    finally:
+        engine.close()
+        engine.mem.wal.close()
+        engine.mem.close()
 
 
 if __name__ == "__main__":
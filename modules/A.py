@@ -3,6 +3,8 @@ from modules.base import LadderModuleBase
 
 class Module(LadderModuleBase):
     name = "A"
+    reads = [("R", "bit", 0, 0)]
+    writes = [("MR", "bit", 0, 0)]
 
     def execute(self, ctx):
         inp = ctx.mem.read_bits("R", 0, 1, source="ladder:A")[0]
@@ -3,8 +3,13 @@ from modules.base import LadderModuleBase
 
 class Module(LadderModuleBase):
     name = "B"
+    reads = [("MR", "bit", 0, 0)]
+    writes = [("DM", "word", 100, 100), ("MR", "bit", 1, 1)]
+
+    def on_load(self, ctx):
+        self.counter = ctx.plc.alloc_ctu("B_counter")
 
     def execute(self, ctx):
-        q, cv = ctx.plc.ctu("B_counter", bool(ctx.mem.read_bits("MR", 0, 1, source="ladder:B")[0]), 3)
+        q, cv = ctx.plc.ctu_at(self.counter, bool(ctx.mem.read_bits("MR", 0, 1, source="ladder:B")[0]), 3)
         ctx.mem.write_words("DM", 100, [cv], source="ladder:B")
         ctx.mem.write_bits("MR", 1, [1 if q else 0], source="ladder:B")
@@ -3,6 +3,8 @@ from modules.base import LadderModuleBase
 
 class Module(LadderModuleBase):
     name = "X"
+    reads = [("MR", "bit", 1, 1)]
+    writes = [("DM", "word", 101, 101)]
 
     def execute(self, ctx):
         done = ctx.mem.read_bits("MR", 1, 1, source="ladder:X")[0]
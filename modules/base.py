@@ -1,5 +1,9 @@
 class LadderModuleBase:
     name = "base"
+    # Optional access sets for parallel scans: "DEV", ("DEV", space) or ("DEV", space, first, last).
+    # None on both means unknown, and the module runs on its own.
+    reads = None
+    writes = None
 
     def on_load(self, ctx):
         return None
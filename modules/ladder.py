@@ -0,0 +1,26 @@
+import json
+from pathlib import Path
+
+from adapters.kv_devices import KvDeviceParser
+from core.ladder_compiler import LadderProgram
+from modules.base import LadderModuleBase
+
+
+class LadderProgramModule(LadderModuleBase):
+    # A declarative rung program (format in core/ladder_compiler.py), compiled into one function at load.
+    def __init__(self, program: dict, profile):
+        self.program = LadderProgram(program, KvDeviceParser(profile).parse)
+        self.name = self.program.name
+        self.reads = self.program.reads
+        self.writes = self.program.writes
+        self._scan = None
+
+    @classmethod
+    def from_file(cls, path: str, profile) -> "LadderProgramModule":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")), profile)
+
+    def on_load(self, ctx):
+        self._scan = self.program.compile(ctx.plc)
+
+    def execute(self, ctx):
+        self._scan(ctx.mem)
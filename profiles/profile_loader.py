@@ -6,6 +6,18 @@ from core.memory_model import MemoryModel
 
 
 class DeviceProfileLoader:
+    _shared: dict[tuple[str, int], DeviceProfile] = {}
+
+    @classmethod
+    def load_shared(cls, path: str) -> DeviceProfile:
+        # One parsed profile per file (and mtime) per process; profiles are read-only once built.
+        resolved = Path(path).resolve()
+        key = (str(resolved), resolved.stat().st_mtime_ns)
+        profile = cls._shared.get(key)
+        if profile is None:
+            profile = cls._shared[key] = cls.load(path)
+        return profile
+
     @staticmethod
     def load(path: str) -> DeviceProfile:
         raw = Path(path).read_text(encoding="utf-8")
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.checkpoint import CheckpointHook, CheckpointStore, restore_latest
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.scan_engine import ScanConfig, ScanEngine
+from core.wal import WalStore
+from core.wal_file import WalFileWriter
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class CounterModule(LadderModuleBase):
+    name = "Counter"
+
+    def execute(self, ctx):
+        _, cv = ctx.plc.ctu("cnt", bool(ctx.scan_id & 1), 1000)
+        ctx.mem.write_words("CM", 0, [cv], source="ladder:Counter")
+        ctx.mem.write_bits("MR", 0, [ctx.scan_id & 1], source="ladder:Counter")
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+    def build(self, d, storage="array"):
+        writer = WalFileWriter(str(Path(d) / "wal" / "wal.log"), sync_mode="group")
+        mem = DeviceMemory(self.profile, WalStore(sink=writer), DeviceMemoryOptions(storage=storage))
+        engine = ScanEngine(mem, [CounterModule()], ScanConfig(mode="step"))
+        store = CheckpointStore(str(Path(d) / "ckpt"), keep=2)
+        return mem, engine, store
+
+    def test_restore_checkpoint_and_replay_wal_tail(self):
+        for storage in ("array", "dict"):
+            with tempfile.TemporaryDirectory() as d:
+                mem, engine, store = self.build(d, storage)
+                engine.register_hook(CheckpointHook(store, interval_scans=4))
+                for _ in range(5):
+                    engine.step()
+                store.wait()
+                mem.write_words("DM", 10, [321], source="adapter:test")
+                engine.step()
+                mem.write_bits("B", 3, [1], source="adapter:test")
+                mem.wal.close()
+                expected_cm = mem.read_words("CM", 0, 1, source="adapter:test")
+
+                mem2, engine2, store2 = self.build(d, storage)
+                report = restore_latest(engine2, store2)
+                self.assertTrue(report.checkpoint.endswith("ckpt.000000000004.bin"))
+                self.assertEqual(report.scan_id, 6)
+                self.assertEqual(report.pending, 2)
+                self.assertEqual(mem2.read_words("DM", 10, 1, source="adapter:test"), [321])
+                self.assertEqual(mem2.read_words("CM", 0, 1, source="adapter:test"), expected_cm)
+                self.assertEqual(engine2.state.snapshot(), {"edge:rise:ctu:cnt:edge": False, "ctu:cnt:cv": 2})
+                engine2.step()
+                self.assertEqual(mem2.read_bits("B", 3, 1, source="adapter:test"), [1])
+                mem2.wal.close()
+
+    def test_keeps_latest_checkpoints_only(self):
+        with tempfile.TemporaryDirectory() as d:
+            mem, engine, store = self.build(d)
+            for scan_id in (1, 2, 3):
+                store.write(store.capture(mem, scan_id, {}))
+            self.assertEqual([p.name for p in store.paths()], ["ckpt.000000000002.bin", "ckpt.000000000003.bin"])
+            mem.wal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import socket
+import unittest
+
+from host import SimulatorHost, expand_instances
+
+
+def host_config(workers: int = 0, count: int = 3) -> dict:
+    return {
+        "host": {
+            "workers": workers,
+            "start_method": "spawn",
+            "front": {"bind_ip": "127.0.0.1", "port": 0},
+        },
+        "instances": [
+            {
+                "id": "plc{n:02d}",
+                "count": count,
+                "config": "simulator.yaml",
+                "port_step": 1,
+                "overrides": {
+                    "scan": {"mode": "real", "period_ms": 5},
+                    "adapters": [],
+                    "logging": {"file_path": "logs/{instance}/debug.log"},
+                },
+            }
+        ],
+    }
+
+
+class FrontClient:
+    def __init__(self, port: int):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.reader = self.sock.makefile("rb")
+
+    def call(self, req: dict) -> dict:
+        self.sock.sendall(json.dumps(req).encode("utf-8") + b"\n")
+        return json.loads(self.reader.readline())
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class HostTests(unittest.TestCase):
+    def test_expand_instances(self):
+        cfg = host_config()
+        cfg["instances"][0]["overrides"].pop("adapters")
+        cfgs = expand_instances(cfg)
+        self.assertEqual([c["simulator"]["instance_id"] for c in cfgs], ["plc01", "plc02", "plc03"])
+        self.assertEqual([c["adapters"][0]["port"] for c in cfgs], [5500, 5501, 5502])
+        self.assertEqual(cfgs[1]["logging"]["file_path"], "logs/plc02/debug.log")
+        self.assertEqual(cfgs[1]["scan"]["period_ms"], 5)
+        self.assertEqual(cfgs[1]["scan"]["on_module_error"], "CONTINUE")
+
+    def check_routing(self, host: SimulatorHost):
+        client = FrontClient(host.router.port)
+        try:
+            out = client.call({"instance_id": "plc02", "op": "write", "space": "word", "dev": "DM", "addr": 10, "values": [42]})
+            self.assertTrue(out["ok"], out)
+            out = client.call({"instance_id": "plc02", "op": "clock", "until_ms": 50, "timeout_ms": 2000})
+            self.assertTrue(out["reached"])
+            self.assertEqual(client.call({"instance_id": "plc02", "op": "read", "space": "word", "dev": "DM", "addr": 10, "count": 1})["values"], [42])
+            self.assertEqual(client.call({"instance_id": "plc01", "op": "read", "space": "word", "dev": "DM", "addr": 10, "count": 1})["values"], [0])
+            self.assertEqual(client.call({"instance_id": "plc09", "op": "stats"})["err"]["code"], "UNKNOWN_INSTANCE")
+            self.assertEqual(client.call({"op": "stats"})["err"]["code"], "INVALID_REQUEST")
+            for instance_id in ("plc01", "plc03"):
+                out = client.call({"instance_id": instance_id, "op": "clock", "until_ms": 50, "timeout_ms": 2000})
+                self.assertTrue(out["reached"], instance_id)
+        finally:
+            client.close()
+
+    def test_in_process_host(self):
+        host = SimulatorHost(host_config())
+        host.start()
+        try:
+            self.check_routing(host)
+            engines = host.local.engines
+            self.assertIs(engines["plc01"].mem.profile, engines["plc03"].mem.profile)
+        finally:
+            host.stop()
+
+    def test_process_host(self):
+        host = SimulatorHost(host_config(workers=2))
+        host.start()
+        try:
+            self.check_routing(host)
+            self.assertEqual(sorted(len(w.instance_ids) for w in host.processes), [1, 2])
+        finally:
+            host.stop()
+        self.assertFalse(any(w.process.is_alive() for w in host.processes))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import socket
+import struct
+import unittest
+
+from adapters.kv_devices import KvDeviceParser
+from adapters.kv_hostlink import KvHostLinkServer
+from adapters.mc_protocol import CMD_READ, CMD_WRITE, SUB_BIT, SUB_WORD, McProtocolServer, encode_request
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class KvProtocolTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        self.mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions())
+
+    def serve(self, cls):
+        server = cls(self.mem, name="kv", bind_ip="127.0.0.1", port=0)
+        server.start()
+        self.addCleanup(server.stop)
+        sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_device_names_follow_profile_suffixes(self):
+        parser = KvDeviceParser(self.profile)
+        self.assertEqual(parser.parse("R115"), ("R", "bit", 31))
+        self.assertEqual(parser.parse("B1F"), ("B", "bit", 31))
+        self.assertEqual(parser.parse("MR100", word_access=True), ("MR", "word", 1))
+        self.assertEqual(parser.parse("TRM2"), ("TRM", "dword", 2))
+        self.assertEqual(parser.parse("ZF100"), ("ZF", "word", 100))
+
+    def test_hostlink_loopback(self):
+        sock = self.serve(KvHostLinkServer)
+
+        def call(line):
+            sock.sendall(line.encode("ascii") + b"\r")
+            data = b""
+            while not data.endswith(b"\r\n"):
+                data += sock.recv(4096)
+            return data[:-2].decode("ascii")
+
+        self.assertEqual(call("WRS DM100 3 1 2 65535"), "OK")
+        self.assertEqual(call("RDS DM100 3"), "00001 00002 65535")
+        self.assertEqual(call("RD DM102.S"), "-00001")
+        self.assertEqual(call("WR DM200.D 70000"), "OK")
+        self.assertEqual(call("RDS DM200 2"), "04464 00001")
+        self.assertEqual(call("RD DM200.D"), "0000070000")
+        self.assertEqual(call("ST MR100"), "OK")
+        self.mem.apply_wal("scan_end", 1)
+        self.assertEqual(call("RDS MR015 3"), "0 1 0")
+        self.assertEqual(call("RD DM65535"), "E0")
+        self.assertEqual(call("WR T0 1"), "E4")
+        self.assertEqual(call("XX DM0"), "E1")
+
+    def test_mc_3e_loopback(self):
+        sock = self.serve(McProtocolServer)
+
+        def call(*args):
+            sock.sendall(encode_request(*args))
+            head = sock.recv(9)
+            (length,) = struct.unpack_from("<H", head, 7)
+            body = b""
+            while len(body) < length:
+                body += sock.recv(length - len(body))
+            (end_code,) = struct.unpack_from("<H", body, 0)
+            return end_code, body[2:]
+
+        self.assertEqual(call(CMD_WRITE, SUB_WORD, 0xA8, 10, 2, struct.pack("<2H", 7, 8)), (0, b""))
+        self.assertEqual(call(CMD_READ, SUB_WORD, 0xA8, 10, 2), (0, struct.pack("<2H", 7, 8)))
+        self.assertEqual(call(CMD_WRITE, SUB_BIT, 0x90, 0, 3, bytes([0x10, 0x10])), (0, b""))
+        self.mem.apply_wal("scan_end", 1)
+        self.assertEqual(call(CMD_READ, SUB_BIT, 0x90, 0, 3), (0, bytes([0x10, 0x10])))
+        self.assertEqual(call(CMD_READ, SUB_WORD, 0xA8, 65535, 1)[0], 0xC056)
+        self.assertEqual(call(CMD_READ, SUB_WORD, 0x01, 0, 1)[0], 0xC05A)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.plc_parts import PlcParts
+from core.scan_engine import ScanConfig, ScanEngine
+from core.state_store import StateStore
+from core.wal import WalStore
+from main import build_module
+from modules.ladder import LadderProgramModule
+from profiles.profile_loader import DeviceProfileLoader
+
+INPUTS = [0, 1, 1, 0, 1, 1, 1, 0, 0, 1, 0, 1, 1, 1, 1, 0]
+
+TIMERS = {
+    "name": "timers",
+    "rungs": [
+        {"if": "R000", "do": [{"ton": "t", "pt": 25, "q": "MR010"}, {"tof": "t", "pt": 25, "q": "MR011"}]},
+        {"if": "R000", "do": {"tp": "t", "pt": 35, "q": "MR012"}},
+        {"if": "R000", "do": {"ctu": "c", "pv": 3, "reset": "R001", "q": "MR013", "cv": "DM10"}},
+        {"if": "R000", "do": {"ctd": "c", "pv": 4, "reset": "R001", "q": "MR014", "cv": "DM11"}},
+    ],
+}
+
+
+class FakeMem:
+    # Serves reads from a dict and records every call, so a compiled scan can be checked in isolation.
+    def __init__(self):
+        self.points = {}
+        self.calls = []
+
+    def _read(self, dev, space, addr, count):
+        self.calls.append((f"read_{space}s", dev, addr, count))
+        return [self.points.get((dev, addr + i), 0) for i in range(count)]
+
+    def _write(self, dev, space, addr, values):
+        self.calls.append((f"write_{space}s", dev, addr, len(values)))
+        for i, v in enumerate(values):
+            self.points[(dev, addr + i)] = v
+
+    def read_bits(self, dev, addr, count, *, source):
+        return self._read(dev, "bit", addr, count)
+
+    def read_words(self, dev, addr, count, *, source):
+        return self._read(dev, "word", addr, count)
+
+    def write_bits(self, dev, addr, values, *, source):
+        self._write(dev, "bit", addr, values)
+
+    def write_words(self, dev, addr, values, *, source):
+        self._write(dev, "word", addr, values)
+
+
+def load_profile():
+    return DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+
+def compiled(program):
+    module = LadderProgramModule(program, load_profile())
+    plc = PlcParts(StateStore(), lambda: 10)
+    return module, plc, module.program.compile(plc)
+
+
+class LadderCompilerTests(unittest.TestCase):
+    def test_instructions_match_plc_parts(self):
+        _, plc, scan = compiled(TIMERS)
+        ref = PlcParts(StateStore(), lambda: 10)
+        mem = FakeMem()
+        for i, x in enumerate(INPUTS):
+            reset = i == 9
+            mem.points.update({("R", 0): x, ("R", 1): int(reset)})
+            scan(mem)
+            q_ton, q_tof, q_tp = ref.ton("t", x, 25), ref.tof("t", x, 25), ref.tp("t", x, 35)
+            q_ctu, cv_ctu = ref.ctu("c", x, 3, reset=reset)
+            q_ctd, cv_ctd = ref.ctd("c", x, 4, reset=reset)
+            got = [mem.points[("MR", 10 + k)] for k in range(5)] + [mem.points[("DM", 10)], mem.points[("DM", 11)]]
+            self.assertEqual(got, [int(q_ton), int(q_tof), int(q_tp), int(q_ctu), int(q_ctd), cv_ctu, cv_ctd], f"step {i}")
+        self.assertEqual(plc.state.snapshot(), ref.state.snapshot())
+
+    def test_coalesced_reads_and_writes(self):
+        program = {
+            "name": "batch",
+            "rungs": [{"if": [f"R{i:03d}", f"!R{i + 1:03d}"], "do": {"out": f"MR{i:03d}"}} for i in range(10)]
+            + [
+                {"if": {"or": ["MR000", "R012"]}, "do": {"out": "MR010"}},
+                {"if": "R000", "do": {"set": "LR000"}},
+                {"if": "R001", "do": {"rst": "LR000"}},
+            ],
+        }
+        module, _, scan = compiled(program)
+        self.assertEqual(module.reads, [("LR", "bit", 0, 0), ("R", "bit", 0, 12)])
+        self.assertEqual(module.writes, [("MR", "bit", 0, 10), ("LR", "bit", 0, 0)])
+        mem = FakeMem()
+        mem.points.update({("R", 0): 1, ("R", 2): 1})
+        scan(mem)
+        self.assertEqual(
+            mem.calls,
+            [("read_bits", "LR", 0, 1), ("read_bits", "R", 0, 13), ("write_bits", "MR", 0, 11), ("write_bits", "LR", 0, 1)],
+        )
+        self.assertEqual([mem.points[("MR", i)] for i in range(11)], [1, 0, 1] + [0] * 7 + [1])
+        # A latched run whose value did not change is not written again.
+        mem.calls.clear()
+        scan(mem)
+        self.assertNotIn(("write_bits", "LR", 0, 1), mem.calls)
+
+    def test_example_program_in_engine(self):
+        profile = load_profile()
+        mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        module = build_module({"ladder": "example/abx_ladder.json"}, profile)
+        engine = ScanEngine(mem, [module], ScanConfig(mode="step", parallel_workers=2))
+        mem.write_bits("R", 0, [1], source="test")
+        for _ in range(3):
+            engine.step()
+        self.assertEqual(mem.read_bits("MR", 0, 1, source="test"), [1])
+        self.assertEqual(mem.read_words("DM", 100, 1, source="test"), [1])
+        self.assertEqual(engine.state.snapshot(), {"ctu:B_counter:cv": 1, "edge:rise:ctu:B_counter:edge": 1})
+        engine.close()
+
+    def test_bad_program(self):
+        profile = load_profile()
+        with self.assertRaises(ValueError):
+            LadderProgramModule({"rungs": [{"if": {"xor": []}, "do": {"out": "MR0"}}]}, profile)
+        with self.assertRaises(ValueError):
+            LadderProgramModule({"rungs": [{"do": {"out": "MR0", "set": "MR1"}}]}, profile)
+
+
+if __name__ == "__main__":
+    unittest.main()
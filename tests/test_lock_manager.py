@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.errors import LockTimeoutError
+from core.lock_manager import LockManager
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class LockManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+    def test_locks_created_up_front(self):
+        device = LockManager(self.profile, "device")
+        self.assertEqual(len(device.versions[("DM", "word")]), 1)
+        self.assertIs(device.acquire_range("MR", "bit", 0, 1, 100)[0], device.acquire_range("MR", "word", 0, 1, 100)[0])
+        stripe = LockManager(self.profile, "stripe", stripe_size=256)
+        self.assertEqual(len(stripe.versions[("DM", "word")]), 65535 // 256 + 1)
+        self.assertEqual(stripe.stripe_span(("Z", "dword"), 1, 12), (0, 0))
+        self.assertEqual(stripe.stripe_span(("DM", "word"), 250, 10), (0, 1))
+        with self.assertRaises(ValueError):
+            LockManager(self.profile, "global")
+
+    def test_stripe_timeout_releases_held_stripes(self):
+        locks = LockManager(self.profile, "stripe", stripe_size=16)
+        blocker = threading.Event()
+        done = threading.Event()
+
+        def hold_second_stripe():
+            held = locks.acquire_range("DM", "word", 16, 1, 100)
+            blocker.set()
+            done.wait(2)
+            locks.release_all(held)
+
+        t = threading.Thread(target=hold_second_stripe)
+        t.start()
+        blocker.wait(2)
+        with self.assertRaises(LockTimeoutError):
+            locks.acquire_range("DM", "word", 0, 32, 50)
+        # First stripe must have been released on the way out.
+        locks.release_all(locks.acquire_range("DM", "word", 0, 1, 50))
+        done.set()
+        t.join()
+
+    def test_reader_waits_out_in_progress_write(self):
+        mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(lock_granularity="stripe"))
+        versions = mem.locks.versions[("DM", "word")]
+        versions[0] += 1
+
+        def finish():
+            time.sleep(0.05)
+            mem._cs[("DM", "word")].write(0, [5, 5])
+            versions[0] += 1
+
+        t = threading.Thread(target=finish)
+        t.start()
+        self.assertEqual(mem.read_words("DM", 0, 2, source="adapter:test"), [5, 5])
+        t.join()
+
+    def test_multi_word_reads_never_torn(self):
+        for granularity in ("device", "stripe"):
+            mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(lock_granularity=granularity, lock_stripe_size=8))
+            stop = threading.Event()
+
+            def writer():
+                i = 0
+                while not stop.is_set():
+                    i = (i + 1) & 0xFFFF
+                    mem.write_words("DM", 0, [i] * 64, source="adapter:w")
+
+            t = threading.Thread(target=writer)
+            t.start()
+            try:
+                for _ in range(500):
+                    values = mem.read_words("DM", 0, 64, source="adapter:r")
+                    self.assertEqual(len(set(values)), 1, granularity)
+            finally:
+                stop.set()
+                t.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import contextlib
+import io
 import json
 import tempfile
 import unittest
@@ -5,7 +7,7 @@ from pathlib import Path
 
 from core.device_memory import DeviceMemory, DeviceMemoryOptions
 from core.scan_engine import ScanConfig, ScanEngine
-from core.sim_logger import NullLogger, build_scan_logger
+from core.sim_logger import AsyncScanLogger, NullLogger, build_scan_logger, trace_to_text
 from core.wal import WalStore
 from modules.base import LadderModuleBase
 from profiles.profile_loader import DeviceProfileLoader
@@ -18,6 +20,26 @@ class NoopModule(LadderModuleBase):
         return None
 
 
+class FlakySink:
+    # Formats like the text sink; flush fails until `healthy` is set.
+    def __init__(self):
+        self.lines = []
+        self.healthy = False
+
+    def event(self, time_ns, level, fmt, args):
+        self.lines.append(fmt % args)
+
+    def dropped(self, time_ns, count):
+        pass
+
+    def flush(self):
+        if not self.healthy:
+            raise OSError("disk full")
+
+    def close(self):
+        pass
+
+
 class LoggingTests(unittest.TestCase):
     def setUp(self):
         profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
@@ -44,6 +66,83 @@ class LoggingTests(unittest.TestCase):
             self.assertLessEqual(len(files), 3)
             self.assertTrue(any("scan_begin" in f.read_text(encoding="utf-8") for f in files if f.exists()))
 
+    def test_async_text_logger_writes_off_thread(self):
+        with tempfile.TemporaryDirectory() as d:
+            log_path = Path(d) / "scan.log"
+            logger = build_scan_logger({"log_level": "DEBUG"}, {"file_path": str(log_path), "mode": "async"})
+            self.assertIsInstance(logger, AsyncScanLogger)
+            engine = ScanEngine(self.mem, [NoopModule()], ScanConfig(mode="step", period_ms=10), logger=logger)
+            for _ in range(5):
+                engine.step()
+            engine.close()
+            text = log_path.read_text(encoding="utf-8")
+            self.assertEqual(text.count("scan_begin"), 5)
+            self.assertIn("module=Noop outcome=ok", text)
+
+    def test_ring_overflow_is_counted(self):
+        with tempfile.TemporaryDirectory() as d:
+            log_path = Path(d) / "scan.log"
+            logger = build_scan_logger(
+                {"log_level": "DEBUG"},
+                {"file_path": str(log_path), "mode": "async", "buffer_records": 10, "flush_ms": 10000},
+            )
+            for i in range(25):
+                logger.debug("tick i=%s", i)
+            self.assertEqual(logger.dropped, 15)
+            logger.close()
+            text = log_path.read_text(encoding="utf-8")
+            self.assertEqual(text.count("tick"), 10)
+            self.assertIn("log_dropped count=15", text)
+
+    def test_failing_sink_does_not_stop_the_writer(self):
+        sink = FlakySink()
+        logger = AsyncScanLogger(sink, capacity=100, flush_ms=10)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            logger.debug("bad %d", "x")
+            logger.debug("first i=%s", 1)
+            logger.flush()
+            sink.healthy = True
+            logger.debug("second i=%s", 2)
+            logger.flush()
+            logger.close()
+        self.assertEqual(sink.lines, ["first i=1", "second i=2"])
+        self.assertGreaterEqual(logger.errors, 2)
+        self.assertEqual(stderr.getvalue().count("Scan log error"), 1)
+
+    def test_binary_trace_round_trip_and_rotation(self):
+        with tempfile.TemporaryDirectory() as d:
+            trace = Path(d) / "scan.trace"
+            logger = build_scan_logger(
+                {"log_level": "DEBUG"},
+                {"file_path": str(trace), "mode": "async", "format": "binary", "max_bytes": 1000, "backup_count": 9},
+            )
+            engine = ScanEngine(self.mem, [NoopModule()], ScanConfig(mode="step", period_ms=10), logger=logger)
+            for _ in range(10):
+                engine.step()
+            engine.close()
+            files = sorted(trace.parent.glob("scan.trace*"), key=lambda p: p.stat().st_mtime)
+            self.assertGreater(len(files), 1)
+            lines = [line for f in files for line in trace_to_text(f)]
+            self.assertTrue(any("scan_begin scan_id=1 delta_ms=10 mode=step" in line for line in lines))
+            # Same message text as the text logger, bools included.
+            self.assertTrue(any("scan_failed=False" in line for line in lines))
+            self.assertTrue(all(" DEBUG " in line for line in lines))
+
+    def test_binary_trace_records_drops(self):
+        with tempfile.TemporaryDirectory() as d:
+            trace = Path(d) / "scan.trace"
+            logger = build_scan_logger(
+                {"log_level": "DEBUG"},
+                {"file_path": str(trace), "mode": "async", "format": "binary", "buffer_records": 2, "flush_ms": 10000},
+            )
+            for i in range(5):
+                logger.debug("tick i=%s", i)
+            logger.close()
+            lines = trace_to_text(trace)
+            self.assertEqual(sum("tick" in line for line in lines), 2)
+            self.assertTrue(any("log_dropped count=3" in line for line in lines))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.errors import OutOfRangeError, ReadOnlyError, TypeMismatchError, UnknownDeviceError
+from core.memory_bank import ArrayBank, check_values, profile_footprint_bytes
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class MemoryBankTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+    def test_array_and_dict_storage_agree(self):
+        mems = [DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(storage=s)) for s in ("array", "dict")]
+        for mem in mems:
+            mem.write_words("ZF", 524280, [1, 2, 65535], source="adapter:test")
+            mem.write_dwords("Z", 1, [2**32 - 1], source="adapter:test")
+        for mem in mems:
+            self.assertEqual(mem.read_words("ZF", 524279, 5, source="adapter:test"), [0, 1, 2, 65535, 0])
+            self.assertEqual(mem.read_dwords("Z", 1, 2, source="adapter:test"), [2**32 - 1, 0])
+
+    def test_value_range_rejected_without_partial_write(self):
+        bank = ArrayBank("word", 0, 9)
+        with self.assertRaises(OutOfRangeError):
+            bank.write(0, [1, 70000])
+        with self.assertRaises(OutOfRangeError):
+            ArrayBank("bit", 0, 9).write(0, [0, 2])
+        self.assertEqual(bank.read(0, 2), [0, 0])
+
+    def test_compiled_accessors_match_model_errors(self):
+        acc = self.profile.accessor("Z", "dword")
+        self.assertEqual((acc.min_address, acc.max_address, acc.policy), (1, 12, "IMMEDIATE"))
+        with self.assertRaises(OutOfRangeError):
+            acc.check(0, 1)
+        with self.assertRaises(OutOfRangeError):
+            acc.check(12, 2)
+        with self.assertRaises(OutOfRangeError):
+            acc.check(1, 0)
+        with self.assertRaises(TypeMismatchError):
+            self.profile.accessor("DM", "bit")
+        with self.assertRaises(UnknownDeviceError):
+            self.profile.accessor("XX", "word")
+        with self.assertRaises(ReadOnlyError):
+            self.profile.accessor("T", "bit").check_writable()
+
+    def test_check_values_vectorized_and_coerced(self):
+        self.assertEqual(check_values("word", [0, 65535]), [0, 65535])
+        self.assertEqual(check_values("bit", [True, 0, 1.0]), [1, 0, 1])
+        for space, values in (("bit", [0, 2]), ("word", [-1]), ("dword", [2**32])):
+            with self.assertRaises(OutOfRangeError):
+                check_values(space, values)
+
+    def test_footprint_predicted_from_profile(self):
+        mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(storage="array"))
+        self.assertEqual(mem.nbytes(), profile_footprint_bytes(self.profile))
+
+    def test_io_image_tracks_dirty_pages_between_scans(self):
+        for storage in ("array", "dict"):
+            mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(storage=storage))
+            mem.begin_scan(1, 10)
+            mem._write_cs("R", "bit", 300, [1, 1])
+            mem._write_cs("R", "word", 5, [42])
+            self.assertEqual(mem.read_bits("R", 300, 2, source="ladder:A"), [0, 0])
+            mem.begin_scan(2, 10)
+            self.assertEqual(mem.read_bits("R", 299, 3, source="ladder:A"), [0, 1, 1])
+            self.assertEqual(mem.read_words("R", 5, 1, source="ladder:A"), [42])
+            self.assertEqual(mem._cs[("R", "bit")].dirty, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
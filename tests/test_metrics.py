@@ -0,0 +1,92 @@
+import json
+import threading
+import unittest
+import urllib.request
+
+from adapters.metrics_http import MetricsHttpServer
+from adapters.tcp_json_v1 import TcpJsonV1Server
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.metrics import LATENCY_BOUNDS_US, MetricsRegistry
+from core.scan_engine import ScanConfig, ScanEngine
+from core.wal import WalStore
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class WriterModule(LadderModuleBase):
+    name = "W"
+
+    def execute(self, ctx):
+        ctx.mem.write_words("DM", 0, [1, 2, 3], source="ladder:W", defer=True)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_thread_shards_merge(self):
+        metrics = MetricsRegistry()
+
+        def work():
+            for i in range(1000):
+                metrics.inc("hits_total")
+                metrics.observe("lat_us", i)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        snap = metrics.snapshot()
+        self.assertEqual(snap["counters"]["hits_total"], 4000)
+        self.assertEqual(snap["histograms"]["lat_us"]["count"], 4000)
+        self.assertEqual(LATENCY_BOUNDS_US[:4], (1, 2, 5, 10))
+
+    def test_exited_threads_are_retired(self):
+        metrics = MetricsRegistry()
+
+        def work():
+            metrics.inc("hits_total")
+            metrics.observe("lat_us", 10)
+
+        for _ in range(50):
+            t = threading.Thread(target=work)
+            t.start()
+            t.join()
+        metrics.inc("hits_total")
+        self.assertEqual(len(metrics._shards), 1)
+        snap = metrics.snapshot()
+        self.assertEqual(snap["counters"]["hits_total"], 51)
+        self.assertEqual(snap["histograms"]["lat_us"]["count"], 50)
+
+    def test_engine_and_adapter_record(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        engine = ScanEngine(mem, [WriterModule()], ScanConfig(mode="step"))
+        engine.step()
+        engine.step()
+        server = TcpJsonV1Server(mem, name="m", bind_ip="127.0.0.1", port=0)
+        server._handle_line(b'{"op":"read","space":"word","dev":"DM","addr":0,"count":3}')
+        server._handle_line(b'{"op":"read","space":"word","dev":"DM","addr":70000,"count":1}')
+        stats = server._handle_line(b'{"op":"stats"}')["stats"]
+        self.assertEqual(stats["counters"]["scans_total"], 2)
+        self.assertEqual(stats["counters"]["wal_applied_entries_total"], 1)
+        self.assertEqual(stats["counters"]["wal_applied_bytes_total"], 6)
+        self.assertEqual(stats["counters"]['adapter_errors_total{adapter="m",code="OUT_OF_RANGE"}'], 1)
+        self.assertEqual(stats["histograms"]['adapter_request_us{adapter="m",op="read"}']["count"], 2)
+        self.assertEqual(stats["histograms"]['module_us{module="W"}']["count"], 2)
+        self.assertEqual(stats["gauges"]["wal_depth"], 1)
+
+        http = MetricsHttpServer(mem.metrics, port=0)
+        http.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{http.port}/metrics", timeout=2) as resp:
+                text = resp.read().decode("utf-8")
+            with urllib.request.urlopen(f"http://127.0.0.1:{http.port}/stats", timeout=2) as resp:
+                self.assertIn("counters", json.loads(resp.read()))
+        finally:
+            http.stop()
+        self.assertIn("scans_total 2\n", text)
+        self.assertIn('module_us_bucket{module="W",le="+Inf"} 2\n', text)
+        self.assertIn("scan_us_count 2\n", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.module_graph import ModuleAccess, build_waves, conflicts, normalize
+from core.scan_engine import Hook, ScanConfig, ScanEngine
+from core.wal import WalStore
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class Counter(LadderModuleBase):
+    # DM[dst] = DM[src] + 1; chained counters make the result depend on module order.
+    def __init__(self, name, src, dst, declare=True):
+        self.name = name
+        self.src = src
+        self.dst = dst
+        if declare:
+            self.reads = [("DM", "word", src, src)]
+            self.writes = [("DM", "word", dst, dst)]
+
+    def execute(self, ctx):
+        value = ctx.mem.read_words("DM", self.src, 1, source=f"ladder:{self.name}")[0]
+        ctx.mem.write_words("DM", self.dst, [(value + 1) & 0xFFFF], source=f"ladder:{self.name}")
+
+
+class Wanderer(LadderModuleBase):
+    # Undeclared; starts touching a second range after a few scans.
+    name = "wander"
+
+    def execute(self, ctx):
+        ctx.mem.write_words("DM", 500, [ctx.scan_id], source="ladder:wander")
+        if ctx.scan_id > 3:
+            ctx.mem.write_words("DM", 0, [7], source="ladder:wander")
+
+
+class RecordingHook(Hook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_module(self, ctx, module):
+        self.before.append(module.name)
+
+    def after_module(self, ctx, module, outcome):
+        self.after.append((module.name, outcome))
+
+
+def make_modules(declare=True):
+    return [
+        Counter("c0", 0, 1, declare),
+        Counter("c1", 10, 11, declare),
+        Counter("c2", 1, 2, declare),
+        Counter("c3", 11, 12, declare),
+        Counter("c4", 20, 0, declare),
+    ]
+
+
+def run_engine(modules, scans, **config):
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    engine = ScanEngine(mem, modules, ScanConfig(mode="step", **config))
+    hook = RecordingHook()
+    engine.register_hook(hook)
+    for _ in range(scans):
+        engine.step()
+    engine.close()
+    return engine, hook, mem.read_words("DM", 0, 30, source="test")
+
+
+class ModuleGraphTests(unittest.TestCase):
+    def test_conflicts_and_waves(self):
+        a = ModuleAccess(normalize([("DM", "word", 0, 0)]), normalize([("DM", "word", 1, 1)]))
+        b = ModuleAccess(normalize([("DM", "word", 1, 1)]), normalize([("DM", "word", 2, 2)]))
+        c = ModuleAccess(normalize(["R"]), normalize([("MR", "bit")]))
+        self.assertTrue(conflicts(a, b))
+        self.assertFalse(conflicts(a, c))
+        self.assertTrue(conflicts(c, None))
+        self.assertEqual(build_waves([a, c, b]), [[0, 1], [2]])
+        self.assertEqual(build_waves([a, None, c]), [[0], [1], [2]])
+
+    def test_parallel_matches_sequential(self):
+        _, seq_hook, seq = run_engine(make_modules(), 6)
+        engine, par_hook, par = run_engine(make_modules(), 6, parallel_workers=4)
+        self.assertEqual(par, seq)
+        self.assertEqual(engine._schedule.waves, [[0, 1], [2, 3, 4]])
+        self.assertEqual(sorted(par_hook.before), sorted(seq_hook.before))
+        self.assertEqual(sorted(par_hook.after), sorted(seq_hook.after))
+
+    def test_learned_access_sets(self):
+        _, _, seq = run_engine(make_modules(declare=False), 6)
+        engine, _, par = run_engine(make_modules(declare=False), 6, parallel_workers=4, learn_scans=2)
+        self.assertEqual(par, seq)
+        self.assertEqual(engine._schedule.waves, [[0, 1], [2, 3, 4]])
+
+    def test_violation_widens_schedule(self):
+        engine, _, _ = run_engine(make_modules() + [Wanderer()], 6, parallel_workers=4, learn_scans=2)
+        self.assertEqual(engine._schedule.violations, 1)
+        self.assertEqual(engine.metrics.counters()["parallel_schedule_violations_total"], 1)
+        self.assertEqual(engine._schedule.waves, [[0, 1], [2, 3, 4], [5]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.overlay import IntervalMap
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+def make_mem(read_your_writes=True):
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    return DeviceMemory(profile, WalStore(), DeviceMemoryOptions(read_your_writes=read_your_writes))
+
+
+class IntervalMapTests(unittest.TestCase):
+    def test_matches_flat_array(self):
+        rng = random.Random(7)
+        overlay = IntervalMap()
+        flat = [None] * 200
+        for _ in range(300):
+            addr = rng.randrange(0, 190)
+            values = [rng.randrange(1000) for _ in range(rng.randrange(1, 10))]
+            overlay.write(addr, values)
+            flat[addr : addr + len(values)] = values
+        for _ in range(100):
+            addr = rng.randrange(0, 180)
+            count = rng.randrange(1, 20)
+            out = [None] * count
+            overlay.apply(addr, out)
+            self.assertEqual(out, flat[addr : addr + count])
+        self.assertLessEqual(len(overlay), 200)
+
+
+class ReadYourWritesTests(unittest.TestCase):
+    def test_ladder_sees_own_pending_writes_only(self):
+        mem = make_mem()
+        mem.begin_scan(1, 10)
+        mem.write_words("MR", 10, [1, 2, 3], source="ladder:A")
+        mem.write_words("MR", 11, [9], source="ladder:A")
+        mem.write_words("MR", 12, [7], source="ladder:B")
+        self.assertEqual(mem.read_words("MR", 9, 5, source="ladder:A"), [0, 1, 9, 3, 0])
+        self.assertEqual(mem.read_words("MR", 9, 5, source="ladder:B"), [0, 0, 0, 7, 0])
+        self.assertEqual(mem.read_words("MR", 9, 5, source="adapter:main"), [0] * 5)
+        mem.write_bits("R", 0, [1], source="ladder:A")
+        self.assertEqual(mem.read_bits("R", 0, 1, source="ladder:A"), [1])
+
+        # Still pending during the next scan; applied at its end, after which the overlay is gone.
+        mem.apply_wal("scan_end", 1)
+        mem.begin_scan(2, 10)
+        self.assertEqual(mem.read_words("MR", 10, 3, source="ladder:A"), [1, 9, 3])
+        mem.apply_wal("scan_end", 2)
+        self.assertEqual(mem._overlays, {})
+        self.assertEqual(mem.read_words("MR", 10, 3, source="adapter:main"), [1, 9, 7])
+        self.assertEqual(mem.read_words("MR", 10, 3, source="ladder:A"), [1, 9, 7])
+
+    def test_discard_drops_overlay(self):
+        mem = make_mem()
+        mem.begin_scan(1, 10)
+        mem.write_words("MR", 0, [5], source="ladder:A")
+        mem.write_words("MR", 1, [6], source="adapter:main")
+        mem.discard_scan(1)
+        self.assertEqual(mem.read_words("MR", 0, 2, source="ladder:A"), [0, 0])
+        self.assertEqual(mem.wal.size(), 1)
+
+    def test_off_keeps_isolation(self):
+        mem = make_mem(read_your_writes=False)
+        mem.write_words("MR", 0, [5], source="ladder:A")
+        self.assertEqual(mem.read_words("MR", 0, 1, source="ladder:A"), [0])
+        self.assertEqual(mem._overlays, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from core.plc_parts import PlcParts
+from core.state_store import StateStore
+
+INPUTS = [0, 1, 1, 0, 1, 1, 1, 0, 0, 1, 0, 1, 1, 1, 1, 0]
+
+
+def make_parts(delta_ms: int = 10) -> PlcParts:
+    return PlcParts(StateStore(), lambda: delta_ms)
+
+
+class PlcPartsTests(unittest.TestCase):
+    def test_handles_match_string_api(self):
+        by_id, by_handle = make_parts(), make_parts()
+        h = {
+            "ton": by_handle.alloc_ton("t"),
+            "tof": by_handle.alloc_tof("t"),
+            "tp": by_handle.alloc_tp("t"),
+            "ctu": by_handle.alloc_ctu("c"),
+            "ctd": by_handle.alloc_ctd("c", 4),
+            "rise": by_handle.alloc_edge_rise("e"),
+            "fall": by_handle.alloc_edge_fall("e"),
+        }
+        for i, x in enumerate(INPUTS):
+            reset = i == 9
+            expected = (
+                by_id.ton("t", x, 25),
+                by_id.tof("t", x, 25),
+                by_id.tp("t", x, 35),
+                by_id.ctu("c", x, 3, reset=reset),
+                by_id.ctd("c", x, 4, reset=reset),
+                by_id.edge_rise("e", x),
+                by_id.edge_fall("e", x),
+            )
+            got = (
+                by_handle.ton_at(h["ton"], x, 25),
+                by_handle.tof_at(h["tof"], x, 25),
+                by_handle.tp_at(h["tp"], x, 35),
+                by_handle.ctu_at(h["ctu"], x, 3, reset=reset),
+                by_handle.ctd_at(h["ctd"], x, 4, reset=reset),
+                by_handle.edge_rise_at(h["rise"], x),
+                by_handle.edge_fall_at(h["fall"], x),
+            )
+            self.assertEqual(got, expected, f"step {i}")
+        self.assertEqual(by_id.state.snapshot(), by_handle.state.snapshot())
+        self.assertEqual(by_id.ctu("c", 0, 3), (False, 2))
+        self.assertEqual(by_id.tp("t", 1, 35), True)
+
+    def test_snapshot_keys_and_restore(self):
+        parts = make_parts()
+        h = parts.alloc_ctu("cnt")
+        for x in (1, 0, 1):
+            parts.ctu_at(h, x, 10)
+        parts.state.set("custom", "kept")
+        snap = parts.state.snapshot()
+        self.assertEqual(snap, {"ctu:cnt:cv": 2, "edge:rise:ctu:cnt:edge": 1, "custom": "kept"})
+        parts.ctu_at(h, 0, 10)
+        parts.ctu_at(h, 1, 10)
+        parts.state.restore(snap)
+        self.assertEqual(parts.ctu_at(h, 0, 10), (False, 2))
+        self.assertEqual(parts.state.get("custom"), "kept")
+
+        restored = make_parts()
+        restored.state.restore({"ctu:cnt:cv": 7, "edge:rise:ctu:cnt:edge": True})
+        self.assertEqual(restored.ctu("cnt", 1, 10), (False, 7))
+
+    def test_ton_group(self):
+        single, grouped = make_parts(), make_parts()
+        ids = [f"t{i}" for i in range(5)]
+        pts = [0, 10, 20, 30, 40]
+        group = grouped.ton_group(ids, pts)
+        self.assertTrue(group.contiguous)
+        for step in range(8):
+            inputs = [(step + i) % 4 != 0 for i in range(5)]
+            self.assertEqual(group.update(inputs), [single.ton(t, x, pt) for t, x, pt in zip(ids, inputs, pts)])
+        self.assertEqual(grouped.state.snapshot(), single.state.snapshot())
+
+        scattered = make_parts()
+        scattered.alloc_ton("t1")
+        scattered.alloc_ctu("c")
+        group = scattered.ton_group(ids, pts)
+        self.assertFalse(group.contiguous)
+        self.assertEqual(group.update([True] * 5), [True, True, False, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
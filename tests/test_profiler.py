@@ -0,0 +1,97 @@
+import json
+import unittest
+
+from adapters.tcp_json_v1 import TcpJsonV1Server
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.profiler import ScanProfiler
+from core.scan_engine import Hook, ScanConfig, ScanEngine
+from core.wal import WalStore
+from modules.A import Module as ModuleA
+from modules.B import Module as ModuleB
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class EndOnly(Hook):
+    def __init__(self):
+        self.ends = 0
+
+    def on_scan_end(self, ctx):
+        self.ends += 1
+
+
+class Duck:
+    # Not a Hook subclass; only the events it defines are called.
+    def __init__(self):
+        self.modules = []
+
+    def before_module(self, ctx, module):
+        self.modules.append(module.name)
+
+
+def make_engine():
+    profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+    mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+    return ScanEngine(mem, [ModuleA(), ModuleB()], ScanConfig(mode="step"))
+
+
+class HookIndexTests(unittest.TestCase):
+    def test_only_overridden_events_are_called(self):
+        engine = make_engine()
+        end_only, duck = EndOnly(), Duck()
+        engine.register_hook(end_only)
+        engine.register_hook(duck)
+        self.assertEqual(engine._on_scan_end, (end_only.on_scan_end,))
+        self.assertEqual(engine._before_module, (duck.before_module,))
+        self.assertEqual((engine._on_scan_begin, engine._after_module), ((), ()))
+        engine.step()
+        self.assertEqual((end_only.ends, duck.modules), (1, ["A", "B"]))
+        engine.unregister_hook(end_only)
+        engine.step()
+        self.assertEqual((end_only.ends, engine._on_scan_end), (1, ()))
+
+
+class ScanProfilerTests(unittest.TestCase):
+    def test_samples_every_n_scans(self):
+        engine = make_engine()
+        profiler = ScanProfiler(engine, every=5)
+        for _ in range(3):
+            engine.step()
+        profiler.start()
+        for _ in range(12):
+            engine.step()
+        report = profiler.report()
+        self.assertEqual((report["enabled"], report["every"], report["sampled_scans"]), (True, 5, 3))
+        a = report["modules"]["A"]
+        self.assertEqual(a["samples"], 3)
+        self.assertEqual(a["reads"], {"R": {"calls": 3, "points": 3}})
+        self.assertEqual(a["writes"], {"MR": {"calls": 3, "points": 3}})
+        self.assertEqual(report["modules"]["B"]["writes"], {"DM": {"calls": 3, "points": 3}, "MR": {"calls": 3, "points": 3}})
+
+        profiler.stop()
+        self.assertEqual(engine._before_module, ())
+        for _ in range(10):
+            engine.step()
+        self.assertEqual(profiler.report()["sampled_scans"], 3)
+        profiler.reset()
+        self.assertEqual(profiler.report()["modules"], {})
+
+    def test_adapter_op(self):
+        engine = make_engine()
+        server = TcpJsonV1Server(engine.mem, name="test", bind_ip="127.0.0.1", port=0)
+
+        def call(req):
+            return server._handle_line(json.dumps(req).encode("utf-8"))
+
+        self.assertEqual(call({"op": "profile"})["err"]["code"], "INVALID_REQUEST")
+        server.profiler = ScanProfiler(engine)
+        self.assertEqual(call({"op": "profile", "action": "start", "every": 0})["err"]["code"], "INVALID_REQUEST")
+        self.assertTrue(call({"op": "profile", "action": "start", "every": 2})["profile"]["enabled"])
+        for _ in range(4):
+            engine.step()
+        out = call({"op": "profile"})
+        self.assertEqual((out["profile"]["sampled_scans"], sorted(out["profile"]["modules"])), (2, ["A", "B"]))
+        self.assertFalse(call({"op": "profile", "action": "stop"})["profile"]["enabled"])
+
+
+if __name__ == "__main__":
+    unittest.main()
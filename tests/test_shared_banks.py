@@ -0,0 +1,93 @@
+import tempfile
+import threading
+import unittest
+from multiprocessing import shared_memory
+from pathlib import Path
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.scan_engine import ScanConfig, ScanEngine
+from core.shared_banks import SharedBankClient
+from core.wal import WalStore
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class MirrorModule(LadderModuleBase):
+    # Copies input R0 to MR0 and writes the scan id to both ends of a deferred MR word range.
+    name = "Mirror"
+
+    def execute(self, ctx):
+        ctx.mem.write_bits("MR", 0, ctx.mem.read_bits("R", 0, 1, source="ladder:Mirror"), source="ladder:Mirror")
+        ctx.mem.write_words("MR", 0, [ctx.scan_id & 0xFFFF], source="ladder:Mirror")
+        ctx.mem.write_words("MR", 3999, [ctx.scan_id & 0xFFFF], source="ladder:Mirror")
+
+
+class SharedBankTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+    def check_segment(self, options: DeviceMemoryOptions, attach):
+        mem = DeviceMemory(self.profile, WalStore(), options)
+        engine = ScanEngine(mem, [MirrorModule()], ScanConfig(mode="step"))
+        client = attach(mem.shared.name)
+        try:
+            self.assertEqual(client.banks[("Z", "dword")].base, 1)
+            mem.write_words("DM", 10, [1, 2, 3], source="adapter:test")
+            self.assertEqual(client.view("DM", "word")[10:13].tolist(), [1, 2, 3])
+            mem.write_bits("R", 0, [1], source="adapter:test")
+            for _ in range(3):
+                engine.step()
+            self.assertEqual(mem.read_bits("MR", 0, 1, source="adapter:test"), [1])
+            self.assertEqual(client.view("MR", "bit")[0], 1)
+            snap, scan_id = client.snapshot([("DM", "word"), ("MR", "word")])
+            self.assertEqual(scan_id, 3)
+            self.assertEqual(client.epoch() & 1, 0)
+            self.assertEqual(snap[("DM", "word")][20:26], bytes([1, 0, 2, 0, 3, 0]))
+        finally:
+            client.close()
+            engine.close()
+            mem.close()
+
+    def test_shm_segment(self):
+        self.check_segment(DeviceMemoryOptions(storage="shm"), lambda name: SharedBankClient(name=name))
+
+    def test_mmap_segment(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = str(Path(d) / "banks")
+            self.check_segment(DeviceMemoryOptions(storage="mmap", shared_path=path), lambda name: SharedBankClient(path=name))
+
+    def test_owner_close_unlinks(self):
+        mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(storage="shm"))
+        name = mem.shared.name
+        mem.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_snapshots_never_split_a_scan(self):
+        mem = DeviceMemory(self.profile, WalStore(), DeviceMemoryOptions(storage="shm"))
+        engine = ScanEngine(mem, [MirrorModule()], ScanConfig(mode="step"))
+        client = SharedBankClient(name=mem.shared.name)
+        done = threading.Event()
+
+        def scans():
+            for _ in range(300):
+                engine.step()
+            done.set()
+
+        thread = threading.Thread(target=scans)
+        thread.start()
+        out = None
+        try:
+            while not done.is_set():
+                out, _ = client.snapshot([("MR", "word")], out)
+                words = out[("MR", "word")]
+                self.assertEqual(words[0:2], words[7998:8000])
+        finally:
+            thread.join()
+            client.close()
+            engine.close()
+            mem.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import threading
 import unittest
 
 from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.histogram import Histogram
 from core.scan_engine import ScanConfig, ScanEngine
 from core.wal import WalStore
 from modules.base import LadderModuleBase
@@ -22,6 +24,14 @@ class FailingModule(LadderModuleBase):
         raise RuntimeError("boom")
 
 
+class TimerModule(LadderModuleBase):
+    name = "T"
+
+    def execute(self, ctx):
+        done = ctx.plc.ton("t1", True, 60_000)
+        ctx.mem.write_bits("MR", 20, [1 if done else 0], source="ladder:T")
+
+
 class SimulatorTests(unittest.TestCase):
     def setUp(self):
         profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
@@ -66,6 +76,62 @@ class SimulatorTests(unittest.TestCase):
         # one-shot on rising edge in module: writes same bit again, but still should be committed once
         self.assertEqual(self.mem.read_bits("MR", 10, 1, source="adapter:test"), [1])
 
+    def test_fast_mode_runs_on_virtual_time(self):
+        engine = ScanEngine(self.mem, [TimerModule()], ScanConfig(mode="fast", period_ms=10))
+        report = engine.run_fast(until_ms=59_990)
+        self.assertEqual((report.scans, report.virtual_ms), (5999, 59_990))
+        self.assertEqual(self.mem.read_bits("MR", 20, 1, source="adapter:test"), [0])
+        report = engine.run_fast(scans=2)
+        self.assertEqual(engine.clock.now_ms, 60_010)
+        self.assertEqual(self.mem.read_bits("MR", 20, 1, source="adapter:test"), [1])
+        self.assertGreater(report.scans_per_sec, 0)
+
+    def test_clock_wait_until(self):
+        engine = ScanEngine(self.mem, [], ScanConfig(mode="fast", period_ms=10))
+        self.assertFalse(engine.clock.wait_until(100, timeout=0.01))
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(engine.clock.wait_until(500, timeout=5)))
+        waiter.start()
+        engine.run_fast(scans=50)
+        waiter.join()
+        self.assertEqual(result, [True])
+
+    def test_overrun_policies(self):
+        period = 10
+        for policy, expected in (("skip", 40), ("catch_up", 20), ("stretch", 35)):
+            engine = ScanEngine(self.mem, [], ScanConfig(mode="real", period_ms=period, overrun_policy=policy))
+            # Scan scheduled at 10 ran until 35: next slot 20 is late by 15.
+            self.assertEqual(engine._next_deadline(10, 35, period), expected, policy)
+            self.assertEqual(engine.timing.overruns, 1)
+            self.assertEqual(engine._next_deadline(10, 15, period), 20)
+        self.assertEqual(engine.timing.overruns, 1)
+        with self.assertRaises(ValueError):
+            ScanEngine(self.mem, [], ScanConfig(overrun_policy="drop"))
+
+    def test_histogram_percentiles(self):
+        hist = Histogram((10, 100, 1000))
+        for value in [5] * 90 + [50] * 9 + [5000]:
+            hist.record(value)
+        snap = hist.snapshot()
+        self.assertEqual((snap["count"], snap["p50"], snap["p99"], snap["max"]), (100, 10, 100, 5000))
+        self.assertEqual(snap["buckets"][-1], ["inf", 1])
+
+    def test_real_mode_does_not_drift(self):
+        period = 5
+        engine = ScanEngine(self.mem, [], ScanConfig(mode="real", period_ms=period))
+        runner = threading.Thread(target=engine.run_forever)
+        runner.start()
+        engine.clock.wait_until(300, timeout=5)
+        engine.stop()
+        runner.join()
+        timing = engine.timing
+        self.assertEqual(timing.lateness_us.count, engine.clock.scan_id)
+        # Deadlines are absolute: every slot since the start either ran or was counted as skipped, and
+        # PLC time is the last slot's deadline plus that scan's lateness, however long sleeps overshot.
+        slots = engine.clock.scan_id + timing.skipped
+        ahead_ms = engine.clock.now_ms - slots * period
+        self.assertGreaterEqual(ahead_ms, 0)
+        self.assertLessEqual(ahead_ms, timing.lateness_us.max // 1000 + 1)
 
 if __name__ == "__main__":
     unittest.main()
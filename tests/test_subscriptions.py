@@ -0,0 +1,181 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from adapters.instance_router import InstanceRouter
+from adapters.subscriptions import SubscriptionHub, merge_ranges
+from adapters.tcp_json_v1 import ClientSession, TcpJsonV1Server
+from adapters.tcp_json_v1_async import AsyncTcpJsonV1Server
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class Collector:
+    def __init__(self):
+        self.frames = []
+        self.event = threading.Event()
+
+    def __call__(self, data):
+        self.frames.append(data)
+        self.event.set()
+
+
+class SubscriptionHubTests(unittest.TestCase):
+    def setUp(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        self.mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        self.hub = SubscriptionHub(self.mem)
+
+    def end_scan(self, scan_id):
+        self.hub.on_scan_end(SimpleNamespace(scan_id=scan_id))
+
+    def test_merge_ranges(self):
+        self.assertEqual(merge_ranges([(5, 6), (0, 2), (1, 4), (8, 9)]), [(0, 4), (5, 6), (8, 9)])
+
+    def test_diff_pushed_once_per_scan_and_shared(self):
+        a, b = Collector(), Collector()
+        name, values = self.hub.subscribe("a", a, "DM", "word", 10, 4)
+        self.hub.subscribe("b", b, "DM", "word", 10, 4)
+        self.assertEqual(values, [0, 0, 0, 0])
+        self.mem.write_words("DM", 11, [7], source="t")
+        self.mem.write_words("DM", 11, [8], source="t")
+        self.mem.write_words("DM", 13, [9], source="t")
+        self.mem.write_words("DM", 100, [1], source="t")
+        self.end_scan(1)
+        self.assertTrue(a.event.wait(2) and b.event.wait(2))
+        self.assertIs(a.frames[0], b.frames[0])
+        event = json.loads(a.frames[0])
+        self.assertEqual((event["sub"], event["scan"]), (name, 1))
+        self.assertEqual(event["changes"], [[11, 8], [13, 9]])
+
+        # Writes outside the range, or rewriting the same value, push nothing.
+        self.mem.write_words("DM", 100, [2], source="t")
+        self.mem.write_words("DM", 13, [9], source="t")
+        self.end_scan(2)
+        time.sleep(0.05)
+        self.assertEqual(len(a.frames), 1)
+
+    def test_unsubscribe_drops_topic(self):
+        a = Collector()
+        self.hub.subscribe("a", a, "MR", "bit", 0, 16)
+        self.assertEqual(self.hub.unsubscribe("a"), 1)
+        self.assertEqual(self.hub.subscriber_count(), 0)
+        self.mem.write_bits("MR", 0, [1], source="t")
+        self.end_scan(1)
+        time.sleep(0.05)
+        self.assertEqual(a.frames, [])
+
+    def test_stalled_session_overflows_without_blocking(self):
+        # Nothing drains `stalled`; the scan thread only queues, and the session is cut off at its limit.
+        dropped = []
+        stalled = ClientSession(None, max_pending=2, on_overflow=lambda: dropped.append(1))
+        live = Collector()
+        self.hub.subscribe(stalled, stalled.push, "DM", "word", 0, 1)
+        self.hub.subscribe("live", live, "DM", "word", 0, 1)
+        for scan_id in range(1, 6):
+            self.mem.write_words("DM", 0, [scan_id], source="t")
+            self.end_scan(scan_id)
+        self.assertEqual(len(live.frames), 5)
+        self.assertEqual((stalled.outbox.qsize(), stalled.overflowed, dropped), (2, True, [1]))
+
+    def test_failing_push_drops_only_that_session(self):
+        def broken(frame):
+            raise ValueError("session gone")
+
+        live = Collector()
+        self.hub.subscribe("broken", broken, "DM", "word", 0, 1)
+        self.hub.subscribe("broken", broken, "DM", "word", 5, 1)
+        self.hub.subscribe("live", live, "DM", "word", 5, 1)
+        self.mem.write_words("DM", 0, [1, 0, 0, 0, 0, 2], source="t")
+        self.end_scan(1)
+        self.assertEqual(len(live.frames), 1)
+        self.assertEqual(self.hub.subscriber_count(), 1)
+        self.assertEqual(self.mem.metrics.counters()["subscription_push_errors_total"], 1)
+
+
+class SubscriptionSocketTests(unittest.TestCase):
+    def test_subscribe_over_both_servers(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        hub = SubscriptionHub(mem)
+        for scan_id, cls in enumerate((TcpJsonV1Server, AsyncTcpJsonV1Server), start=1):
+            server = cls(mem, name="t", bind_ip="127.0.0.1", port=0, hub=hub)
+            server.start()
+            try:
+                with socket.create_connection(("127.0.0.1", server.port), timeout=2) as sock:
+                    reader = sock.makefile("rb")
+                    req = {"op": "subscribe", "items": [{"space": "word", "dev": "DM", "addr": 0, "count": 2}]}
+                    sock.sendall(json.dumps(req).encode() + b"\n")
+                    out = json.loads(reader.readline())
+                    self.assertTrue(out["ok"], out)
+                    mem.write_words("DM", 1, [scan_id], source="t")
+                    hub.on_scan_end(SimpleNamespace(scan_id=scan_id))
+                    event = json.loads(reader.readline())
+                    self.assertEqual(event["changes"], [[1, scan_id]])
+                    sock.sendall(b'{"op":"unsubscribe"}\n')
+                    self.assertEqual(json.loads(reader.readline())["removed"], 1)
+            finally:
+                server.stop()
+
+    def test_subscribe_through_instance_router(self):
+        # The router owns the connection and its writer; the subscription lives in the backend's hub.
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        hub = SubscriptionHub(mem)
+        backend = TcpJsonV1Server(mem, name="b", bind_ip="", port=0, hub=hub)
+        router = InstanceRouter({"plc01": backend}, name="front", bind_ip="127.0.0.1", port=0)
+        router.start()
+        try:
+            with socket.create_connection(("127.0.0.1", router.port), timeout=2) as sock:
+                reader = sock.makefile("rb")
+                req = {"instance_id": "plc01", "op": "subscribe", "items": [{"space": "word", "dev": "DM", "addr": 0, "count": 1}]}
+                sock.sendall(json.dumps(req).encode() + b"\n")
+                self.assertTrue(json.loads(reader.readline())["ok"])
+                mem.write_words("DM", 0, [5], source="t")
+                hub.on_scan_end(SimpleNamespace(scan_id=1))
+                self.assertEqual(json.loads(reader.readline())["changes"], [[0, 5]])
+        finally:
+            router.stop()
+
+    def test_router_session_overflow_keeps_scanning(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        hub = SubscriptionHub(mem)
+        backend = TcpJsonV1Server(mem, name="b", bind_ip="", port=0, hub=hub)
+        limits = {"max_points_per_request": 1024, "max_frame_bytes": 1 << 20, "max_push_backlog": 2}
+        router = InstanceRouter({"plc01": backend}, name="front", bind_ip="127.0.0.1", port=0, limits=limits)
+        router.start()
+        try:
+            with socket.socket() as sock:
+                # A small receive buffer and a client that never reads fill the outbox quickly.
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+                sock.connect(("127.0.0.1", router.port))
+                req = {"instance_id": "plc01", "op": "subscribe", "items": [{"space": "word", "dev": "DM", "addr": 0, "count": 1000}]}
+                sock.sendall(json.dumps(req).encode() + b"\n")
+                self.assertTrue(json.loads(sock.makefile("rb").readline())["ok"])
+                deadline = time.monotonic() + 10
+                scan_id = 0
+                while hub.subscriber_count() and time.monotonic() < deadline:
+                    scan_id += 1
+                    mem.write_words("DM", 0, [(scan_id + i) % 60000 for i in range(1000)], source="t")
+                    hub.on_scan_end(SimpleNamespace(scan_id=scan_id))
+                    time.sleep(0.001)
+            self.assertEqual(hub.subscriber_count(), 0)
+            self.assertEqual(router.metrics.counters(), {'adapter_push_overflows_total{adapter="front"}': 1})
+        finally:
+            router.stop()
+
+    def test_subscribe_without_hub_is_rejected(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        server = TcpJsonV1Server(DeviceMemory(profile, WalStore(), DeviceMemoryOptions()), name="t", bind_ip="127.0.0.1", port=0)
+        req = {"op": "subscribe", "items": [{"space": "word", "dev": "DM", "addr": 0, "count": 2}]}
+        out = server._handle_line(json.dumps(req).encode("utf-8"))
+        self.assertEqual(out["err"]["code"], "INVALID_REQUEST")
+
+
+if __name__ == "__main__":
+    unittest.main()
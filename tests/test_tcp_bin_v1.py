@@ -0,0 +1,59 @@
+import struct
+import unittest
+
+from adapters.tcp_bin_v1 import ERROR_CLASSES, ERROR_CODES, TcpBinV1Client, TcpBinV1Server
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.errors import OutOfRangeError, ReadOnlyError, SimError, UnknownDeviceError
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class TcpBinV1Tests(unittest.TestCase):
+    def setUp(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        self.mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        self.server = TcpBinV1Server(self.mem, name="bin", bind_ip="127.0.0.1", port=0)
+        self.server.start()
+        self.client = TcpBinV1Client("127.0.0.1", self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_word_and_dword_round_trip(self):
+        self.client.write("ZF", "word", 10, struct.pack("<3H", 1, 2, 65535), 3)
+        self.assertEqual(self.mem.read_words("ZF", 10, 3, source="adapter:test"), [1, 2, 65535])
+        self.mem.write_dwords("Z", 1, [2**32 - 1, 7], source="adapter:test")
+        self.assertEqual(struct.unpack("<2I", self.client.read("Z", "dword", 1, 2)), (2**32 - 1, 7))
+
+    def test_bits_are_packed(self):
+        self.mem.write_bits("R", 0, [1, 0, 1, 1, 0, 0, 0, 0, 1], source="adapter:test")
+        self.mem.apply_wal("scan_end", 1)
+        self.assertEqual(self.client.read("R", "bit", 0, 9), bytes([0b00001101, 0b1]))
+        self.client.write("LR", "bit", 0, bytes([0b101]), 3)
+        self.mem.apply_wal("scan_end", 2)
+        self.assertEqual(self.mem.read_bits("LR", 0, 3, source="adapter:test"), [1, 0, 1])
+
+    def test_errors_map_to_sim_error_types(self):
+        with self.assertRaises(UnknownDeviceError):
+            self.client.read("QQ", "word", 0, 1)
+        with self.assertRaises(OutOfRangeError):
+            self.client.read("DM", "word", 65535, 1)
+        with self.assertRaises(ReadOnlyError):
+            self.client.write("T", "bit", 0, b"\x01", 1)
+
+    def test_every_sim_error_has_a_status(self):
+        pending, seen = [SimError], []
+        while pending:
+            cls = pending.pop()
+            seen.append(cls)
+            pending.extend(cls.__subclasses__())
+        for cls in seen:
+            self.assertIn(cls, ERROR_CLASSES, cls.__name__)
+        self.assertEqual(len(ERROR_CODES), len(ERROR_CLASSES))
+        # Wire numbering only ever grows at the end.
+        self.assertEqual((ERROR_CODES["INTERNAL_ERROR"], ERROR_CODES["TOO_MANY_CLIENTS"]), (1, 9))
+
+
+if __name__ == "__main__":
+    unittest.main()
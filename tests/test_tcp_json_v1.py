@@ -0,0 +1,151 @@
+import json
+import socket
+import unittest
+
+from adapters.tcp_json_v1 import TcpJsonV1Server
+from adapters.tcp_json_v1_async import AsyncTcpJsonV1Server
+from core.clock import VirtualClock
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.wal import WalStore
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class TcpJsonV1Tests(unittest.TestCase):
+    def setUp(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        self.mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+        self.server = TcpJsonV1Server(self.mem, name="test", bind_ip="127.0.0.1", port=0)
+
+    def call(self, req):
+        return self.server._handle_line(json.dumps(req).encode("utf-8"))
+
+    def test_batch_reads_and_writes_with_per_item_errors(self):
+        out = self.call(
+            {
+                "op": "batch",
+                "items": [
+                    {"op": "write", "space": "word", "dev": "DM", "addr": 0, "values": [5, 6]},
+                    {"op": "read", "space": "word", "dev": "DM", "addr": 0, "count": 2},
+                    {"op": "read", "space": "word", "dev": "DM", "addr": 65535, "count": 1},
+                    {"op": "read", "space": "bit", "dev": "MR", "addr": 0, "count": 3},
+                ],
+            }
+        )
+        self.assertTrue(out["ok"])
+        self.assertEqual(out["results"][1]["values"], [5, 6])
+        self.assertEqual(out["results"][2]["err"]["code"], "OUT_OF_RANGE")
+        self.assertEqual(out["results"][3]["values"], [0, 0, 0])
+
+    def test_atomic_batch_is_all_or_nothing_and_lands_at_scan_boundary(self):
+        bad = self.call(
+            {
+                "op": "batch",
+                "atomic": True,
+                "items": [
+                    {"op": "write", "space": "word", "dev": "DM", "addr": 0, "values": [1]},
+                    {"op": "write", "space": "bit", "dev": "T", "addr": 0, "values": [1]},
+                ],
+            }
+        )
+        self.assertEqual(bad["err"]["code"], "READONLY")
+        self.assertEqual(self.mem.wal.size(), 0)
+        ok = self.call(
+            {
+                "op": "batch",
+                "atomic": True,
+                "items": [
+                    {"op": "write", "space": "word", "dev": "DM", "addr": 0, "values": [1]},
+                    {"op": "write", "space": "bit", "dev": "MR", "addr": 0, "values": [1]},
+                ],
+            }
+        )
+        self.assertTrue(ok["ok"])
+        self.assertEqual(self.mem.read_words("DM", 0, 1, source="adapter:test"), [0])
+        self.mem.apply_wal("scan_end", 1)
+        self.assertEqual(self.mem.read_words("DM", 0, 1, source="adapter:test"), [1])
+        self.assertEqual(self.mem.read_bits("MR", 0, 1, source="adapter:test"), [1])
+
+    def test_clock_op(self):
+        self.assertEqual(self.call({"op": "clock"})["err"]["code"], "INVALID_REQUEST")
+        self.server.clock = VirtualClock()
+        self.server.clock.advance(250, 25)
+        out = self.call({"op": "clock", "until_ms": 200, "timeout_ms": 1000})
+        self.assertEqual((out["time_ms"], out["reached"], out["diag"]["scan"]), (250, True, 25))
+        self.assertFalse(self.call({"op": "clock", "until_ms": 300, "timeout_ms": 10})["reached"])
+
+    def test_batch_item_validation(self):
+        out = self.call({"op": "batch", "items": [{"op": "read", "space": "word", "dev": "DM", "addr": 0}]})
+        self.assertEqual(out["err"]["code"], "INVALID_REQUEST")
+        self.assertIn("items[0]", out["err"]["message"])
+
+
+def recv_lines(sock, n):
+    data = b""
+    while data.count(b"\n") < n:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+class TcpJsonV1SocketTests(unittest.TestCase):
+    def setUp(self):
+        profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+        self.mem = DeviceMemory(profile, WalStore(), DeviceMemoryOptions())
+
+    def servers(self):
+        for cls in (TcpJsonV1Server, AsyncTcpJsonV1Server):
+            server = cls(self.mem, name="t", bind_ip="127.0.0.1", port=0, max_clients=2, timeout_ms=300)
+            server.start()
+            yield server
+            server.stop()
+
+    def test_pipelined_requests_answered_in_order(self):
+        for server in self.servers():
+            with socket.create_connection(("127.0.0.1", server.port)) as sock:
+                reqs = [{"id": i, "op": "write", "space": "word", "dev": "DM", "addr": i, "values": [i]} for i in range(50)]
+                reqs += [{"op": "read", "space": "word", "dev": "DM", "addr": 0, "count": 50}]
+                sock.sendall(b"".join(json.dumps(r).encode() + b"\n" for r in reqs))
+                out = recv_lines(sock, 51)
+            self.assertEqual(len(out), 51, server)
+            self.assertEqual(out[-1]["values"], list(range(50)))
+
+    def test_max_clients_and_idle_timeout(self):
+        for server in self.servers():
+            first = socket.create_connection(("127.0.0.1", server.port))
+            second = socket.create_connection(("127.0.0.1", server.port))
+            second.sendall(b'{"op":"read","space":"word","dev":"DM","addr":0,"count":1}\n')
+            recv_lines(second, 1)
+            with socket.create_connection(("127.0.0.1", server.port)) as third:
+                self.assertEqual(recv_lines(third, 1)[0]["err"]["code"], "TOO_MANY_CLIENTS")
+            first.settimeout(2)
+            self.assertEqual(first.recv(10), b"")
+            first.close()
+            second.close()
+
+    def test_async_clock_waits_do_not_hold_workers(self):
+        clock = VirtualClock()
+        server = AsyncTcpJsonV1Server(self.mem, name="t", bind_ip="127.0.0.1", port=0, clock=clock, workers=1)
+        server.start()
+        try:
+            waiters = [socket.create_connection(("127.0.0.1", server.port), timeout=5) for _ in range(3)]
+            for sock in waiters:
+                sock.sendall(b'{"op":"clock","until_ms":100,"timeout_ms":5000}\n')
+            with socket.create_connection(("127.0.0.1", server.port), timeout=1) as reader:
+                # With the wait on a worker, this would queue behind the first waiter for 5 s.
+                reader.sendall(b'{"op":"read","space":"word","dev":"DM","addr":0,"count":1}\n')
+                self.assertEqual(recv_lines(reader, 1)[0]["values"], [0])
+            clock.advance(50, 1)
+            clock.advance(60, 2)
+            for sock in waiters:
+                out = recv_lines(sock, 1)[0]
+                self.assertEqual((out["reached"], out["time_ms"]), (True, 110))
+                sock.close()
+            self.assertEqual(clock._watchers, ())
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
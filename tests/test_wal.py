@@ -0,0 +1,101 @@
+import json
+import unittest
+
+from core.device_memory import DeviceMemory
+from core.wal import WalEntry, WalStore, WriteCoalescer
+from profiles.profile_loader import DeviceProfileLoader
+
+
+def entry(scan_id, source, addr, target=None):
+    return WalEntry(
+        seq=0,
+        time_ms=1,
+        scan_id=scan_id,
+        target_scan_id=scan_id + 1 if target is None else target,
+        source=source,
+        dev="MR",
+        space="bit",
+        addr=addr,
+        values=[1],
+        policy="NEXT_SCAN",
+    )
+
+
+class WalStoreTests(unittest.TestCase):
+    def test_ready_entries_in_seq_order_across_targets(self):
+        wal = WalStore()
+        wal.append(entry(1, "adapter:a", 0, target=3))
+        wal.append(entry(1, "ladder:A", 1, target=2))
+        wal.append(entry(2, "ladder:A", 2, target=3))
+        wal.append(entry(3, "ladder:A", 3, target=4))
+        self.assertEqual([e.addr for e in wal.iter_ready(3)], [0, 1, 2])
+        wal.remove_applied(3)
+        self.assertEqual([e.addr for e in wal.iter_ready(10)], [3])
+
+    def test_discard_scan_keeps_other_sources_and_scans(self):
+        wal = WalStore()
+        wal.append(entry(1, "ladder:A", 0))
+        wal.append(entry(1, "adapter:main", 1))
+        wal.append(entry(2, "ladder:A", 2))
+        wal.discard_scan(1)
+        self.assertEqual([e.addr for e in wal.iter_ready(10)], [1, 2])
+        self.assertEqual(wal.size(), 2)
+
+    def test_retention_drops_oldest(self):
+        wal = WalStore(max_entries=3)
+        for i in range(5):
+            wal.append(entry(1, "ladder:A", i))
+        self.assertEqual(wal.size(), 3)
+        self.assertEqual([e.addr for e in wal.iter_ready(2)], [2, 3, 4])
+        wal.discard_scan(1)
+        self.assertEqual(wal.size(), 0)
+
+    def test_retention_bounds_the_indexes(self):
+        wal = WalStore(max_entries=10)
+        for i in range(10000):
+            wal.append(entry(1 + i // 1000, "ladder:A" if i % 3 else "adapter:a", i, target=1 + i % 7))
+        self.assertEqual(wal.size(), 10)
+        self.assertLessEqual(sum(len(b) for b in wal._by_target.values()), 10)
+        self.assertLessEqual(sum(len(l) for s in wal._by_scan.values() for l in s.values()), 10)
+        self.assertEqual([e.addr for e in wal.iter_ready(10)], list(range(9990, 10000)))
+
+    def test_ndjson_lines_follow_seq(self):
+        wal = WalStore()
+        wal.append(entry(1, "ladder:A", 5))
+        wal.append(entry(1, "ladder:B", 6))
+        lines = [json.loads(line) for line in wal.to_ndjson().split("\n")]
+        self.assertEqual([(r["seq"], r["addr"], r["result"]) for r in lines], [(1, 5, "accepted"), (2, 6, "accepted")])
+
+
+class WriteCoalescerTests(unittest.TestCase):
+    def test_merges_adjacent_and_overlapping_last_writer_wins(self):
+        merged = WriteCoalescer()
+        merged.add("DM", "word", 10, [1, 2, 3])
+        merged.add("DM", "word", 12, [9, 9])
+        merged.add("DM", "word", 11, [5])
+        merged.add("DM", "word", 20, [7])
+        merged.add("MR", "bit", 0, [1, 1])
+        self.assertEqual(
+            sorted(merged.runs()),
+            [("DM", "word", 10, [1, 5, 9, 9]), ("DM", "word", 20, [7]), ("MR", "bit", 0, [1, 1])],
+        )
+
+    def test_apply_uses_one_write_per_run(self):
+        mem = DeviceMemory(DeviceProfileLoader.load("profiles/kv8000.yaml"), WalStore())
+        for i in range(1000):
+            mem.write_bits("MR", i, [1], source=f"ladder:m{i % 3}")
+        for i in range(0, 1000, 2):
+            mem.write_bits("MR", i, [0], source="adapter:main")
+        mem.write_words("MR", 100, [4, 5], source="ladder:B")
+        self.assertEqual(mem.wal.size(), 1501)
+        mem.apply_wal("scan_end", 1)
+        self.assertEqual(mem.read_bits("MR", 0, 1000, source="test"), [0, 1] * 500)
+        self.assertEqual(mem.read_words("MR", 100, 2, source="test"), [4, 5])
+        counters = mem.metrics.counters()
+        self.assertEqual(counters["wal_applied_entries_total"], 1501)
+        self.assertEqual(counters["wal_apply_writes_total"], 2)
+        self.assertEqual(mem.wal.size(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
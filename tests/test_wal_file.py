@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from core.device_memory import DeviceMemory, DeviceMemoryOptions
+from core.errors import WalWriteError
+from core.scan_engine import ScanConfig, ScanEngine
+from core.wal import WalStore
+from core.wal_file import _FLUSH, WalFileWriter
+from modules.base import LadderModuleBase
+from profiles.profile_loader import DeviceProfileLoader
+
+
+class CoilModule(LadderModuleBase):
+    name = "Coil"
+
+    def execute(self, ctx):
+        ctx.mem.write_bits("MR", 0, [ctx.scan_id & 1], source="ladder:Coil")
+
+
+def read_frames(writer):
+    frames = []
+    for _, path in writer.segments():
+        frames.extend(json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+    return frames
+
+
+class WalFileTests(unittest.TestCase):
+    def setUp(self):
+        self.profile = DeviceProfileLoader.load("profiles/kv8000.yaml")
+
+    def test_group_mode_writes_entries_and_commit_markers(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = WalFileWriter(str(Path(d) / "wal.log"), sync_mode="group")
+            mem = DeviceMemory(self.profile, WalStore(sink=writer), DeviceMemoryOptions())
+            engine = ScanEngine(mem, [CoilModule()], ScanConfig(mode="step"))
+            mem.write_words("DM", 0, [7], source="adapter:test")
+            engine.step()
+            engine.step()
+            mem.wal.close()
+            frames = read_frames(writer)
+            self.assertEqual(frames[0]["policy"], "IMMEDIATE")
+            self.assertEqual(frames[0]["result"], "applied")
+            self.assertEqual([f["scan_id"] for f in frames if f.get("mark") == "commit"], [1, 2])
+            seqs = [f["seq"] for f in frames if "seq" in f]
+            self.assertEqual(seqs, sorted(seqs))
+
+    def test_segments_rotate_and_expire(self):
+        with tempfile.TemporaryDirectory() as d:
+            old = Path(d) / "wal.00000001.log"
+            old.write_text("{}\n", encoding="utf-8")
+            os.utime(old, (time.time() - 100, time.time() - 100))
+            writer = WalFileWriter(str(Path(d) / "wal.log"), retention_sec=10, segment_sec=0)
+            wal = WalStore(sink=writer)
+            wal.discard_scan(1)
+            wal.discard_scan(2)
+            writer.flush()
+            wal.close()
+            indexes = [index for index, _ in writer.segments()]
+            self.assertNotIn(1, indexes)
+            self.assertEqual(indexes, [2, 3])
+
+    def test_writer_failure_is_raised_not_hung(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = WalFileWriter(str(Path(d) / "wal.log"))
+            # The first segment path is taken by a directory, so opening it fails in the writer thread.
+            (Path(d) / "wal.00000001.log").mkdir()
+            wal = WalStore(sink=writer)
+            wal.discard_scan(1)
+            with self.assertRaises(WalWriteError):
+                writer.flush()
+            with self.assertRaises(WalWriteError):
+                wal.discard_scan(2)
+            with self.assertRaises(WalWriteError):
+                wal.close()
+
+    def test_rejected_write_leaves_memory_unchanged(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = WalFileWriter(str(Path(d) / "wal.log"))
+            (Path(d) / "wal.00000001.log").mkdir()
+            mem = DeviceMemory(self.profile, WalStore(sink=writer), DeviceMemoryOptions())
+            engine = ScanEngine(mem, [], ScanConfig(mode="step"))
+            mem.wal.discard_scan(0)
+            with self.assertRaises(WalWriteError):
+                writer.flush()
+            # DM is IMMEDIATE (applied, then logged); R is deferred to the next scan through the WAL.
+            with self.assertRaises(WalWriteError):
+                mem.write_words("DM", 0, [1], source="adapter:test")
+            with self.assertRaises(WalWriteError):
+                mem.write_bits("R", 0, [1], source="adapter:test")
+            self.assertEqual((mem.wal.size(), mem.wal.last_seq), (0, 0))
+            engine.step()
+            self.assertEqual(mem.read_words("DM", 0, 1, source="adapter:test"), [0])
+            self.assertEqual(mem.read_bits("R", 0, 1, source="adapter:test"), [0])
+
+    def test_backlog_is_bounded(self):
+        with tempfile.TemporaryDirectory() as d:
+            writer = WalFileWriter(str(Path(d) / "wal.log"), max_pending=2, put_timeout_sec=0.01)
+            release = threading.Event()
+            # A flush whose completion blocks keeps the writer thread busy while the queue fills.
+            writer._queue.put((_FLUSH, SimpleNamespace(set=release.wait)))
+            time.sleep(0.05)
+            writer.commit(1)
+            writer.commit(2)
+            with self.assertRaises(WalWriteError):
+                writer.commit(3)
+            release.set()
+            writer.close()
+            self.assertEqual([f["scan_id"] for f in read_frames(writer)], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()